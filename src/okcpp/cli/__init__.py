@@ -41,10 +41,14 @@ Usage:
 Commands:
   mkp (m)                Create a new CMake C++ project
   run (r)                Build & run a CMake project
+  bench (b)              Build in Release and benchmark the executable
+  compare (cmp)          A/B benchmark of two projects or two git revisions
+  sweep (sw)             Benchmark a matrix of compilers and optimisation flags
   build-template (bt)    Create a custom template from existing project
   delete-template (dt)   Delete a custom template
   doctor (d)             Check development environment
   config (c)             config file
+  daemon                 Manage the resident daemon (start | stop | status)
   help (h)               Show this help message
 
 Options:
@@ -55,6 +59,9 @@ Examples:
   ok-cpp mkp demo/hello           (or: ok-cpp m demo/hello)
   ok-cpp run                      (or: ok-cpp r)
   ok-cpp run demo/hello           (or: ok-cpp r demo/hello)
+  ok-cpp bench demo/hello -n 20   (or: ok-cpp b demo/hello -n 20)
+  ok-cpp compare demo/v1 demo/v2  (or: ok-cpp cmp -r HEAD~1)
+  ok-cpp sweep demo/hello         (or: ok-cpp sw demo/hello)
   ok-cpp build-template ./my-proj -n my-template
   ok-cpp delete-template my-template
   ok-cpp doctor                   (or: ok-cpp d)""")
@@ -81,6 +88,9 @@ def main() -> int:
     aliases = {
         "m": "mkp",
         "r": "run",
+        "b": "bench",
+        "cmp": "compare",
+        "sw": "sweep",
         "bt": "build-template",
         "dt": "delete-template",
         "d": "doctor",
@@ -94,6 +104,14 @@ def main() -> int:
         print_help()
         return 0
 
+    # 守护进程运行时，转发给它执行以省去启动开销
+    from okcpp.core.daemon import DAEMON_COMMANDS, forward_to_daemon
+
+    if cmd in DAEMON_COMMANDS:
+        code = forward_to_daemon(sys.argv[1:])
+        if code is not None:
+            return code
+
     # 导入并执行对应命令
     if resolved == "mkp":
         from okcpp.cli import mkp
@@ -101,6 +119,15 @@ def main() -> int:
     elif resolved == "run":
         from okcpp.cli import run
         return run.main(sys.argv[2:])
+    elif resolved == "bench":
+        from okcpp.cli import bench
+        return bench.main(sys.argv[2:])
+    elif resolved == "compare":
+        from okcpp.cli import compare
+        return compare.main(sys.argv[2:])
+    elif resolved == "sweep":
+        from okcpp.cli import sweep
+        return sweep.main(sys.argv[2:])
     elif resolved == "build-template":
         from okcpp.cli import build_template
         return build_template.main(sys.argv[2:])
@@ -113,6 +140,9 @@ def main() -> int:
     elif resolved == "config":
         from okcpp.cli import config
         return config.main(sys.argv[2:])
+    elif resolved == "daemon":
+        from okcpp.cli import daemon
+        return daemon.main(sys.argv[2:])
     else:
         print(f"Unknown command: {cmd}")
         print()
@@ -0,0 +1,167 @@
+"""Bench command - build in Release and benchmark the executable."""
+
+import shlex
+from pathlib import Path
+
+from okcpp.core.bench import DEFAULT_RUNS, DEFAULT_THRESHOLD, DEFAULT_WARMUP, bench
+from okcpp.cli.common import find_project, parse_compiler, parse_count
+from okcpp.core.builder import BuildConfig
+from okcpp.core.generator import GENERATORS, resolve_generator, validate_generator
+from okcpp.core.jobs import parse_jobs, plan_jobs
+from okcpp.core.launcher import resolve_launcher
+from okcpp.core.pgo import pgo
+from okcpp.utils.config import get_config
+from okcpp.utils.log import die, is_interactive
+from okcpp.utils.path import require_cmd
+
+
+def print_usage() -> None:
+    """打印使用说明。"""
+    print(f"""Usage:
+  ok-cpp bench [project] [options] [-- program args...]
+
+Arguments:
+  project                 Project path or name (default: current directory)
+
+Options:
+  -n, --runs <N>          Timed runs (default: {DEFAULT_RUNS})
+  -w, --warmup <N>        Untimed warmup runs (default: {DEFAULT_WARMUP})
+  -t, --threshold <PCT>   Flag a regression when the median is PCT% slower
+                          than the previous run (default: {DEFAULT_THRESHOLD:g})
+  -c, --compiler <name>   Compiler to use (gun | clang)
+  -G, --generator <name>  CMake generator (auto | ninja | make, default: config or auto)
+  -p, --project <name>    Override CMake project name
+  -j, --jobs <N>          Parallel build jobs (default: auto)
+  --pgo                   Build with profile-guided optimisation and LTO, and compare
+                          the result with the plain Release build
+  --train <args>          Program arguments for the PGO training run, as one quoted
+                          string (default: the benchmark arguments)
+  --train-input <file>    File fed to the PGO training run on stdin
+  -h, --help              Show this help message
+
+The project is always built in Release mode. Program output is discarded;
+results are appended to bench_history.json in the build dir.
+
+With --pgo, an instrumented build is trained, its profile merged and used for an
+optimised LTO build, then the optimised and Release builds run alternately.
+Each stage is cached and only reruns when its inputs change.
+
+Examples:
+  ok-cpp bench
+  ok-cpp bench demo/sort -n 30
+  ok-cpp bench -- 1000000
+  ok-cpp bench demo/sort --pgo --train "200000" -- 1000000""")
+
+
+def main(args: list[str]) -> int:
+    """Bench 命令主函数。
+
+    Args:
+        args: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    require_cmd("cmake")
+
+    config = get_config()
+
+    build_config = BuildConfig(
+        compiler=config.compiler or "gun",
+        build_type="Release",
+        project_dir=Path.cwd(),
+    )
+
+    # 解析参数
+    positional = []
+    program_args = []
+    runs = DEFAULT_RUNS
+    warmup = DEFAULT_WARMUP
+    threshold = DEFAULT_THRESHOLD
+    jobs = 0
+    generator = None
+    use_pgo = False
+    train_args = None
+    train_input = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            program_args = args[i + 1:]
+            break
+        elif arg in ("-n", "--runs", "-w", "--warmup", "-t", "--threshold",
+                     "-c", "--compiler", "-G", "--generator", "-p", "--project",
+                     "-j", "--jobs", "--train", "--train-input"):
+            if i + 1 >= len(args):
+                die(f"选项 {arg} 需要参数")
+            value = args[i + 1]
+            if arg in ("-n", "--runs"):
+                runs = parse_count(arg, value, 1)
+            elif arg in ("-w", "--warmup"):
+                warmup = parse_count(arg, value, 0)
+            elif arg in ("-t", "--threshold"):
+                try:
+                    threshold = float(value)
+                except ValueError:
+                    die(f"无效的阈值: {value}")
+            elif arg in ("-c", "--compiler"):
+                build_config.compiler = parse_compiler(arg, value)
+            elif arg in ("-G", "--generator"):
+                if not validate_generator(value):
+                    die(f"无效的生成器: {value}（可选: auto, {', '.join(GENERATORS)}）")
+                generator = value
+            elif arg in ("-p", "--project"):
+                build_config.project_name = value
+            elif arg == "--train":
+                try:
+                    train_args = shlex.split(value)
+                except ValueError as e:
+                    die(f"无效的训练参数: {e}")
+            elif arg == "--train-input":
+                train_input = Path(value).resolve()
+                if not train_input.is_file():
+                    die(f"训练输入文件不存在: {value}")
+            else:
+                try:
+                    jobs = parse_jobs(value) or 0
+                except ValueError:
+                    die(f"无效的并行任务数: {value}")
+            i += 2
+        elif arg == "--pgo":
+            use_pgo = True
+            i += 1
+        elif arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        elif arg in ("gun", "clang"):
+            build_config.compiler = arg
+            i += 1
+        else:
+            positional.append(arg)
+            i += 1
+
+    # 确定项目目录
+    build_config.project_dir = find_project(positional[0] if positional else None)
+    build_config.build_root = build_config.project_dir / "build"
+    build_config.max_build_cache_mb = config.get_build_cache_mb()
+    build_config.artifact_cache_mb = config.get_artifact_cache_mb()
+    build_config.parse_diagnostics = not is_interactive()
+    build_config.launcher = resolve_launcher(config.launcher)
+    build_config.linker = config.linker
+    build_config.generator = resolve_generator(generator or config.generator)
+    try:
+        configured_jobs = parse_jobs(config.jobs)
+    except ValueError:
+        configured_jobs = None
+    build_config.job_plan = plan_jobs(jobs, configured_jobs)
+
+    if use_pgo:
+        if runs < 2:
+            die("--pgo 需要至少 2 次计时运行 (-n)")
+        return pgo(build_config, runs=runs, warmup=warmup, program_args=program_args,
+                   train_args=train_args, train_input=train_input)
+    if train_args is not None or train_input is not None:
+        die("--train 和 --train-input 只能与 --pgo 一起使用")
+
+    return bench(build_config, runs=runs, warmup=warmup, threshold=threshold,
+                 program_args=program_args)
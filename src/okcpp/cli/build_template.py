@@ -1,36 +1,42 @@
 """build-template command - create custom template from existing project."""
 
+import os
 import re
 import shutil
 import subprocess
-import sys
-import tempfile
+import time
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from okcpp.cli import TEMPLATES_DIR
+from okcpp.core.builder import (
+    BuildConfig,
+    get_executable_path,
+    prepare_build,
+    run_cmake_build,
+    run_cmake_configure,
+)
+from okcpp.core.generator import resolve_generator
+from okcpp.core.instantiate import instantiate_tree
+from okcpp.core.jobs import parse_jobs, plan_jobs
+from okcpp.core.launcher import resolve_launcher
 from okcpp.core.template import create_project
+from okcpp.core.template_catalog import TemplateManifest, load_catalog
+from okcpp.utils.config import get_config
 from okcpp.utils.log import die, info, print_blue, print_green_b, print_purple_b, print_yellow_b
+from okcpp.utils.path import get_cache_dir
 
+# 模板验证的基础超时（秒），再按模板规模增加
+VALIDATE_BASE_TIMEOUT = 30
+# 每个源文件、每 MB 模板内容增加的超时（秒）
+VALIDATE_TIMEOUT_PER_SOURCE = 5
+VALIDATE_TIMEOUT_PER_MB = 1
 
-def _get_okcpp_command() -> str:
-    """获取 ok-cpp 命令的完整路径。
+# 验证失败时显示的日志行数
+VALIDATE_LOG_TAIL = 40
 
-    Returns:
-        ok-cpp 命令的绝对路径
-    """
-    # 尝试在 PATH 中查找 ok-cpp
-    okcpp_path = shutil.which("ok-cpp")
-    if okcpp_path:
-        return okcpp_path
-
-    # 如果 PATH 中找不到，使用开发环境中的 bin/ok-cpp
-    script_dir = Path(__file__).parent.parent.parent.parent / "bin"
-    okcpp_dev = script_dir / "ok-cpp"
-    if okcpp_dev.exists():
-        return str(okcpp_dev)
-
-    # 最后尝试使用当前 Python 解释器直接运行
-    return f"{sys.executable} -m okcpp.cli"
+# 计入超时的源文件扩展名
+_SOURCE_SUFFIXES = (".c", ".cc", ".cpp", ".cxx", ".c++", ".ui", ".qrc")
 
 
 def print_usage() -> None:
@@ -44,11 +50,13 @@ Arguments:
 Options:
   -n, --name <name>       Name for the new template (required)
   --skip-validate         Skip template validation (mkp + run test)
+  --timeout <seconds>     Validation timeout (default: scaled with template size, 0 = no limit)
   -h, --help              Show this help message
 
 Examples:
   ok-cpp build-template ./my-project -n my-template
-  ok-cpp build-template ~/projects/cool-app -n cool-template --skip-validate""")
+  ok-cpp build-template ~/projects/cool-app -n cool-template --skip-validate
+  ok-cpp build-template ./big-sdk-app -n sdk-app --timeout 600""")
 
 
 def validate_template_structure(source_dir: Path) -> bool:
@@ -76,63 +84,183 @@ def validate_template_structure(source_dir: Path) -> bool:
     return True
 
 
-def validate_template_works(template_name: str, templates_dir: Path) -> bool:
-    """验证模板是否可以正常工作（mkp + run 测试）。
+def compute_validate_timeout(template_dir: Path) -> float:
+    """按模板规模计算验证超时：基础时间 + 每个源文件 + 每 MB 内容。
+
+    Args:
+        template_dir: 模板目录
+
+    Returns:
+        超时（秒）
+    """
+    sources = 0
+    size = 0
+    for root, dirs, files in os.walk(template_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d != "build"]
+        for name in files:
+            if name.endswith(_SOURCE_SUFFIXES):
+                sources += 1
+            try:
+                size += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return (
+        VALIDATE_BASE_TIMEOUT
+        + sources * VALIDATE_TIMEOUT_PER_SOURCE
+        + size / (1024 * 1024) * VALIDATE_TIMEOUT_PER_MB
+    )
+
+
+def get_validate_dir(template_name: str) -> Path:
+    """获取模板验证使用的持久目录（测试项目和构建树保留，重复验证只重新编译变化的部分）。
 
     Args:
         template_name: 模板名称
-        templates_dir: 模板目录
 
     Returns:
-        如果模板可以正常工作返回 True
+        ${XDG_CACHE_HOME:-~/.cache}/ok-cpp/validate/<template_name>
     """
-    print_purple_b("[2/3] 验证模板可用性...")
+    return get_cache_dir() / "validate" / template_name
+
 
-    okcpp_cmd = _get_okcpp_command()
+def _recreate_project(project_dir: Path, template_name: str, templates_dir: Path) -> None:
+    """重新从模板创建测试项目。
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        test_project = Path(tmpdir) / "test_project"
+    改写后内容不变的文件（如 CMakeLists.txt）恢复原来的 mtime，避免触发不必要的重新配置。
 
-        # 使用 mkp 创建测试项目
-        print_blue(f"  → 创建测试项目: {test_project}")
+    Args:
+        project_dir: 测试项目目录
+        template_name: 模板名称
+        templates_dir: 模板目录
+    """
+    manifest = load_catalog(templates_dir).get(template_name)
+    previous: Dict[str, Tuple[bytes, int]] = {}
+    for name in manifest.rewrite if manifest else []:
+        path = project_dir / name
         try:
-            create_project(
-                target_path=str(test_project),
-                template_name=template_name,
-                project_name="test_project",
-                templates_dir=templates_dir,
-            )
-        except Exception as e:
-            print_yellow_b(f"  × 创建测试项目失败: {e}")
-            return False
+            previous[name] = (path.read_bytes(), path.stat().st_mtime_ns)
+        except OSError:
+            pass
+
+    if project_dir.exists():
+        shutil.rmtree(project_dir)
+    create_project(
+        target_path=str(project_dir),
+        template_name=template_name,
+        project_name="test_project",
+        templates_dir=templates_dir,
+    )
+
+    for name, (content, mtime) in previous.items():
+        path = project_dir / name
+        try:
+            if path.read_bytes() == content:
+                os.utime(path, ns=(mtime, mtime))
+        except OSError:
+            pass
 
-        # 尝试编译运行
-        print_blue("  → 编译测试项目...")
 
-        # 解析命令字符串
-        if " -m " in okcpp_cmd:
-            # Python module 方式: python3 -m okcpp.cli run path
-            cmd_parts = okcpp_cmd.split()
-            cmd = cmd_parts + ["run", str(test_project)]
-        else:
-            # 直接命令: /path/to/ok-cpp run path
-            cmd = [okcpp_cmd, "run", str(test_project)]
+def _print_log_tail(log_file: Path) -> None:
+    """输出验证日志的最后几行。"""
+    try:
+        lines = log_file.read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return
+    for line in lines[-VALIDATE_LOG_TAIL:]:
+        print(f"    {line}")
+    print_blue(f"  → 完整日志: {log_file}")
+
+
+def validate_template_works(template_name: str, templates_dir: Path,
+                            timeout: Optional[float] = None) -> bool:
+    """验证模板是否可以正常工作（在当前进程中创建测试项目、构建并运行）。
+
+    测试项目和构建树保存在持久的验证目录中，重复验证同一模板时只重新编译变化的部分。
+
+    Args:
+        template_name: 模板名称
+        templates_dir: 模板目录
+        timeout: 超时（秒），None 表示按模板规模计算，0 表示不限制
+
+    Returns:
+        如果模板可以正常工作返回 True
+    """
+    print_purple_b("[3/3] 验证模板可用性...")
+
+    if timeout is None:
+        timeout = compute_validate_timeout(templates_dir / template_name)
+    deadline = time.time() + timeout if timeout else None
+
+    validate_dir = get_validate_dir(template_name)
+    project_dir = validate_dir / "project"
+    log_file = validate_dir / "validate.log"
+
+    # 使用 mkp 创建测试项目
+    print_blue(f"  → 创建测试项目: {project_dir}")
+    try:
+        _recreate_project(project_dir, template_name, templates_dir)
+    except Exception as e:
+        print_yellow_b(f"  × 创建测试项目失败: {e}")
+        return False
+
+    config = get_config()
+    try:
+        configured_jobs = parse_jobs(config.jobs)
+    except ValueError:
+        configured_jobs = None
+    build_config = BuildConfig(
+        compiler=config.compiler or "gun",
+        build_type="Release",
+        project_dir=project_dir,
+        build_root=validate_dir / "build",
+        max_build_cache_mb=None,
+        launcher=resolve_launcher(config.launcher),
+        linker=config.linker,
+        generator=resolve_generator(config.generator),
+        job_plan=plan_jobs(0, configured_jobs),
+        log_file=log_file,
+        deadline=deadline,
+    )
+    log_file.unlink(missing_ok=True)
+
+    # 尝试编译运行
+    limit = f"{timeout:.0f}s" if timeout else "no limit"
+    print_blue(f"  → 编译测试项目 (timeout: {limit})...")
+    start = time.time()
+    try:
+        build_config = prepare_build(build_config)
+        if not run_cmake_configure(build_config) or not run_cmake_build(build_config):
+            print_yellow_b("  × 编译失败:")
+            _print_log_tail(log_file)
+            return False
 
+        exe_path = get_executable_path(build_config)
+        print_blue(f"  → 运行 {exe_path.name}...")
+        remaining = max(0.0, deadline - time.time()) if deadline else None
         result = subprocess.run(
-            cmd,
-            cwd=test_project,
+            [str(exe_path)],
+            cwd=project_dir,
+            stdin=subprocess.DEVNULL,
             capture_output=True,
             text=True,
-            timeout=30,
+            errors="replace",
+            timeout=remaining,
         )
+    except subprocess.TimeoutExpired:
+        print_yellow_b(f"  × 验证超时 ({limit})，可以用 --timeout 调整")
+        _print_log_tail(log_file)
+        return False
+    except (OSError, ValueError) as e:
+        print_yellow_b(f"  × 编译运行失败: {e}")
+        return False
 
-        if result.returncode != 0:
-            print_yellow_b(f"  × 编译运行失败:")
-            print(result.stderr)
-            return False
+    if result.returncode != 0:
+        print_yellow_b(f"  × 运行失败 (exit {result.returncode}):")
+        print(result.stdout + result.stderr)
+        return False
 
-        print_green_b("  ✓ 模板验证通过")
-        return True
+    print_green_b(f"  ✓ 模板验证通过 ({time.time() - start:.1f}s)")
+    return True
 
 
 def main(args: list[str]) -> int:
@@ -147,6 +275,7 @@ def main(args: list[str]) -> int:
     source_path = None
     template_name = None
     skip_validate = False
+    timeout = None
 
     # 解析参数
     i = 0
@@ -161,6 +290,16 @@ def main(args: list[str]) -> int:
         elif arg == "--skip-validate":
             skip_validate = True
             i += 1
+        elif arg == "--timeout":
+            if i + 1 >= len(args):
+                die("选项 --timeout 需要参数")
+            try:
+                timeout = float(args[i + 1])
+            except ValueError:
+                die(f"无效的超时时间: {args[i + 1]}")
+            if timeout < 0:
+                die(f"无效的超时时间: {args[i + 1]}")
+            i += 2
         elif arg in ("-h", "--help"):
             print_usage()
             return 0
@@ -206,15 +345,26 @@ def main(args: list[str]) -> int:
     print_blue(f"  → 目标: {target_dir}")
 
     try:
-        shutil.copytree(source_dir, target_dir)
+        stats = instantiate_tree(source_dir, target_dir)
     except Exception as e:
         die(f"复制模板失败: {e}")
 
     print_green_b(f"  ✓ 模板已复制到: {target_dir}")
+    print_blue(f"  → {stats.describe()}")
+
+    # 写入模板清单（源项目本身由模板创建时沿用其清单，只更新名称）
+    try:
+        manifest = TemplateManifest.load(target_dir)
+    except ValueError:
+        manifest = None
+    if manifest is None:
+        manifest = TemplateManifest(name=template_name)
+    manifest.name = template_name
+    manifest.save(target_dir)
 
     # 验证模板
     if not skip_validate:
-        if not validate_template_works(template_name, TEMPLATES_DIR):
+        if not validate_template_works(template_name, TEMPLATES_DIR, timeout=timeout):
             # 验证失败，删除已复制的模板
             print_yellow_b("  × 模板验证失败，正在删除...")
             shutil.rmtree(target_dir)
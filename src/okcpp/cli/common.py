@@ -0,0 +1,60 @@
+"""Argument helpers shared by the command modules."""
+
+from pathlib import Path
+from typing import Optional
+
+from okcpp.core.builder import find_project_dir
+from okcpp.utils.log import die
+
+# -c/--compiler 的可选值
+COMPILERS = ("gun", "clang")
+
+
+def parse_count(option: str, value: str, minimum: int) -> int:
+    """解析非负整数参数。
+
+    Args:
+        option: 选项名（用于错误信息）
+        value: 参数值
+        minimum: 最小值
+
+    Returns:
+        整数值
+    """
+    if not value.isdigit() or int(value) < minimum:
+        die(f"选项 {option} 需要不小于 {minimum} 的整数: {value}")
+    return int(value)
+
+
+def parse_compiler(option: str, value: str) -> str:
+    """解析编译器参数。
+
+    Args:
+        option: 选项名（用于错误信息）
+        value: 参数值
+
+    Returns:
+        编译器名称（gun / clang）
+    """
+    if value not in COMPILERS:
+        die(f"选项 {option} 的值无效: {value}（可选: {', '.join(COMPILERS)}）")
+    return value
+
+
+def find_project(arg: Optional[str]) -> Path:
+    """按路径或名称查找项目，未指定时使用当前目录。
+
+    Args:
+        arg: 项目路径或名称
+
+    Returns:
+        项目目录
+    """
+    if arg is None:
+        if not (Path.cwd() / "CMakeLists.txt").exists():
+            die("当前目录没有 CMakeLists.txt")
+        return Path.cwd()
+    project_dir = find_project_dir(arg)
+    if project_dir is None:
+        die(f"未找到项目: {arg}")
+    return project_dir
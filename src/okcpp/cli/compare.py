@@ -0,0 +1,197 @@
+"""Compare command - A/B benchmark of two projects or two git revisions."""
+
+import dataclasses
+from pathlib import Path
+from typing import List
+
+from okcpp.cli.common import find_project, parse_compiler, parse_count
+from okcpp.core.builder import BuildConfig
+from okcpp.core.compare import (
+    DEFAULT_COMPARE_RUNS,
+    DEFAULT_COMPARE_WARMUP,
+    CompareSide,
+    GitError,
+    checkout_revision,
+    compare,
+    get_git_toplevel,
+    resolve_revision,
+)
+from okcpp.core.generator import GENERATORS, resolve_generator, validate_generator
+from okcpp.core.jobs import parse_jobs, plan_jobs
+from okcpp.core.launcher import resolve_launcher
+from okcpp.utils.config import get_config
+from okcpp.utils.log import die, info, is_interactive
+from okcpp.utils.path import require_cmd
+
+
+def print_usage() -> None:
+    """打印使用说明。"""
+    print(f"""Usage:
+  ok-cpp compare <project_a> <project_b> [options] [-- program args...]
+  ok-cpp compare [project] -r <rev_a> [-r <rev_b>] [options] [-- program args...]
+
+Arguments:
+  project_a, project_b    Two projects to compare (path or name), A is the baseline
+  project                 Project whose git revisions are compared (default: current directory)
+
+Options:
+  -r, --rev <rev>         Git revision to compare (branch, tag, commit, HEAD~1, ...);
+                          with a single -r, the revision is compared with the working tree
+  -n, --runs <N>          Timed runs per side (default: {DEFAULT_COMPARE_RUNS}, at least 2)
+  -w, --warmup <N>        Untimed warmup runs per side (default: {DEFAULT_COMPARE_WARMUP})
+  --check-output          Fail if the two programs print different stdout
+  -c, --compiler <name>   Compiler to use (gun | clang)
+  -G, --generator <name>  CMake generator (auto | ninja | make, default: config or auto)
+  -j, --jobs <N>          Parallel build jobs (default: auto)
+  -h, --help              Show this help message
+
+Both sides are built in Release mode and run alternately (A B, B A, ...) so that
+drift affects both equally. The speedup of B over A is reported with a 95%
+bootstrap confidence interval and a Welch t-test.
+
+Examples:
+  ok-cpp compare demo/sort_v1 demo/sort_v2
+  ok-cpp compare demo/sort -r main -- 1000000
+  ok-cpp compare -r HEAD~1 -r HEAD --check-output""")
+
+
+def _revision_sides(base: BuildConfig, project_dir: Path, revisions: List[str]) -> List[CompareSide]:
+    """把项目的 git 版本检出到 worktree，创建比较的两方。
+
+    Args:
+        base: 基础构建配置
+        project_dir: 项目目录
+        revisions: 一个或两个版本，只有一个时与工作区比较
+
+    Returns:
+        比较的两方
+    """
+    repo = get_git_toplevel(project_dir)
+    if repo is None:
+        die(f"项目不在 git 仓库中: {project_dir}")
+    relative = project_dir.resolve().relative_to(repo.resolve())
+
+    sides = []
+    for revision in revisions:
+        try:
+            commit = resolve_revision(repo, revision)
+            info(f"Checking out {revision} ({commit[:12]})...")
+            worktree = checkout_revision(repo, commit)
+        except GitError as e:
+            die(f"无法检出版本 {revision}: {e}")
+        sides.append((f"{revision} ({commit[:12]})", worktree / relative))
+    if len(revisions) == 1:
+        sides.append(("working tree", project_dir))
+
+    return [
+        CompareSide(
+            label=label,
+            config=dataclasses.replace(base, project_dir=directory, build_root=directory / "build"),
+        )
+        for label, directory in sides
+    ]
+
+
+def main(args: list[str]) -> int:
+    """Compare 命令主函数。
+
+    Args:
+        args: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    require_cmd("cmake")
+
+    config = get_config()
+
+    base = BuildConfig(
+        compiler=config.compiler or "gun",
+        build_type="Release",
+    )
+
+    # 解析参数
+    positional = []
+    revisions = []
+    program_args = []
+    runs = DEFAULT_COMPARE_RUNS
+    warmup = DEFAULT_COMPARE_WARMUP
+    check_output = False
+    jobs = 0
+    generator = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            program_args = args[i + 1:]
+            break
+        elif arg in ("-r", "--rev", "-n", "--runs", "-w", "--warmup",
+                     "-c", "--compiler", "-G", "--generator", "-j", "--jobs"):
+            if i + 1 >= len(args):
+                die(f"选项 {arg} 需要参数")
+            value = args[i + 1]
+            if arg in ("-r", "--rev"):
+                revisions.append(value)
+            elif arg in ("-n", "--runs"):
+                runs = parse_count(arg, value, 2)
+            elif arg in ("-w", "--warmup"):
+                warmup = parse_count(arg, value, 0)
+            elif arg in ("-c", "--compiler"):
+                base.compiler = parse_compiler(arg, value)
+            elif arg in ("-G", "--generator"):
+                if not validate_generator(value):
+                    die(f"无效的生成器: {value}（可选: auto, {', '.join(GENERATORS)}）")
+                generator = value
+            else:
+                try:
+                    jobs = parse_jobs(value) or 0
+                except ValueError:
+                    die(f"无效的并行任务数: {value}")
+            i += 2
+        elif arg == "--check-output":
+            check_output = True
+            i += 1
+        elif arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        elif arg.startswith("-"):
+            die(f"未知选项: {arg}")
+        else:
+            positional.append(arg)
+            i += 1
+
+    base.max_build_cache_mb = config.get_build_cache_mb()
+    base.artifact_cache_mb = config.get_artifact_cache_mb()
+    base.parse_diagnostics = not is_interactive()
+    base.launcher = resolve_launcher(config.launcher)
+    base.linker = config.linker
+    base.generator = resolve_generator(generator or config.generator)
+    try:
+        configured_jobs = parse_jobs(config.jobs)
+    except ValueError:
+        configured_jobs = None
+    base.job_plan = plan_jobs(jobs, configured_jobs)
+
+    # 确定比较的两方
+    if revisions:
+        if len(revisions) > 2:
+            die("最多指定两个版本 (-r)")
+        if len(positional) > 1:
+            die("比较 git 版本时只能指定一个项目")
+        require_cmd("git")
+        project_dir = find_project(positional[0] if positional else None)
+        sides = _revision_sides(base, project_dir, revisions)
+    else:
+        if len(positional) != 2:
+            die("用法: ok-cpp compare <project_a> <project_b> 或 ok-cpp compare [project] -r <rev>")
+        sides = []
+        for arg in positional:
+            project_dir = find_project(arg)
+            sides.append(CompareSide(
+                label=str(project_dir),
+                config=dataclasses.replace(base, project_dir=project_dir,
+                                           build_root=project_dir / "build"),
+            ))
+
+    return compare(sides, runs=runs, warmup=warmup, program_args=program_args,
+                   check_output=check_output)
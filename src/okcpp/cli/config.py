@@ -17,11 +17,21 @@ def print_usage() -> None:
 Config keys:
   compiler        default compiler for 'ok-cpp run'   (clang | gun)
   template        default template for 'ok-cpp mkp'
+  jobs            parallel build jobs for 'ok-cpp run' (auto | N)
+  build_cache_mb  size cap for per-config build dirs, LRU evicted (MB, 0 = unlimited)
+  launcher        compiler cache for 'ok-cpp run' (auto | ccache | sccache | none)
+  linker          linker for 'ok-cpp run' (auto | mold | lld | gold | default;
+                  auto prefers mold > lld > gold, default = the compiler's own choice)
+  generator       CMake generator for 'ok-cpp run' (auto | ninja | make; auto prefers ninja)
+  unity_batch     translation units per unity source for 'ok-cpp run --unity' (N)
+  artifact_cache_mb
+                  size cap for the shared first-build artifact cache (MB, default 0 = disabled)
 
 Examples:
   ok-cpp config show
   ok-cpp config set compiler clang
   ok-cpp config set template qt
+  ok-cpp config set jobs 8
   ok-cpp config reset""")
 
 
@@ -39,6 +49,13 @@ def cmd_show() -> int:
     print()
     print_blue(f"COMPILER={config.compiler}")
     print_blue(f"TEMPLATE_NAME={config.template_name}")
+    print_blue(f"JOBS={config.jobs}")
+    print_blue(f"BUILD_CACHE_MB={config.build_cache_mb}")
+    print_blue(f"LAUNCHER={config.launcher}")
+    print_blue(f"LINKER={config.linker}")
+    print_blue(f"GENERATOR={config.generator}")
+    print_blue(f"UNITY_BATCH={config.unity_batch}")
+    print_blue(f"ARTIFACT_CACHE_MB={config.artifact_cache_mb}")
 
     return 0
 
@@ -63,6 +80,34 @@ def cmd_set(key: str, value: str) -> int:
         if not config.validate_template(value):
             die(f"Template not found: {value}")
         config.template_name = value
+    elif key == "jobs":
+        if not config.validate_jobs(value):
+            die(f"Invalid jobs: {value} (auto | N)")
+        config.jobs = value
+    elif key == "build_cache_mb":
+        if not config.validate_build_cache_mb(value):
+            die(f"Invalid build_cache_mb: {value} (MB, 0 = unlimited)")
+        config.build_cache_mb = value
+    elif key == "launcher":
+        if not config.validate_launcher(value):
+            die(f"Invalid launcher: {value} (auto | ccache | sccache | none)")
+        config.launcher = value
+    elif key == "linker":
+        if not config.validate_linker(value):
+            die(f"Invalid linker: {value} (auto | mold | lld | gold | default)")
+        config.linker = value
+    elif key == "generator":
+        if not config.validate_generator(value):
+            die(f"Invalid generator: {value} (auto | ninja | make)")
+        config.generator = value
+    elif key == "unity_batch":
+        if not config.validate_unity_batch(value):
+            die(f"Invalid unity_batch: {value} (positive integer)")
+        config.unity_batch = value
+    elif key == "artifact_cache_mb":
+        if not config.validate_build_cache_mb(value):
+            die(f"Invalid artifact_cache_mb: {value} (MB, 0 = disabled)")
+        config.artifact_cache_mb = value
     else:
         die(f"Unknown config key: {key}")
 
@@ -0,0 +1,116 @@
+"""Daemon command - manage the resident ok-cpp daemon."""
+
+from okcpp.core.daemon import DEFAULT_IDLE_TIMEOUT, get_socket_path, request, start_daemon
+from okcpp.utils.log import die, err, info, print_blue, print_green_b, print_yellow_b
+
+
+def print_usage() -> None:
+    """打印使用说明。"""
+    print(f"""Usage:
+  ok-cpp daemon start [--idle <seconds>]
+  ok-cpp daemon stop
+  ok-cpp daemon status
+
+While the daemon is running, 'run', 'bench', 'compare', 'sweep', 'mkp' and 'doctor'
+are forwarded to it and skip Python/rich startup. Set OKCPP_NO_DAEMON=1 to bypass it.
+
+Options:
+  --idle <seconds>        Exit after this many idle seconds (default: {DEFAULT_IDLE_TIMEOUT})
+
+Examples:
+  ok-cpp daemon start
+  ok-cpp daemon start --idle 3600
+  ok-cpp daemon stop""")
+
+
+def cmd_start(args: list[str]) -> int:
+    """启动守护进程。
+
+    Args:
+        args: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    idle_timeout = DEFAULT_IDLE_TIMEOUT
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--idle":
+            if i + 1 < len(args) and args[i + 1].isdigit():
+                idle_timeout = int(args[i + 1])
+                i += 2
+            else:
+                die("选项 --idle 需要一个整数参数（秒）")
+        else:
+            die(f"未知参数: {arg}")
+
+    try:
+        pid = start_daemon(idle_timeout=idle_timeout)
+    except PermissionError as e:
+        die(str(e))
+    if pid is None:
+        err("守护进程启动失败")
+        return 1
+
+    print_green_b(f"Daemon running (pid {pid})")
+    print_blue(f"Socket: {get_socket_path()}")
+    return 0
+
+
+def cmd_stop() -> int:
+    """停止守护进程。
+
+    Returns:
+        退出码
+    """
+    if request({"type": "stop"}) is None:
+        print_yellow_b("Daemon is not running")
+        return 0
+    info("Daemon stopped")
+    return 0
+
+
+def cmd_status() -> int:
+    """显示守护进程状态。
+
+    Returns:
+        退出码
+    """
+    status = request({"type": "ping"})
+    if status is None:
+        print_yellow_b("Daemon is not running")
+        return 1
+
+    print_green_b(f"Daemon running (pid {status['pid']})")
+    print_blue(f"Socket: {get_socket_path()}")
+    print_blue(f"Uptime: {status['uptime']:.0f}s")
+    print_blue(f"Active requests: {status['active']}")
+    print_blue(f"Idle timeout: {status['idle_timeout']}s")
+    return 0
+
+
+def main(args: list[str]) -> int:
+    """Daemon 命令主函数。
+
+    Args:
+        args: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    if not args or args[0] in ("-h", "--help", "help"):
+        print_usage()
+        return 0
+
+    cmd = args[0]
+    if cmd == "start":
+        return cmd_start(args[1:])
+    if cmd == "stop":
+        return cmd_stop()
+    if cmd == "status":
+        return cmd_status()
+
+    err(f"Unknown daemon command: {cmd}")
+    print_usage()
+    return 1
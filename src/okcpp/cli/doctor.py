@@ -1,13 +1,22 @@
 """Doctor command - check development environment."""
 
-from okcpp.core.detector import (
-    check_build_tools,
-    check_compilers,
-    check_debug_tools,
-    check_qt,
-    run_doctor,
-)
-from okcpp.utils.log import info, ok, print_section, warn
+from okcpp.core.detector import run_doctor
+from okcpp.core.linker import resolve_linker
+from okcpp.utils.config import get_config
+from okcpp.utils.log import die, info, ok, print_section, warn
+
+
+def print_usage() -> None:
+    """打印使用说明。"""
+    print("""Usage:
+  ok-cpp doctor [--refresh]
+
+Options:
+  --refresh               Ignore cached tool versions and probe again
+  -h, --help              Show this help message
+
+Tool versions are probed in parallel and cached in ~/.cache/ok-cpp/tools.json
+(invalidated automatically when a tool's path or mtime changes).""")
 
 
 def main(args: list[str]) -> int:
@@ -19,11 +28,22 @@ def main(args: list[str]) -> int:
     Returns:
         退出码
     """
+    refresh = False
+    for arg in args:
+        if arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        elif arg == "--refresh":
+            refresh = True
+        else:
+            die(f"未知参数: {arg}")
+
     info("ok-cpp doctor - environment check")
+    results = run_doctor(refresh=refresh)
 
     # 编译器
     print_section("C++ Compilers")
-    compilers = check_compilers()
+    compilers = results["compilers"]
     has_compiler = False
     for compiler in compilers:
         if compiler.installed:
@@ -37,28 +57,43 @@ def main(args: list[str]) -> int:
 
     # 构建工具
     print_section("Build Tools")
-    build_tools = check_build_tools()
+    build_tools = results["build_tools"]
     for tool in build_tools.values():
         if tool.installed:
             ok(str(tool))
         else:
             if tool.command == "ninja":
                 warn(f"{tool.name}: not found (optional, recommended)")
+            elif tool.command in ("ccache", "sccache"):
+                warn(f"{tool.name}: not found (optional, compiler cache)")
             else:
                 warn(str(tool))
 
+    # 链接器
+    print_section("Linkers")
+    linkers = results["linkers"]
+    for tool in linkers.values():
+        if tool.installed:
+            ok(str(tool))
+        else:
+            warn(f"{tool.name}: not found (optional, faster linking)")
+    selected = resolve_linker(get_config().linker, get_config().compiler or "gun")
+    info(f"  Linker for builds: {selected or 'default'} (ok-cpp config set linker <name>)")
+
     # 调试工具
-    print_section("Debug Tools")
-    debug_tools = check_debug_tools()
+    print_section("Debug & Profiling Tools")
+    debug_tools = results["debug_tools"]
     for tool in debug_tools.values():
         if tool.installed:
             ok(str(tool))
-        else:
+        elif tool.command == "gdb":
             warn(f"{tool.name}: not found (required for Debug mode)")
+        else:
+            warn(f"{tool.name}: not found (optional, used by run --profile)")
 
     # Qt
     print_section("Qt (Template Dependency)")
-    qt = check_qt()
+    qt = results["qt"]
     if qt.installed:
         ok(str(qt))
     else:
@@ -68,6 +103,6 @@ def main(args: list[str]) -> int:
     # 总结
     print()
     info("Doctor check finished.")
-    info("If something is missing, install it and re-run: ok-cpp doctor")
+    info("If something is missing, install it and re-run: ok-cpp doctor --refresh")
 
     return 0
@@ -1,7 +1,8 @@
 """Mkp command - create project from template."""
 
 from okcpp.cli import TEMPLATES_DIR
-from okcpp.core.template import create_project, list_templates
+from okcpp.core.template import create_project
+from okcpp.core.template_catalog import load_catalog
 from okcpp.utils.config import get_config
 from okcpp.utils.log import die, info, print_green_b, print_yellow_b
 
@@ -15,7 +16,7 @@ Arguments:
   path              Target directory for the project
 
 Options:
-  -t, --template <name>   Template to use (default or qt)
+  -t, --template <name>   Template to use (see --list)
   -n, --name <name>       Project name for CMake project()
   -l, --list              List available templates
 
@@ -33,9 +34,14 @@ def cmd_list_templates() -> int:
         退出码
     """
     print_yellow_b("可用模板：")
-    templates = list_templates(TEMPLATES_DIR)
-    for template in templates:
-        print_green_b(f"  - {template}")
+    catalog = load_catalog(TEMPLATES_DIR)
+    width = max((len(name) for name in catalog), default=0)
+    for name, manifest in catalog.items():
+        line = f"  - {name:<{width}}  {manifest.description}".rstrip()
+        missing = manifest.missing_tools()
+        if missing:
+            line += f" (missing: {', '.join(missing)})"
+        print_green_b(line)
     return 0
 
 
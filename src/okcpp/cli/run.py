@@ -2,12 +2,79 @@
 
 from pathlib import Path
 
-from okcpp.core.builder import BuildConfig, build_and_run, find_project_dir
+from okcpp.cli.common import find_project, parse_compiler
+from okcpp.core.builder import BuildConfig, build_and_run
+from okcpp.core.generator import GENERATORS, resolve_generator, validate_generator
+from okcpp.core.jobs import parse_jobs, plan_jobs
+from okcpp.core.launcher import resolve_launcher
+from okcpp.core.timings import TIMINGS_FORMATS
+from okcpp.core.unity import parse_unity_batch
 from okcpp.utils.config import get_config
-from okcpp.utils.log import die
+from okcpp.utils.log import die, is_interactive
 from okcpp.utils.path import require_cmd
 
 
+def print_usage() -> None:
+    """打印使用说明。"""
+    print("""Usage:
+  ok-cpp run [project] [options]
+
+Arguments:
+  project                 Project path or name (default: current directory)
+                          With --all: root directory to search (default: current directory)
+
+Options:
+  -d, --debug             Build in Debug mode and start GDB
+  -c, --compiler <name>   Compiler to use (gun | clang)
+  -G, --generator <name>  CMake generator (auto | ninja | make, default: config or auto)
+  -p, --project <name>    Override CMake project name
+  -j, --jobs <N>          Parallel build jobs (default: auto, based on CPU/load/memory)
+  --reconfigure           Force CMake configure even if nothing changed
+  -w, --watch             Rebuild and rerun whenever source files change
+  -a, --all               Build every CMake project under the root in parallel (no run)
+  --pch                   Precompile standard library (and Qt) headers for every target
+  --unity[=N]             Unity build, N translation units per batch (default: config
+                          unity_batch); falls back to a normal build on symbol clashes
+  --timings[=FORMAT]      Report configure/build/link/run times and the slowest
+                          translation units (FORMAT: table | json | csv, default: table);
+                          json/csv reports go to stderr unless --timings-out is given
+  --timings-out <FILE>    Write the json/csv timings report to FILE (implies --timings=json)
+  --profile[=TOOL]        Build with -O2 -g and frame pointers, run under a CPU profiler
+                          (TOOL: perf | gprof, default: perf if usable, else gprof) and
+                          report hot functions, hardware counters and a flame graph
+  -h, --help              Show this help message
+
+Exit codes:
+  100 / 101 / 102         Configure / build / run failed (otherwise the program's exit code)
+                          Without a terminal on stdin (or with CI set), failures exit at once
+                          and the first compiler/linker/CMake error is summarised
+
+Examples:
+  ok-cpp run
+  ok-cpp run demo/hello -c clang
+  ok-cpp run -j 4
+  ok-cpp run --watch
+  ok-cpp run --timings=csv --timings-out timings.csv
+  ok-cpp run --profile
+  ok-cpp run --all demo -j 16""")
+
+
+def _parse_jobs_arg(value: str) -> int:
+    """解析 -j/--jobs 参数。
+
+    Args:
+        value: 参数值
+
+    Returns:
+        任务数，0 表示自动
+    """
+    try:
+        return parse_jobs(value) or 0
+    except ValueError:
+        die(f"无效的并行任务数: {value}")
+        return 0
+
+
 def main(args: list[str]) -> int:
     """Run 命令主函数。
 
@@ -28,11 +95,17 @@ def main(args: list[str]) -> int:
         compiler=config.compiler or "gun",
         build_type="Release",
         project_dir=Path.cwd(),
-        build_dir=Path("build"),
     )
 
     # 解析参数
     positional = []
+    jobs = 0
+    watch = False
+    build_all_projects = False
+    generator = None
+    unity_batch = None
+    profile = False
+    profiler = None
     i = 0
     while i < len(args):
         arg = args[i]
@@ -41,16 +114,75 @@ def main(args: list[str]) -> int:
             i += 1
         elif arg in ("-c", "--compiler"):
             if i + 1 < len(args):
-                build_config.compiler = args[i + 1]
+                build_config.compiler = parse_compiler(arg, args[i + 1])
                 i += 2
             else:
                 die("选项 -c/--compiler 需要参数")
+        elif arg in ("-G", "--generator"):
+            if i + 1 < len(args):
+                generator = args[i + 1]
+                if not validate_generator(generator):
+                    die(f"无效的生成器: {generator}（可选: auto, {', '.join(GENERATORS)}）")
+                i += 2
+            else:
+                die("选项 -G/--generator 需要参数")
         elif arg in ("-p", "--project"):
             if i + 1 < len(args):
                 build_config.project_name = args[i + 1]
                 i += 2
             else:
                 die("选项 -p/--project 需要参数")
+        elif arg in ("-j", "--jobs"):
+            if i + 1 < len(args):
+                jobs = _parse_jobs_arg(args[i + 1])
+                i += 2
+            else:
+                die("选项 -j/--jobs 需要参数")
+        elif arg.startswith("-j") and arg[2:].isdigit():
+            jobs = _parse_jobs_arg(arg[2:])
+            i += 1
+        elif arg == "--reconfigure":
+            build_config.reconfigure = True
+            i += 1
+        elif arg in ("-w", "--watch"):
+            watch = True
+            i += 1
+        elif arg in ("-a", "--all"):
+            build_all_projects = True
+            i += 1
+        elif arg == "--pch":
+            build_config.pch = True
+            i += 1
+        elif arg == "--unity" or arg.startswith("--unity="):
+            build_config.unity = True
+            if "=" in arg:
+                try:
+                    unity_batch = parse_unity_batch(arg.partition("=")[2])
+                except ValueError:
+                    die(f"无效的 unity 批大小: {arg.partition('=')[2]}")
+            i += 1
+        elif arg == "--timings" or arg.startswith("--timings="):
+            output_format = arg.partition("=")[2] or "table"
+            if output_format not in TIMINGS_FORMATS:
+                die(f"无效的计时报告格式: {output_format}（可选: {', '.join(TIMINGS_FORMATS)}）")
+            build_config.timings_format = output_format
+            i += 1
+        elif arg == "--timings-out":
+            if i + 1 >= len(args):
+                die("选项 --timings-out 需要参数")
+            build_config.timings_out = Path(args[i + 1]).resolve()
+            i += 2
+        elif arg == "--profile" or arg.startswith("--profile="):
+            from okcpp.core.profile import PROFILERS
+
+            profile = True
+            profiler = arg.partition("=")[2] or None
+            if profiler is not None and profiler not in PROFILERS:
+                die(f"无效的性能分析器: {profiler}（可选: {', '.join(PROFILERS)}）")
+            i += 1
+        elif arg in ("-h", "--help"):
+            print_usage()
+            return 0
         elif arg in ("gun", "clang"):
             build_config.compiler = arg
             i += 1
@@ -58,21 +190,65 @@ def main(args: list[str]) -> int:
             positional.append(arg)
             i += 1
 
-    # 确定项目目录
-    if positional:
-        arg = positional[0]
-        project_dir = find_project_dir(arg)
-        if project_dir is None:
-            die(f"未找到项目: {arg}")
-        build_config.project_dir = project_dir
-    else:
-        # 使用当前目录
-        if not (Path.cwd() / "CMakeLists.txt").exists():
-            die("当前目录没有 CMakeLists.txt")
-        build_config.project_dir = Path.cwd()
-
-    # 设置相对构建目录
-    build_config.build_dir = build_config.project_dir / "build"
+    # --timings-out 输出机器可读的报告，未指定格式时使用 json
+    if build_config.timings_out is not None and build_config.timings_format in (None, "table"):
+        build_config.timings_format = "json"
+
+    # 读取配置文件中的并行任务数
+    try:
+        configured_jobs = parse_jobs(config.jobs)
+    except ValueError:
+        configured_jobs = None
+
+    build_config.max_build_cache_mb = config.get_build_cache_mb()
+    build_config.artifact_cache_mb = config.get_artifact_cache_mb()
+    build_config.parse_diagnostics = not is_interactive()
+    build_config.launcher = resolve_launcher(config.launcher)
+    build_config.linker = config.linker
+    build_config.generator = resolve_generator(generator or config.generator)
+    build_config.unity_batch = unity_batch or config.get_unity_batch()
+
+    # 性能分析：RelWithDebInfo 构建，在 perf / gprof 下运行
+    if profile:
+        from okcpp.core.profile import configure_profile_build, resolve_profiler
+
+        if build_config.build_type == "Debug":
+            die("--profile 不能与 -d/--debug 同时使用")
+        if watch or build_all_projects:
+            die("--profile 不能与 --watch / --all 同时使用")
+        resolved = resolve_profiler(profiler)
+        if resolved is None:
+            if profiler == "perf":
+                die("perf 不可用（未安装，或 /proc/sys/kernel/perf_event_paranoid > 2）")
+            die("未找到可用的性能分析器（需要 perf 或 gprof）")
+        configure_profile_build(build_config, resolved)
+
+    # 批量构建：root 下的所有项目共享一个全局任务预算
+    if build_all_projects:
+        from okcpp.core.batch import build_all
+
+        root = Path(positional[0]) if positional else Path.cwd()
+        if not root.is_dir():
+            die(f"目录不存在: {root}")
+        build_config.job_plan = plan_jobs(jobs, configured_jobs)
+        return build_all(root.resolve(), build_config)
+
+    # 确定项目目录（未指定时使用当前目录）
+    build_config.project_dir = find_project(positional[0] if positional else None)
+
+    # 设置构建根目录，各配置的构建树位于其下
+    build_config.build_root = build_config.project_dir / "build"
+
+    # 规划并行编译任务数（命令行 > 配置文件 > 自动）
+    build_config.job_plan = plan_jobs(jobs, configured_jobs)
+
+    # 监听模式
+    if watch:
+        if build_config.build_type == "Debug":
+            die("监听模式不支持 Debug (GDB) 模式")
+        from okcpp.core.watch import watch_and_run
+
+        return watch_and_run(build_config)
 
     # 执行构建和运行
     return build_and_run(build_config)
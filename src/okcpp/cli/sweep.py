@@ -0,0 +1,184 @@
+"""Sweep command - benchmark a project across a matrix of compilers and optimisation flags."""
+
+from typing import List
+
+from okcpp.cli.common import find_project, parse_count
+from okcpp.core.builder import BuildConfig
+from okcpp.core.generator import GENERATORS, resolve_generator, validate_generator
+from okcpp.core.jobs import parse_jobs, plan_jobs
+from okcpp.core.sweep import (
+    COMPILER_COMMANDS,
+    DEFAULT_SWEEP_RUNS,
+    DEFAULT_SWEEP_WARMUP,
+    OPT_LEVELS,
+    build_matrix,
+    installed_compilers,
+    sweep,
+)
+from okcpp.utils.config import get_config
+from okcpp.utils.log import die, warn
+from okcpp.utils.path import require_cmd
+
+
+def print_usage() -> None:
+    """打印使用说明。"""
+    print(f"""Usage:
+  ok-cpp sweep [project] [options] [-- program args...]
+
+Arguments:
+  project                 Project path or name (default: current directory)
+
+Options:
+  -c, --compilers <list>  Compilers to sweep, comma separated (gun,clang; default: installed ones)
+  -O, --opt <list>        Optimisation levels (default: {','.join(OPT_LEVELS)})
+  --march <list>          -march=native toggle: off, on/native (default: off,native)
+  --lto <list>            Link-time optimisation toggle: off, on (default: off,on)
+  -n, --runs <N>          Timed runs per configuration (default: {DEFAULT_SWEEP_RUNS})
+  -w, --warmup <N>        Untimed warmup runs per configuration (default: {DEFAULT_SWEEP_WARMUP})
+  --fresh                 Delete existing sweep build trees first (full build times)
+  -G, --generator <name>  CMake generator (auto | ninja | make, default: config or auto)
+  -j, --jobs <N>          Total parallel build jobs shared by all configurations (default: auto)
+  -h, --help              Show this help message
+
+Every configuration is built in its own build tree (build/<compiler>-Sweep-<variant>),
+independent configurations are built in parallel, and the binaries are then
+benchmarked one at a time and ranked by median runtime, with binary size and
+build time. Compiler caches (ccache/sccache) and the artifact cache are not
+used, so build times are real compile times.
+
+Examples:
+  ok-cpp sweep demo/sort
+  ok-cpp sweep demo/sort -O O2,O3 --lto off -- 1000000
+  ok-cpp sweep -c gun,clang --march native -n 10""")
+
+
+def _parse_list(option: str, value: str, choices: tuple) -> List[str]:
+    """解析逗号分隔的取值列表。
+
+    Args:
+        option: 选项名（用于错误信息）
+        value: 参数值
+        choices: 可选值
+
+    Returns:
+        去重后的取值列表（保持顺序）
+    """
+    items = []
+    for item in value.split(","):
+        item = item.strip()
+        if item not in choices:
+            die(f"选项 {option} 的值无效: {item}（可选: {', '.join(choices)}）")
+        if item not in items:
+            items.append(item)
+    return items
+
+
+def _parse_toggle(option: str, value: str, on_names: tuple) -> List[bool]:
+    """解析开关列表（off / on），on_names 为表示开启的名称。"""
+    return list(dict.fromkeys(item in on_names for item in _parse_list(option, value, ("off",) + on_names)))
+
+
+def main(args: list[str]) -> int:
+    """Sweep 命令主函数。
+
+    Args:
+        args: 命令行参数列表
+
+    Returns:
+        退出码
+    """
+    require_cmd("cmake")
+
+    config = get_config()
+
+    # 解析参数
+    project_arg = None
+    program_args = []
+    compilers = None
+    opts = list(OPT_LEVELS)
+    natives = [False, True]
+    ltos = [False, True]
+    runs = DEFAULT_SWEEP_RUNS
+    warmup = DEFAULT_SWEEP_WARMUP
+    fresh = False
+    jobs = 0
+    generator = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            program_args = args[i + 1:]
+            break
+        elif arg in ("-c", "--compilers", "-O", "--opt", "--march", "--lto",
+                     "-n", "--runs", "-w", "--warmup", "-G", "--generator", "-j", "--jobs"):
+            if i + 1 >= len(args):
+                die(f"选项 {arg} 需要参数")
+            value = args[i + 1]
+            if arg in ("-c", "--compilers"):
+                compilers = _parse_list(arg, value, tuple(COMPILER_COMMANDS))
+            elif arg in ("-O", "--opt"):
+                opts = _parse_list(arg, value.replace("-O", "O"), OPT_LEVELS)
+            elif arg == "--march":
+                natives = _parse_toggle(arg, value, ("on", "native"))
+            elif arg == "--lto":
+                ltos = _parse_toggle(arg, value, ("on",))
+            elif arg in ("-n", "--runs"):
+                runs = parse_count(arg, value, 1)
+            elif arg in ("-w", "--warmup"):
+                warmup = parse_count(arg, value, 0)
+            elif arg in ("-G", "--generator"):
+                if not validate_generator(value):
+                    die(f"无效的生成器: {value}（可选: auto, {', '.join(GENERATORS)}）")
+                generator = value
+            else:
+                try:
+                    jobs = parse_jobs(value) or 0
+                except ValueError:
+                    die(f"无效的并行任务数: {value}")
+            i += 2
+        elif arg == "--fresh":
+            fresh = True
+            i += 1
+        elif arg in ("-h", "--help"):
+            print_usage()
+            return 0
+        elif arg.startswith("-"):
+            die(f"未知选项: {arg}")
+        elif project_arg is None:
+            project_arg = arg
+            i += 1
+        else:
+            die(f"多余的参数: {arg}")
+
+    # 确定编译器：未指定时使用已安装的全部编译器，指定了但未安装时报错
+    available = installed_compilers()
+    if compilers is None:
+        compilers = available
+        if not compilers:
+            die("没有找到可用的编译器（g++ 或 clang++）")
+        for name in COMPILER_COMMANDS:
+            if name not in compilers:
+                warn(f"{COMPILER_COMMANDS[name]} 未安装，跳过 {name}")
+    else:
+        for name in compilers:
+            if name not in available:
+                die(f"编译器未安装: {COMPILER_COMMANDS[name]}")
+
+    project_dir = find_project(project_arg)
+    base = BuildConfig(
+        compiler=compilers[0],
+        build_type="Release",
+        project_dir=project_dir,
+        build_root=project_dir / "build",
+    )
+    base.max_build_cache_mb = config.get_build_cache_mb()
+    base.linker = config.linker
+    base.generator = resolve_generator(generator or config.generator)
+    try:
+        configured_jobs = parse_jobs(config.jobs)
+    except ValueError:
+        configured_jobs = None
+    base.job_plan = plan_jobs(jobs, configured_jobs)
+
+    cells = build_matrix(compilers, opts, natives, ltos)
+    return sweep(base, cells, runs=runs, warmup=warmup, program_args=program_args, fresh=fresh)
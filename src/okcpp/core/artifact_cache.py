@@ -0,0 +1,415 @@
+"""Content-addressed cache of first-build trees, used to seed fresh projects.
+
+同一个模板生成的项目内容完全相同（只有目录和 project() 名称不同），首次构建的配置结果
+可以共享：首次构建成功后把构建树存入缓存，之后内容相同的新项目直接从缓存复制构建树，
+重写其中的绝对路径和目标名，重新配置时跳过编译器检测。
+
+目标文件中可能记录了项目路径（__FILE__、调试信息等），不会被重写，因此只有项目路径
+相同（例如删除 build 目录后重新构建）时才复用目标文件，其他项目只复用配置结果。
+
+默认关闭，通过 ok-cpp config set artifact_cache_mb <MB> 启用。
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from okcpp.core.build_cache import get_dir_size
+from okcpp.core.timings import TIMING_LOG_NAME
+from okcpp.utils.path import get_cache_dir
+
+# 缓存条目中的元数据文件和构建树目录
+ARTIFACT_META_FILE = "entry.json"
+ARTIFACT_TREE_DIR = "tree"
+
+# 默认的缓存大小上限（MB），0 表示关闭
+DEFAULT_ARTIFACT_CACHE_MB = 0
+
+# 超过该大小的项目不参与缓存（计算内容哈希和复制构建树的开销不再划算）
+MAX_PROJECT_BYTES = 16 * 1024 * 1024
+
+# 目标文件中带调试信息（包含源文件绝对路径）的构建类型，只复用配置结果
+_DEBUG_INFO_BUILD_TYPES = ("Debug", "RelWithDebInfo")
+
+# 编译产物：只有在可以安全复用时才存入缓存
+_OBJECT_SUFFIXES = (".o", ".obj", ".gch", ".pch")
+
+# 记录了旧命令哈希和依赖的 Ninja 日志，路径变化后无法复用
+_NINJA_STATE_FILES = (".ninja_log", ".ninja_deps")
+
+# 链接产物的文件头（可执行文件、共享库、静态库），以新项目名重新链接
+_LINK_OUTPUT_MAGIC = (b"\x7fELF", b"!<arch>\n")
+
+# 判断文本文件时读取的字节数
+_TEXT_PROBE_BYTES = 8192
+
+_PROJECT_NAME_PATTERN = re.compile(
+    rb"(^\s*project\s*\(\s*)([A-Za-z0-9_-]+)", re.MULTILINE | re.IGNORECASE
+)
+
+
+@dataclass
+class ArtifactEntry:
+    """缓存条目的元数据：生成该构建树时的项目位置和名称。"""
+
+    key: str
+    project_dir: str
+    build_dir: str
+    project_name: str
+    generator: str
+    build_type: str
+    # 是否包含可复用的目标文件（否则只复用配置结果）
+    objects: bool
+    created: float
+
+    @classmethod
+    def load(cls, entry_dir: Path) -> Optional["ArtifactEntry"]:
+        """读取缓存条目的元数据。
+
+        Args:
+            entry_dir: 缓存条目目录
+
+        Returns:
+            ArtifactEntry，不存在或已损坏时返回 None
+        """
+        try:
+            data = json.loads((entry_dir / ARTIFACT_META_FILE).read_text(encoding="utf-8"))
+            return cls(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+
+def get_artifact_cache_dir() -> Path:
+    """获取构建产物缓存目录。
+
+    Returns:
+        ${XDG_CACHE_HOME:-$HOME/.cache}/ok-cpp/artifacts
+    """
+    return get_cache_dir() / "artifacts"
+
+
+def reuses_objects(generator: str, build_type: str) -> bool:
+    """判断目标文件能否存入缓存（之后仅在项目路径相同时复用）。
+
+    Makefile 生成器只按 mtime 判断是否需要重新编译，目标文件可以直接复用；
+    Ninja 的 .ninja_log/.ninja_deps 不存入缓存，没有它们时所有目标都会被视为过期。
+    带调试信息的目标文件不存入缓存。
+
+    Args:
+        generator: CMake 生成器
+        build_type: 构建类型
+
+    Returns:
+        如果可以复用目标文件返回 True
+    """
+    return generator != "Ninja" and build_type not in _DEBUG_INFO_BUILD_TYPES
+
+
+def _iter_project_files(project_dir: Path, build_root: Path) -> Iterable[Path]:
+    """遍历项目文件（跳过构建目录和隐藏目录），按路径排序。"""
+    build_root = build_root.resolve()
+    for root, dirs, files in os.walk(project_dir):
+        root_path = Path(root)
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(".") and (root_path / d).resolve() != build_root
+        )
+        for name in sorted(files):
+            if not name.startswith("."):
+                yield root_path / name
+
+
+def compute_artifact_key(project_dir: Path, build_root: Path, toolchain: List[str]) -> Optional[str]:
+    """计算项目内容和工具链的哈希。
+
+    顶层 CMakeLists.txt 中的 project() 名称不参与哈希，因此同一模板生成的不同项目
+    得到相同的键。
+
+    Args:
+        project_dir: 项目目录
+        build_root: build 根目录（不参与哈希）
+        toolchain: 编译器、构建类型、生成器、工具链版本等影响构建结果的字段
+
+    Returns:
+        十六进制哈希，项目过大或无法读取时返回 None
+    """
+    digest = hashlib.sha256()
+    for item in toolchain:
+        digest.update(f"{item}\0".encode())
+
+    total = 0
+    top_cmake = project_dir / "CMakeLists.txt"
+    for path in _iter_project_files(project_dir, build_root):
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        total += len(content)
+        if total > MAX_PROJECT_BYTES:
+            return None
+        if path == top_cmake:
+            content = _PROJECT_NAME_PATTERN.sub(rb"\1@PROJECT@", content, count=1)
+        digest.update(f"\0{path.relative_to(project_dir)}\0{len(content)}\0".encode())
+        digest.update(content)
+
+    return digest.hexdigest()
+
+
+def _is_target_dir(name: str, project_name: str) -> bool:
+    """判断构建树中的目录是否属于以项目名命名的目标（如 foo.dir、foo_test.dir、foo_autogen）。"""
+    if name.endswith(".dir"):
+        stem = name[:-len(".dir")]
+    elif name.endswith("_autogen"):
+        stem = name
+    else:
+        return False
+    return stem == project_name or stem.startswith(f"{project_name}_")
+
+
+def _rename_target_dirs(build_dir: Path, old_name: str, new_name: str) -> List[Tuple[str, str]]:
+    """把以旧项目名命名的目标目录改为新项目名。
+
+    Args:
+        build_dir: 构建树
+        old_name: 旧项目名
+        new_name: 新项目名
+
+    Returns:
+        (旧目录名, 新目录名) 列表
+    """
+    renames = []
+    for root, dirs, _ in os.walk(build_dir, topdown=False):
+        for name in dirs:
+            if not _is_target_dir(name, old_name):
+                continue
+            new = new_name + name[len(old_name):]
+            os.rename(os.path.join(root, name), os.path.join(root, new))
+            renames.append((name, new))
+    return sorted(set(renames))
+
+
+def _build_replacements(entry: ArtifactEntry, project_dir: Path, build_dir: Path,
+                        project_name: str, renames: List[Tuple[str, str]]) -> List[Tuple[re.Pattern, bytes]]:
+    """生成文本文件中需要替换的模式（构建目录优先于项目目录，较长的路径优先）。"""
+    paths = [(entry.build_dir, str(build_dir)), (entry.project_dir, str(project_dir))]
+    replacements = [
+        (re.compile(re.escape(old.encode()) + rb"(?![\w.+-])"), new.encode())
+        for old, new in sorted(paths, key=lambda pair: len(pair[0]), reverse=True)
+        if old != new
+    ]
+    if entry.project_name != project_name:
+        for old, new in renames:
+            replacements.append(
+                (re.compile(rb"(?<![\w.+-])" + re.escape(old.encode()) + rb"(?![\w+-])"), new.encode())
+            )
+    return replacements
+
+
+def _rewrite_text_files(build_dir: Path, replacements: List[Tuple[re.Pattern, bytes]]) -> None:
+    """重写构建树中文本文件里的路径和目标名，保留原来的 mtime。"""
+    if not replacements:
+        return
+    for root, _, files in os.walk(build_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.islink(path):
+                continue
+            with open(path, "rb") as f:
+                content = f.read()
+            if b"\0" in content[:_TEXT_PROBE_BYTES]:
+                continue
+            new_content = content
+            for pattern, new in replacements:
+                new_content = pattern.sub(lambda _: new, new_content)
+            if new_content != content:
+                st = os.stat(path)
+                with open(path, "wb") as f:
+                    f.write(new_content)
+                os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _shift_mtimes(build_dir: Path) -> None:
+    """整体平移构建树中文件的 mtime，使最新的文件为当前时间。
+
+    保持文件之间的新旧关系，同时保证所有产物都比项目源文件新（源文件内容已由哈希保证相同）。
+    """
+    paths = []
+    for root, _, files in os.walk(build_dir):
+        paths.extend(os.path.join(root, name) for name in files)
+    stats = [(path, os.lstat(path)) for path in paths]
+    if not stats:
+        return
+    shift = time.time_ns() - max(st.st_mtime_ns for _, st in stats)
+    if shift <= 0:
+        return
+    for path, st in stats:
+        if not os.path.islink(path):
+            os.utime(path, ns=(st.st_atime_ns + shift, st.st_mtime_ns + shift))
+
+
+def seed_build_tree(key: str, project_dir: Path, build_dir: Path, project_name: str) -> Optional[ArtifactEntry]:
+    """用缓存中的构建树初始化一个新的构建树。
+
+    Args:
+        key: 缓存键（见 compute_artifact_key）
+        project_dir: 项目目录
+        build_dir: 目标构建树（不存在或为空）
+        project_name: 项目名
+
+    Returns:
+        使用的缓存条目（objects 表示本次是否复用了目标文件），未命中或复制失败时返回 None
+    """
+    entry_dir = get_artifact_cache_dir() / key
+    entry = ArtifactEntry.load(entry_dir)
+    if entry is None or not (entry_dir / ARTIFACT_TREE_DIR).is_dir():
+        return None
+
+    # 目标文件中的路径不会被重写，只在同一项目路径下复用
+    objects = entry.objects and entry.project_dir == str(project_dir)
+    try:
+        if build_dir.exists():
+            shutil.rmtree(build_dir)
+        build_dir.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(entry_dir / ARTIFACT_TREE_DIR, build_dir, symlinks=True,
+                        ignore=None if objects else shutil.ignore_patterns(
+                            *(f"*{suffix}" for suffix in _OBJECT_SUFFIXES)))
+        renames = []
+        if entry.project_name != project_name:
+            renames = _rename_target_dirs(build_dir, entry.project_name, project_name)
+        _rewrite_text_files(
+            build_dir, _build_replacements(entry, project_dir, build_dir, project_name, renames)
+        )
+        _shift_mtimes(build_dir)
+        # 记录最近使用时间，用于 LRU 淘汰
+        os.utime(entry_dir / ARTIFACT_META_FILE)
+    except OSError:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        return None
+    return dataclasses.replace(entry, objects=objects)
+
+
+def _is_link_output(path: str) -> bool:
+    """判断文件是否是链接产物（可执行文件或库）。"""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+    except OSError:
+        return False
+    return any(head.startswith(magic) for magic in _LINK_OUTPUT_MAGIC)
+
+
+def _ignore_for_cache(objects: bool):
+    """生成 copytree 的 ignore 函数，跳过不能或不需要复用的文件。"""
+    def ignore(directory: str, names: List[str]) -> List[str]:
+        in_cmake_files = "CMakeFiles" in Path(directory).parts
+        ignored = []
+        for name in names:
+            path = os.path.join(directory, name)
+            if name == TIMING_LOG_NAME or name in _NINJA_STATE_FILES:
+                ignored.append(name)
+            elif not objects and name.endswith(_OBJECT_SUFFIXES):
+                ignored.append(name)
+            elif not in_cmake_files and not name.endswith(_OBJECT_SUFFIXES) and (
+                os.path.islink(path) or (os.path.isfile(path) and _is_link_output(path))
+            ):
+                ignored.append(name)
+        return ignored
+    return ignore
+
+
+def store_build_tree(key: str, project_dir: Path, build_dir: Path, project_name: str,
+                     generator: str, build_type: str, max_mb: int) -> bool:
+    """把首次构建成功的构建树存入缓存。
+
+    Args:
+        key: 缓存键
+        project_dir: 项目目录
+        build_dir: 构建树
+        project_name: 项目名
+        generator: CMake 生成器
+        build_type: 构建类型
+        max_mb: 缓存大小上限（MB）
+
+    Returns:
+        如果存入了新条目返回 True
+    """
+    cache_dir = get_artifact_cache_dir()
+    entry_dir = cache_dir / key
+    if entry_dir.exists():
+        return False
+
+    objects = reuses_objects(generator, build_type)
+    tmp_dir = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # 每次存入使用独立的临时目录（同一进程的多个线程可能同时存入，如 run --all）
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".tmp-{key[:16]}-", dir=cache_dir))
+        shutil.copytree(build_dir, tmp_dir / ARTIFACT_TREE_DIR, symlinks=True,
+                        ignore=_ignore_for_cache(objects))
+        if get_dir_size(tmp_dir) > max_mb * 1024 * 1024 // 4:
+            # 单个条目不超过缓存上限的四分之一
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+        entry = ArtifactEntry(
+            key=key,
+            project_dir=str(project_dir),
+            build_dir=str(build_dir),
+            project_name=project_name,
+            generator=generator,
+            build_type=build_type,
+            objects=objects,
+            created=time.time(),
+        )
+        (tmp_dir / ARTIFACT_META_FILE).write_text(json.dumps(asdict(entry), indent=1), encoding="utf-8")
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        # 包括其他进程同时存入了同一个键
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    evict_artifacts(max_mb, keep=entry_dir)
+    return True
+
+
+def evict_artifacts(max_mb: int, keep: Optional[Path] = None) -> List[Path]:
+    """按 LRU 策略删除缓存条目，直到总大小不超过上限。
+
+    Args:
+        max_mb: 大小上限（MB）
+        keep: 不删除的条目
+
+    Returns:
+        被删除的条目路径列表
+    """
+    cache_dir = get_artifact_cache_dir()
+    if not cache_dir.is_dir():
+        return []
+
+    entries = []
+    for item in cache_dir.iterdir():
+        meta = item / ARTIFACT_META_FILE
+        if item.is_dir() and meta.exists():
+            entries.append((meta.stat().st_mtime, item, get_dir_size(item)))
+    entries.sort(key=lambda entry: entry[0])
+
+    total = sum(size for _, _, size in entries)
+    limit = max_mb * 1024 * 1024
+    evicted = []
+    for _, item, size in entries:
+        if total <= limit:
+            break
+        if keep is not None and item == keep:
+            continue
+        shutil.rmtree(item, ignore_errors=True)
+        total -= size
+        evicted.append(item)
+    return evicted
@@ -0,0 +1,276 @@
+"""Batch build of every CMake project under a root directory."""
+
+import dataclasses
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from okcpp.core.builder import (
+    BuildConfig,
+    append_log,
+    evict_build_trees,
+    iter_cmake_projects,
+    migrate_legacy_build_root,
+    prepare_build,
+    run_cmake_build,
+    run_cmake_configure,
+)
+from okcpp.core.jobs import JobPlan, plan_jobs
+from okcpp.utils.log import (
+    err,
+    info,
+    print_blue,
+    print_green_b,
+    print_red_b,
+    print_section,
+    print_yellow_b,
+)
+
+# 每个项目的构建日志文件名（位于 <project>/build 下）
+BATCH_LOG_NAME = "ok-cpp-batch.log"
+
+# 失败时显示的日志尾部行数
+FAILURE_TAIL_LINES = 20
+
+
+@dataclass
+class ProjectResult:
+    """单个项目的批量构建结果。"""
+
+    project_dir: Path
+    status: str = "PENDING"  # "PASS" / "FAIL"
+    phase: str = ""  # 失败的阶段：configure / build / error
+    jobs: int = 0
+    configure_time: float = 0.0
+    build_time: float = 0.0
+    log_file: Optional[Path] = None
+    # 失败时日志中的第一条错误
+    first_error: Optional[str] = None
+
+    @property
+    def total_time(self) -> float:
+        """配置和构建的总耗时。"""
+        return self.configure_time + self.build_time
+
+
+class JobBudget:
+    """多个项目共享的全局并行任务预算。"""
+
+    def __init__(self, total: int, projects: int):
+        self.total = total
+        self.available = total
+        self.pending = projects
+        self._cond = threading.Condition()
+
+    def acquire(self) -> int:
+        """为即将开始的项目分配任务数。
+
+        剩余预算在尚未开始的项目之间平均分配，越往后开始的项目分到的越多。
+
+        Returns:
+            分配到的任务数（至少为 1）
+        """
+        with self._cond:
+            while self.available <= 0:
+                self._cond.wait()
+            share = max(1, self.available // max(1, self.pending))
+            self.pending -= 1
+            self.available -= share
+            return share
+
+    def release(self, jobs: int) -> None:
+        """归还任务数。
+
+        Args:
+            jobs: 归还的任务数
+        """
+        with self._cond:
+            self.available += jobs
+            self._cond.notify_all()
+
+
+def discover_projects(root: Path) -> List[Path]:
+    """查找 root 下的所有顶层 CMake 项目。
+
+    Args:
+        root: 搜索根目录
+
+    Returns:
+        项目目录列表（已排序）
+    """
+    return sorted(path.resolve() for path in iter_cmake_projects(root, nested=False))
+
+
+def _build_one(base: BuildConfig, project_dir: Path, budget: JobBudget) -> ProjectResult:
+    """构建单个项目，输出写入项目的批量构建日志。
+
+    Args:
+        base: 基础构建配置（编译器、构建类型等）
+        project_dir: 项目目录
+        budget: 全局任务预算
+
+    Returns:
+        ProjectResult 对象
+    """
+    result = ProjectResult(project_dir=project_dir)
+    build_root = project_dir / "build"
+    result.log_file = build_root / BATCH_LOG_NAME
+
+    config = dataclasses.replace(
+        base,
+        project_dir=project_dir,
+        project_name=None,
+        build_root=build_root,
+        log_file=result.log_file,
+        parse_diagnostics=True,
+    )
+
+    try:
+        # 分配失败前 result.jobs 为 0，finally 中归还 0 不影响预算
+        result.jobs = budget.acquire()
+        config.job_plan = JobPlan(jobs=result.jobs, source="batch")
+
+        # 迁移旧版布局会删除整个 build 目录（包括日志），必须在创建日志之前进行
+        result.log_file.unlink(missing_ok=True)
+        migrate_legacy_build_root(config)
+        build_root.mkdir(parents=True, exist_ok=True)
+        result.log_file.touch()
+
+        config = prepare_build(config)
+
+        start = time.time()
+        ok = run_cmake_configure(config)
+        result.configure_time = time.time() - start
+        if not ok:
+            result.status, result.phase = "FAIL", "configure"
+            result.first_error = _first_error(config)
+            return result
+
+        start = time.time()
+        ok = run_cmake_build(config)
+        result.build_time = time.time() - start
+        if not ok:
+            result.status, result.phase = "FAIL", "build"
+            result.first_error = _first_error(config)
+            return result
+
+        evict_build_trees(config.build_root, config.build_dir, config.max_build_cache_mb)
+        result.status = "PASS"
+    except Exception as e:
+        result.status, result.phase = "FAIL", "error"
+        result.first_error = f"{type(e).__name__}: {e}"
+        append_log(result.log_file, result.first_error)
+    finally:
+        budget.release(result.jobs)
+
+    return result
+
+
+def _first_error(config: BuildConfig) -> Optional[str]:
+    """获取最近一次配置或构建的第一条错误。"""
+    if config.diagnostics is None or config.diagnostics.first_error is None:
+        return None
+    return config.diagnostics.first_error.describe()
+
+
+def _print_summary(results: List[ProjectResult], root: Path, wall_time: float) -> None:
+    """打印批量构建结果表格。
+
+    Args:
+        results: 构建结果列表
+        root: 搜索根目录
+        wall_time: 总耗时
+    """
+    print_section("Batch Summary")
+
+    names = []
+    for result in results:
+        try:
+            names.append(str(result.project_dir.relative_to(root)))
+        except ValueError:
+            names.append(str(result.project_dir))
+    width = max([len("Project")] + [len(name) for name in names])
+
+    print(f"{'Project':<{width}}  {'Status':<16}  {'Jobs':>4}  {'Configure':>9}  "
+          f"{'Build':>8}  {'Total':>8}")
+    print("-" * (width + 58))
+    for name, result in zip(names, results):
+        status = result.status if not result.phase else f"{result.status} ({result.phase})"
+        line = (f"{name:<{width}}  {status:<16}  {result.jobs:>4}  "
+                f"{result.configure_time:>8.2f}s  {result.build_time:>7.2f}s  "
+                f"{result.total_time:>7.2f}s")
+        if result.status == "PASS":
+            print_green_b(line)
+        else:
+            print_red_b(line)
+            if result.first_error:
+                print(f"  {result.first_error}")
+
+    passed = sum(1 for result in results if result.status == "PASS")
+    print()
+    info(f"{passed}/{len(results)} passed in {wall_time:.2f}s")
+
+
+def _print_failure_logs(results: List[ProjectResult]) -> None:
+    """打印失败项目的日志尾部。
+
+    Args:
+        results: 构建结果列表
+    """
+    for result in results:
+        if result.status == "PASS" or result.log_file is None:
+            continue
+        print_section(f"FAIL: {result.project_dir}")
+        try:
+            lines = result.log_file.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            lines = []
+        for line in lines[-FAILURE_TAIL_LINES:]:
+            print(line)
+        print_blue(f"Full log: {result.log_file}")
+
+
+def build_all(root: Path, base: BuildConfig) -> int:
+    """并行配置并构建 root 下的所有 CMake 项目。
+
+    所有项目共享一个全局并行任务预算（base.job_plan，默认自动计算）。
+
+    Args:
+        root: 搜索根目录
+        base: 基础构建配置
+
+    Returns:
+        退出码，全部成功返回 0
+    """
+    projects = discover_projects(root)
+    if not projects:
+        err(f"未在 {root} 下找到 CMake 项目")
+        return 1
+
+    plan = base.job_plan or plan_jobs()
+    budget = JobBudget(plan.jobs, len(projects))
+    workers = min(len(projects), plan.jobs)
+
+    print_yellow_b(f"Found {len(projects)} project(s) under {root}")
+    print_blue(f"Job budget: {plan.describe()}, {workers} project(s) at a time")
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_build_one, base, project_dir, budget)
+            for project_dir in projects
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            mark = "✓" if result.status == "PASS" else "✗"
+            print(f"  {mark} {result.project_dir} ({result.total_time:.2f}s)", flush=True)
+        results = [future.result() for future in futures]
+    wall_time = time.time() - start
+
+    _print_failure_logs(results)
+    _print_summary(results, root, wall_time)
+
+    return 0 if all(result.status == "PASS" for result in results) else 1
@@ -0,0 +1,398 @@
+"""Benchmark runner: repeated runs with statistical summary and history."""
+
+import json
+import math
+import os
+import statistics
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from okcpp.core.builder import (
+    EXIT_BUILD_FAILED,
+    EXIT_CONFIGURE_FAILED,
+    EXIT_RUN_FAILED,
+    BuildConfig,
+    evict_build_trees,
+    get_executable_path,
+    prepare_build,
+    run_cmake_build,
+    run_cmake_configure,
+)
+from okcpp.utils.log import (
+    err,
+    handle_error,
+    info,
+    ok,
+    print_blue,
+    print_purple_b,
+    print_section,
+    warn,
+)
+
+# 基准测试历史文件名（位于构建树中）
+BENCH_HISTORY_FILE = "bench_history.json"
+
+# 每个构建树保留的历史记录条数
+MAX_HISTORY = 50
+
+# 默认运行次数、预热次数和回归阈值（百分比）
+DEFAULT_RUNS = 10
+DEFAULT_WARMUP = 2
+DEFAULT_THRESHOLD = 5.0
+
+
+@dataclass
+class RunSample:
+    """单次运行的测量结果。"""
+
+    wall_time: float  # 秒
+    max_rss_kb: int  # 峰值常驻内存（KB）
+    user_time: float = 0.0
+    sys_time: float = 0.0
+    exit_code: int = 0  # 被信号终止时为 128 + 信号编号
+
+
+@dataclass
+class BenchStats:
+    """多次运行的统计结果（时间单位为秒）。"""
+
+    runs: int
+    min: float
+    median: float
+    mean: float
+    p95: float
+    max: float
+    stddev: float
+    max_rss_kb: int
+    user_time: float = 0.0  # 中位数
+    sys_time: float = 0.0  # 中位数
+
+    def describe(self) -> str:
+        """返回一行摘要。"""
+        return (f"median {format_seconds(self.median)} ± {format_seconds(self.stddev)} "
+                f"(min {format_seconds(self.min)}, p95 {format_seconds(self.p95)}, "
+                f"{self.runs} runs), peak RSS {self.max_rss_kb / 1024:.1f} MB")
+
+
+@dataclass
+class BenchRecord:
+    """一条基准测试历史记录。"""
+
+    timestamp: float
+    executable: str
+    args: List[str]
+    compiler: str
+    build_type: str
+    warmup: int
+    stats: BenchStats
+    times: List[float] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BenchRecord":
+        """从 JSON 字典创建记录。"""
+        data = dict(data)
+        data["stats"] = BenchStats(**data["stats"])
+        return cls(**data)
+
+
+def format_seconds(value: float) -> str:
+    """格式化时间，自动选择 s / ms / µs 单位。
+
+    Args:
+        value: 时间（秒）
+
+    Returns:
+        格式化后的字符串
+    """
+    if value >= 1:
+        return f"{value:.3f}s"
+    if value >= 1e-3:
+        return f"{value * 1e3:.2f}ms"
+    return f"{value * 1e6:.1f}µs"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数（线性插值）。
+
+    Args:
+        values: 数值列表（非空）
+        pct: 百分位（0-100）
+
+    Returns:
+        百分位数
+    """
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def run_once(cmd: List[str], cwd: Optional[Path] = None, quiet: bool = True) -> RunSample:
+    """运行一次程序并测量墙钟时间和资源使用（wait4 rusage）。
+
+    Args:
+        cmd: 命令
+        cwd: 工作目录
+        quiet: 是否丢弃程序输出
+
+    Returns:
+        RunSample 对象
+    """
+    output = subprocess.DEVNULL if quiet else None
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, cwd=cwd, stdout=output, stderr=output)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall_time = time.perf_counter() - start
+    # 已由 wait4 回收，避免 Popen 再次等待
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return RunSample(
+        wall_time=wall_time,
+        max_rss_kb=usage.ru_maxrss,
+        user_time=usage.ru_utime,
+        sys_time=usage.ru_stime,
+        # 与 shell 一致：被信号终止的程序返回 128 + 信号编号
+        exit_code=128 - process.returncode if process.returncode < 0 else process.returncode,
+    )
+
+
+def measure(cmd: List[str], runs: int, warmup: int, cwd: Optional[Path] = None) -> List[RunSample]:
+    """预热后重复运行程序。
+
+    程序返回非零退出码时立即停止，返回已完成的样本（最后一个为失败的运行）。
+
+    Args:
+        cmd: 命令
+        runs: 计时运行次数
+        warmup: 预热次数（不计入结果）
+        cwd: 工作目录
+
+    Returns:
+        计时运行的样本列表
+    """
+    for _ in range(warmup):
+        sample = run_once(cmd, cwd)
+        if sample.exit_code != 0:
+            return [sample]
+
+    samples = []
+    for _ in range(runs):
+        sample = run_once(cmd, cwd)
+        samples.append(sample)
+        if sample.exit_code != 0:
+            break
+    return samples
+
+
+def summarize(samples: List[RunSample]) -> BenchStats:
+    """计算统计结果。
+
+    Args:
+        samples: 运行样本（非空）
+
+    Returns:
+        BenchStats 对象
+    """
+    times = [sample.wall_time for sample in samples]
+    return BenchStats(
+        runs=len(times),
+        min=min(times),
+        median=statistics.median(times),
+        mean=statistics.fmean(times),
+        p95=percentile(times, 95),
+        max=max(times),
+        stddev=statistics.stdev(times) if len(times) > 1 else 0.0,
+        max_rss_kb=max(sample.max_rss_kb for sample in samples),
+        user_time=statistics.median(sample.user_time for sample in samples),
+        sys_time=statistics.median(sample.sys_time for sample in samples),
+    )
+
+
+def load_history(build_dir: Path) -> List[BenchRecord]:
+    """读取构建树中的基准测试历史。
+
+    Args:
+        build_dir: 构建树
+
+    Returns:
+        历史记录列表（按时间顺序）
+    """
+    try:
+        data = json.loads((build_dir / BENCH_HISTORY_FILE).read_text(encoding="utf-8"))
+        return [BenchRecord.from_dict(item) for item in data]
+    except (OSError, ValueError, TypeError, KeyError):
+        return []
+
+
+def save_history(build_dir: Path, history: List[BenchRecord]) -> None:
+    """写入基准测试历史（只保留最近 MAX_HISTORY 条）。
+
+    Args:
+        build_dir: 构建树
+        history: 历史记录列表
+    """
+    data = [asdict(record) for record in history[-MAX_HISTORY:]]
+    (build_dir / BENCH_HISTORY_FILE).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def find_baseline(history: List[BenchRecord], args: List[str]) -> Optional[BenchRecord]:
+    """查找相同程序参数的上一条记录作为比较基准。
+
+    Args:
+        history: 历史记录列表
+        args: 程序参数
+
+    Returns:
+        上一条记录，没有则返回 None
+    """
+    for record in reversed(history):
+        if record.args == args:
+            return record
+    return None
+
+
+def is_regression(current: BenchStats, baseline: BenchStats, threshold: float) -> bool:
+    """判断是否出现性能回归。
+
+    中位数变慢超过阈值，且差值大于两次测量的标准差之和（排除噪声）时视为回归。
+
+    Args:
+        current: 本次结果
+        baseline: 基准结果
+        threshold: 回归阈值（百分比）
+
+    Returns:
+        如果出现回归返回 True
+    """
+    delta = current.median - baseline.median
+    if baseline.median <= 0:
+        return False
+    return (
+        delta / baseline.median * 100 > threshold
+        and delta > current.stddev + baseline.stddev
+    )
+
+
+def print_stats(stats: BenchStats) -> None:
+    """打印统计表格。
+
+    Args:
+        stats: 统计结果
+    """
+    rows = [
+        ("runs", str(stats.runs)),
+        ("min", format_seconds(stats.min)),
+        ("median", format_seconds(stats.median)),
+        ("mean", format_seconds(stats.mean)),
+        ("p95", format_seconds(stats.p95)),
+        ("max", format_seconds(stats.max)),
+        ("stddev", f"{format_seconds(stats.stddev)} "
+                   f"({stats.stddev / stats.mean * 100 if stats.mean else 0:.1f}%)"),
+        ("user / sys", f"{format_seconds(stats.user_time)} / {format_seconds(stats.sys_time)}"),
+        ("peak RSS", f"{stats.max_rss_kb / 1024:.1f} MB"),
+    ]
+    for name, value in rows:
+        print(f"  {name:<12} {value}")
+
+
+def build_for_bench(config: BuildConfig,
+                    on_prepared: Optional[Callable[[BuildConfig], None]] = None) -> Optional[Path]:
+    """构建项目并返回可执行文件路径。
+
+    Args:
+        config: 构建配置
+        on_prepared: 构建树准备好之后、配置之前调用（例如放入 PGO 的 profile 数据）
+
+    Returns:
+        可执行文件路径，构建失败返回 None
+    """
+    config = prepare_build(config)
+    if on_prepared is not None:
+        on_prepared(config)
+    if not run_cmake_configure(config):
+        handle_error("CMake 配置失败", EXIT_CONFIGURE_FAILED)
+        return None
+    if not run_cmake_build(config):
+        handle_error("编译失败", EXIT_BUILD_FAILED)
+        return None
+    evict_build_trees(config.build_root, config.build_dir, config.max_build_cache_mb)
+
+    exe_path = get_executable_path(config)
+    if not exe_path.exists():
+        err(f"未找到可执行文件: {exe_path}")
+        return None
+    return exe_path
+
+
+def bench(
+    config: BuildConfig,
+    runs: int = DEFAULT_RUNS,
+    warmup: int = DEFAULT_WARMUP,
+    threshold: float = DEFAULT_THRESHOLD,
+    program_args: Optional[List[str]] = None,
+) -> int:
+    """以 Release 模式构建项目并进行基准测试。
+
+    结果追加到构建树中的 bench_history.json，并与相同参数的上一次结果比较。
+
+    Args:
+        config: 构建配置
+        runs: 计时运行次数
+        warmup: 预热次数
+        threshold: 回归阈值（百分比）
+        program_args: 传给程序的参数
+
+    Returns:
+        退出码
+    """
+    program_args = list(program_args or [])
+    config.build_type = "Release"
+    exe_path = build_for_bench(config)
+    if exe_path is None:
+        return EXIT_RUN_FAILED
+
+    print_purple_b("[3/3] Benchmark")
+    print_blue(f"Executable: {exe_path} {' '.join(program_args)}".rstrip())
+    print_blue(f"Warmup: {warmup}, runs: {runs}")
+
+    samples = measure([str(exe_path)] + program_args, runs, warmup, cwd=config.project_dir)
+    if samples[-1].exit_code != 0:
+        err(f"程序退出码为 {samples[-1].exit_code}，基准测试中止")
+        return samples[-1].exit_code or 1
+
+    stats = summarize(samples)
+    print_section("Benchmark Result")
+    print_stats(stats)
+
+    history = load_history(config.build_dir)
+    baseline = find_baseline(history, program_args)
+    if baseline is not None:
+        change = (stats.median - baseline.stats.median) / baseline.stats.median * 100
+        when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(baseline.timestamp))
+        print()
+        info(f"Previous ({when}): {baseline.stats.describe()}")
+        if is_regression(stats, baseline.stats, threshold):
+            warn(f"Regression: median {change:+.1f}% (threshold {threshold:g}%)")
+        elif change < -threshold:
+            ok(f"Improvement: median {change:+.1f}%")
+        else:
+            info(f"No significant change: median {change:+.1f}%")
+
+    history.append(BenchRecord(
+        timestamp=time.time(),
+        executable=str(exe_path),
+        args=program_args,
+        compiler=config.compiler,
+        build_type=config.build_type,
+        warmup=warmup,
+        stats=stats,
+        times=[sample.wall_time for sample in samples],
+    ))
+    save_history(config.build_dir, history)
+    print_blue(f"History: {config.build_dir / BENCH_HISTORY_FILE}")
+    return 0
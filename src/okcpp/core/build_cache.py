@@ -0,0 +1,131 @@
+"""Per-configuration build trees and their LRU eviction."""
+
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from okcpp.utils.log import print_yellow_b
+
+# 构建树中记录最近使用时间的标记文件（每次构建都会重写）
+USAGE_MARKER = "compiler.txt"
+
+# 默认的构建缓存大小上限（MB）
+DEFAULT_BUILD_CACHE_MB = 2048
+
+
+@dataclass
+class BuildTree:
+    """一个配置对应的构建树。"""
+
+    path: Path
+    last_used: float
+    size: int
+
+
+def get_build_tree_name(compiler: str, build_type: str, variant: Optional[str] = None) -> str:
+    """获取构建树的目录名，例如 gun-Release、gun-RelWithDebInfo-gprof。
+
+    Args:
+        compiler: 编译器
+        build_type: 构建类型
+        variant: 构建变体（使用不同编译/链接选项的同类型构建）
+
+    Returns:
+        目录名
+    """
+    name = f"{compiler}-{build_type}"
+    return f"{name}-{variant}" if variant else name
+
+
+def is_legacy_build_root(build_root: Path) -> bool:
+    """检查 build 目录是否是旧版的单一构建树布局。
+
+    Args:
+        build_root: build 根目录
+
+    Returns:
+        如果 build 根目录本身就是 CMake 构建树返回 True
+    """
+    return (build_root / "CMakeCache.txt").exists()
+
+
+def get_dir_size(path: Path) -> int:
+    """计算目录占用的磁盘空间。
+
+    Args:
+        path: 目录路径
+
+    Returns:
+        字节数
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += st.st_blocks * 512 if hasattr(st, "st_blocks") else st.st_size
+    return total
+
+
+def list_build_trees(build_root: Path) -> List[BuildTree]:
+    """列出 build 根目录下的所有构建树，最近使用的排在最前。
+
+    Args:
+        build_root: build 根目录
+
+    Returns:
+        BuildTree 列表
+    """
+    trees = []
+    if not build_root.is_dir():
+        return trees
+
+    for item in build_root.iterdir():
+        marker = item / USAGE_MARKER
+        if not item.is_dir() or not marker.exists():
+            continue
+        trees.append(
+            BuildTree(path=item, last_used=marker.stat().st_mtime, size=get_dir_size(item))
+        )
+
+    trees.sort(key=lambda tree: tree.last_used, reverse=True)
+    return trees
+
+
+def evict_build_trees(build_root: Path, keep: Path, max_mb: Optional[int]) -> List[Path]:
+    """按 LRU 策略删除构建树，直到总大小不超过上限。
+
+    当前正在使用的构建树永远不会被删除。
+
+    Args:
+        build_root: build 根目录
+        keep: 当前使用的构建树
+        max_mb: 大小上限（MB），None 或 0 表示不限制
+
+    Returns:
+        被删除的构建树路径列表
+    """
+    if not max_mb:
+        return []
+
+    trees = list_build_trees(build_root)
+    total = sum(tree.size for tree in trees)
+    limit = max_mb * 1024 * 1024
+    evicted = []
+
+    keep = keep.resolve()
+    for tree in reversed(trees):
+        if total <= limit:
+            break
+        if tree.path.resolve() == keep:
+            continue
+        print_yellow_b(f"构建缓存超过 {max_mb} MB，删除最久未使用的构建目录: {tree.path.name}")
+        shutil.rmtree(tree.path, ignore_errors=True)
+        total -= tree.size
+        evicted.append(tree.path)
+
+    return evicted
@@ -1,13 +1,58 @@
 """CMake build logic for ok-cpp."""
 
+import hashlib
 import os
 import re
+import shutil
+import signal
 import subprocess
+import sys
+import threading
 import time
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
-
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from okcpp.core.artifact_cache import compute_artifact_key, seed_build_tree, store_build_tree
+from okcpp.core.build_cache import (
+    DEFAULT_BUILD_CACHE_MB,
+    evict_build_trees,
+    get_build_tree_name,
+    is_legacy_build_root,
+)
+from okcpp.core.detector import check_command
+from okcpp.core.diagnostics import DiagnosticParser
+from okcpp.core.generator import get_cached_generator
+from okcpp.core.jobs import JobPlan, plan_jobs
+from okcpp.core.launcher import get_cache_stats
+from okcpp.core.linker import (
+    LINKER_FALLBACK_FILE,
+    compare_link_times,
+    get_cmake_version,
+    get_record_linker,
+    is_linker_failure,
+    linker_cmake_args,
+    read_linker_fallback,
+    resolve_linker,
+    write_linker_fallback,
+)
+from okcpp.core.pch import PCH_INCLUDE_NAME, estimate_pch_savings, write_pch_script
+from okcpp.core.template_catalog import read_project_manifest
+from okcpp.core.unity import DEFAULT_UNITY_BATCH, estimate_unity_speedup, is_unity_clash
+from okcpp.core.timings import (
+    CMAKE_LINKER_LAUNCHER_VERSION,
+    TIMING_WRAPPER_NAME,
+    BuildTimings,
+    append_history,
+    collect_unit_timings,
+    get_process_uptime,
+    load_history,
+    log_offset,
+    print_report,
+    start_timings,
+    write_timing_wrapper,
+)
 from okcpp.utils.log import (
     colored,
     err,
@@ -17,6 +62,7 @@ from okcpp.utils.log import (
     print_blue_b,
     print_purple_b,
     print_yellow_b,
+    warn,
 )
 
 
@@ -25,16 +71,283 @@ class BuildConfig:
     """构建配置。"""
 
     compiler: str = "gun"  # "gun" or "clang"
-    build_type: str = "Release"  # "Debug" or "Release"
+    build_type: str = "Release"  # "Debug" or "Release"（性能分析使用 "RelWithDebInfo"）
+    # 构建变体：覆盖了编译/链接选项的构建使用独立的构建树 <compiler>-<build_type>-<variant>
+    variant: Optional[str] = None
+    # 当前构建类型的编译选项（CMAKE_<LANG>_FLAGS_<BUILD_TYPE>），None 表示使用 CMake 默认值
+    compile_flags: Optional[str] = None
+    # 当前构建类型的链接选项（CMAKE_EXE/SHARED_LINKER_FLAGS_<BUILD_TYPE>）
+    link_flags: Optional[str] = None
+    # 链接时优化（CMAKE_INTERPROCEDURAL_OPTIMIZATION）
+    lto: bool = False
     project_name: Optional[str] = None
     project_dir: Path = Path(".")
+    # 当前配置的构建树，由 resolve_build_dir() 设置为 build_root/<compiler>-<build_type>
     build_dir: Path = Path("build")
+    # 所有构建树的根目录，默认为 <project_dir>/build
+    build_root: Optional[Path] = None
+    # 构建树缓存总大小上限（MB），超出时按 LRU 删除，None 表示不限制
+    max_build_cache_mb: Optional[int] = DEFAULT_BUILD_CACHE_MB
 
     # 编译器环境变量
     cc: Optional[str] = None
     cxx: Optional[str] = None
-    # CMake 生成器
+    # CMake 生成器（与编译器无关，见 okcpp.core.generator.resolve_generator）
     generator: str = "Unix Makefiles"
+    # 编译器缓存（ccache / sccache），None 表示不使用
+    launcher: Optional[str] = None
+    # 链接器：传入配置值（auto / default / mold / lld / gold），prepare_build 解析为
+    # 实际使用的链接器，None 表示系统默认链接器（见 okcpp.core.linker.resolve_linker）
+    linker: Optional[str] = None
+    # 并行编译任务规划，None 表示构建时自动计算
+    job_plan: Optional[JobPlan] = None
+    # 忽略配置指纹，强制重新运行 CMake 配置
+    reconfigure: bool = False
+    # 构建日志文件；设置后构建输出写入该文件而不是终端（用于批量构建）
+    log_file: Optional[Path] = None
+    # 本次运行的计时记录，由 build_and_run 创建
+    timings: Optional[BuildTimings] = None
+    # 计时报告格式（table / json / csv），设置后同时记录每个编译单元的耗时
+    timings_format: Optional[str] = None
+    # json / csv 计时报告的输出文件，未设置时写入 stderr
+    timings_out: Optional[Path] = None
+    # 为所有 C++ 目标注入预编译头（标准库 + 检测到的框架），见 okcpp.core.pch
+    pch: bool = False
+    # unity 构建（CMAKE_UNITY_BUILD）及每批合并的编译单元数
+    unity: bool = False
+    unity_batch: int = DEFAULT_UNITY_BATCH
+    # 构建产物缓存大小上限（MB），None 表示不使用，见 okcpp.core.artifact_cache
+    artifact_cache_mb: Optional[int] = None
+    # 全新构建树对应的缓存键，首次构建成功后据此存入缓存
+    artifact_key: Optional[str] = None
+    # 构建截止时间（time.time() 时间戳），超时后终止 CMake 并抛出 subprocess.TimeoutExpired
+    deadline: Optional[float] = None
+    # 解析配置/构建输出中的诊断，失败时输出第一条错误的摘要（非交互模式、批量构建）
+    parse_diagnostics: bool = False
+    # 最近一次配置或构建的诊断，parse_diagnostics 为 False 时为 None
+    diagnostics: Optional[DiagnosticParser] = None
+    # 性能分析器（perf / gprof），设置后构建完成时在分析器下运行程序，见 okcpp.core.profile
+    profiler: Optional[str] = None
+
+
+# 配置指纹文件名，与 compiler.txt / build_type.txt 一起存放在构建目录
+FINGERPRINT_FILE = "configure_fingerprint.txt"
+
+# 上次成功构建时影响编译命令的特性，用于判断本次是否为完整构建
+BUILD_STAMP_FILE = "build_stamp.txt"
+
+# 检测 unity 冲突时保留的构建输出行数
+BUILD_OUTPUT_TAIL = 5000
+
+# 各阶段失败时 ok-cpp run / bench 的退出码（程序正常启动后返回程序自身的退出码）
+EXIT_CONFIGURE_FAILED = 100
+EXIT_BUILD_FAILED = 101
+EXIT_RUN_FAILED = 102
+
+# 会影响 CMake 配置结果的环境变量
+CONFIGURE_ENV_VARS = (
+    "PATH",
+    "CFLAGS",
+    "CXXFLAGS",
+    "CPPFLAGS",
+    "LDFLAGS",
+    "CMAKE_PREFIX_PATH",
+    "CMAKE_TOOLCHAIN_FILE",
+    "PKG_CONFIG_PATH",
+    "Qt5_DIR",
+    "Qt6_DIR",
+    "QTDIR",
+)
+
+
+def _emit(config: BuildConfig, printer: Callable[[str], None], message: str) -> None:
+    """输出构建过程消息，设置了日志文件时写入日志。
+
+    Args:
+        config: 构建配置
+        printer: 输出到终端时使用的函数
+        message: 消息内容
+    """
+    if config.log_file is None:
+        printer(message)
+        return
+    config.log_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(config.log_file, "a", encoding="utf-8") as f:
+        f.write(message + "\n")
+
+
+def append_log(log_file: Path, message: str) -> None:
+    """向日志文件追加一行，用于异常处理路径：目录已被删除时重新创建，写入失败时忽略。
+
+    Args:
+        log_file: 日志文件
+        message: 消息内容
+    """
+    try:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write(message + "\n")
+    except OSError:
+        pass
+
+
+def _run_tee(config: BuildConfig, cmd: list[str],
+             on_line: Optional[Callable[[str], object]] = None,
+             **kwargs) -> Tuple[int, List[str]]:
+    """运行构建命令，实时输出的同时保留输出内容用于分析。
+
+    Args:
+        config: 构建配置
+        cmd: 命令参数列表
+        on_line: 每读到一行输出（不含换行符）时调用
+        **kwargs: 传递给 subprocess.Popen 的其他参数
+
+    Returns:
+        (退出码, 最后 BUILD_OUTPUT_TAIL 行输出)
+    """
+    tail = deque(maxlen=BUILD_OUTPUT_TAIL)
+    log = open(config.log_file, "a", encoding="utf-8") if config.log_file else None
+    timeout = _remaining_time(config)
+    timer = None
+    expired = threading.Event()
+    try:
+        with subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            start_new_session=timeout is not None,
+            **kwargs,
+        ) as process:
+            if timeout is not None:
+                def kill() -> None:
+                    expired.set()
+                    _kill_process_group(process)
+
+                timer = threading.Timer(timeout, kill)
+                timer.start()
+            try:
+                for line in process.stdout:
+                    tail.append(line.rstrip("\n"))
+                    if on_line is not None:
+                        on_line(tail[-1])
+                    out = log or sys.stdout
+                    out.write(line)
+                    out.flush()
+            except BaseException:
+                # 独立会话中的进程收不到终端的 Ctrl-C，中断时一并终止
+                if timeout is not None:
+                    _kill_process_group(process)
+                raise
+        if expired.is_set() and process.returncode != 0:
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        return process.returncode, list(tail)
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if log is not None:
+            log.close()
+
+
+def _run_logged(config: BuildConfig, cmd: list[str], **kwargs) -> subprocess.CompletedProcess:
+    """运行构建命令，设置了日志文件时把输出追加到日志。
+
+    Args:
+        config: 构建配置
+        cmd: 命令参数列表
+        **kwargs: 传递给 subprocess.run 的其他参数
+
+    Returns:
+        CompletedProcess 对象
+    """
+    timeout = kwargs.pop("timeout", _remaining_time(config))
+    if config.log_file is None:
+        return _run_with_deadline(cmd, timeout, **kwargs)
+    with open(config.log_file, "a", encoding="utf-8") as log:
+        return _run_with_deadline(cmd, timeout, stdout=log, stderr=subprocess.STDOUT, **kwargs)
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    """终止以 start_new_session 启动的进程及其整个进程组（make/ninja 启动的编译器等）。"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _run_with_deadline(cmd: list[str], timeout: Optional[float], **kwargs) -> subprocess.CompletedProcess:
+    """运行命令，设置了超时时在独立的进程组中运行，超时后终止整个进程组。
+
+    subprocess.run 的超时只终止直接子进程（cmake），make/ninja 和编译器会继续运行。
+
+    Args:
+        cmd: 命令参数列表
+        timeout: 超时（秒），None 表示不限时
+        **kwargs: 传递给 subprocess.Popen 的其他参数
+
+    Returns:
+        CompletedProcess 对象
+
+    Raises:
+        subprocess.TimeoutExpired: 超时
+    """
+    if timeout is None:
+        return subprocess.run(cmd, **kwargs)
+    with subprocess.Popen(cmd, start_new_session=True, **kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except BaseException:
+            # 超时或中断（独立会话中的进程收不到终端的 Ctrl-C）
+            _kill_process_group(process)
+            raise
+    return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+
+def _run_step(config: BuildConfig, cmd: list[str], keep_output: bool = False,
+              **kwargs) -> Tuple[int, List[str]]:
+    """运行配置或构建命令，按需解析诊断。
+
+    需要分析输出（keep_output 或解析诊断）时逐行读取输出，否则直接输出到终端或日志。
+
+    Args:
+        config: 构建配置
+        cmd: 命令参数列表
+        keep_output: 是否返回输出内容
+        **kwargs: 传递给 subprocess 的其他参数
+
+    Returns:
+        (退出码, 输出内容；不需要分析输出时为空列表)
+    """
+    config.diagnostics = DiagnosticParser() if config.parse_diagnostics else None
+    if config.diagnostics is None and not keep_output:
+        return _run_logged(config, cmd, **kwargs).returncode, []
+    on_line = config.diagnostics.feed if config.diagnostics is not None else None
+    return _run_tee(config, cmd, on_line=on_line, **kwargs)
+
+
+def _report_diagnostics(config: BuildConfig, phase: str) -> None:
+    """失败后输出第一条错误（通常是其余错误的根源）和诊断数量。
+
+    Args:
+        config: 构建配置
+        phase: 失败的阶段（configure / build）
+    """
+    diagnostics = config.diagnostics
+    if diagnostics is None:
+        return
+    first_error = diagnostics.first_error
+    if first_error is not None:
+        _emit(config, err, f"First error: {first_error.describe()}")
+    _emit(config, print_yellow_b, f"{phase.capitalize()} failed: {diagnostics.summary()}")
+
+
+def _remaining_time(config: BuildConfig) -> Optional[float]:
+    """距离构建截止时间的秒数，未设置截止时间时返回 None。"""
+    if config.deadline is None:
+        return None
+    return max(0.0, config.deadline - time.time())
 
 
 def get_cmake_project_name(cmake_dir: Path) -> Optional[str]:
@@ -71,13 +384,55 @@ def get_cmake_project_name(cmake_dir: Path) -> Optional[str]:
     return None
 
 
+# 按名称搜索项目时的最大深度（与 find -maxdepth 一致，按 CMakeLists.txt 所在层级计算）
+MAX_SEARCH_DEPTH = 4
+
+
+def _is_build_tree(path: Path) -> bool:
+    """判断目录是否是构建目录（不需要在其中搜索项目）。"""
+    return path.name == "build" or (path / "CMakeCache.txt").exists()
+
+
+def iter_cmake_projects(
+    root: Path, max_depth: int = MAX_SEARCH_DEPTH, nested: bool = True
+) -> Iterator[Path]:
+    """遍历 root 下所有包含 CMakeLists.txt 的目录。
+
+    跳过隐藏目录和构建目录。
+
+    Args:
+        root: 搜索根目录
+        max_depth: 最大深度（root 下的 CMakeLists.txt 深度为 1）
+        nested: 是否继续进入已找到的项目目录（False 时只返回顶层项目）
+
+    Yields:
+        项目目录路径
+    """
+    for current, dirs, files in os.walk(root):
+        current_path = Path(current)
+        depth = len(current_path.relative_to(root).parts) + 1
+        if "CMakeLists.txt" in files:
+            yield current_path
+            if not nested:
+                dirs[:] = []
+                continue
+        if depth >= max_depth:
+            dirs[:] = []
+            continue
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(".") and not _is_build_tree(current_path / d)
+        )
+
+
 def find_project_dir(arg: Optional[str], current_dir: Path = None) -> Optional[Path]:
     """查找项目目录。
 
     查找顺序：
     1. 如果 arg 是包含 CMakeLists.txt 的目录，使用该目录
     2. 如果 arg 的父目录包含 CMakeLists.txt，使用父目录
-    3. 按 project_name 在当前目录下搜索（最大深度 4）
+    3. 在当前目录下按目录名或 CMake project() 名称搜索（最大深度 4），
+       使用持久化的项目索引，只重新列出发生变化的目录
 
     Args:
         arg: 命令行参数（路径或项目名）
@@ -107,29 +462,25 @@ def find_project_dir(arg: Optional[str], current_dir: Path = None) -> Optional[P
         if (parent / "CMakeLists.txt").exists():
             return parent.resolve()
 
-    # 按项目名搜索
+    # 按项目名搜索包含 CMakeLists.txt 且目录名（或 project() 名称）匹配的目录
+    from okcpp.core.project_index import find_projects
+
     try:
-        # 使用 find 搜索包含 CMakeLists.txt 且目录名匹配的目录
-        result = subprocess.run(
-            ["find", ".", "-maxdepth", "4", "-type", "f", "-name", "CMakeLists.txt"],
-            capture_output=True,
-            text=True,
-            cwd=current_dir,
-            timeout=10,
-        )
-        if result.returncode == 0:
-            for line in result.stdout.splitlines():
-                cmake_dir = Path(line).parent
-                if cmake_dir.name == arg:
-                    return cmake_dir.resolve()
-    except Exception:
-        pass
+        matches = find_projects(current_dir, arg, MAX_SEARCH_DEPTH)
+    except OSError:
+        matches = [path for path in iter_cmake_projects(current_dir) if path.name == arg]
+
+    for cmake_dir in matches:
+        if (cmake_dir / "CMakeLists.txt").exists():
+            return cmake_dir.resolve()
 
     return None
 
 
 def setup_compiler_env(config: BuildConfig) -> BuildConfig:
-    """设置编译器环境变量和 CMake 生成器。
+    """设置编译器环境变量。
+
+    CMake 生成器与编译器无关，由 resolve_generator() 根据配置单独确定。
 
     Args:
         config: 构建配置
@@ -140,11 +491,9 @@ def setup_compiler_env(config: BuildConfig) -> BuildConfig:
     if config.compiler == "gun":
         config.cc = "gcc"
         config.cxx = "g++"
-        config.generator = "Unix Makefiles"
     elif config.compiler == "clang":
         config.cc = "clang"
         config.cxx = "clang++"
-        config.generator = "Ninja"
     else:
         err(f"未知编译器: {config.compiler} (使用 gun / clang)")
         raise ValueError(f"Unknown compiler: {config.compiler}")
@@ -152,6 +501,26 @@ def setup_compiler_env(config: BuildConfig) -> BuildConfig:
     return config
 
 
+def resolve_build_dir(config: BuildConfig) -> Path:
+    """确定当前配置使用的构建树。
+
+    每种编译器/构建类型组合使用独立的构建树（如 build/gun-Release），
+    切换配置时无需清理和重新编译。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        构建树路径（同时写回 config.build_dir）
+    """
+    if config.build_root is None:
+        config.build_root = config.project_dir / "build"
+    config.build_dir = config.build_root / get_build_tree_name(
+        config.compiler, config.build_type, config.variant
+    )
+    return config.build_dir
+
+
 def check_build_cache_needs_clean(build_dir: Path, compiler: str, build_type: str) -> bool:
     """检查是否需要清理构建缓存。
 
@@ -186,17 +555,36 @@ def check_build_cache_needs_clean(build_dir: Path, compiler: str, build_type: st
     return needs_clean
 
 
-def clean_build_dir(build_dir: Path) -> None:
+def clean_build_dir(build_dir: Path, reason: str = "配置变更",
+                    config: Optional[BuildConfig] = None) -> None:
     """清理构建目录。
 
     Args:
         build_dir: 构建目录
+        reason: 清理原因
+        config: 构建配置，设置了日志文件时消息写入日志（删除目录之后再写，日志可能位于其中）
     """
     import shutil
 
     if build_dir.exists():
-        print_yellow_b("配置变更，清理 build 目录")
         shutil.rmtree(build_dir)
+        message = f"{reason}，清理 build 目录"
+        if config is None:
+            print_yellow_b(message)
+        else:
+            _emit(config, print_yellow_b, message)
+
+
+def migrate_legacy_build_root(config: BuildConfig) -> None:
+    """迁移旧版的单一构建树布局（build/CMakeCache.txt）：清理整个 build 目录。
+
+    build 目录下的所有文件都会被删除，日志位于 build 目录下时应先调用本函数再创建日志。
+
+    Args:
+        config: 构建配置
+    """
+    if is_legacy_build_root(config.build_root):
+        clean_build_dir(config.build_root, reason="检测到旧版 build 目录布局", config=config)
 
 
 def write_build_markers(build_dir: Path, compiler: str, build_type: str) -> None:
@@ -212,44 +600,238 @@ def write_build_markers(build_dir: Path, compiler: str, build_type: str) -> None
     (build_dir / "build_type.txt").write_text(build_type)
 
 
-def run_cmake_configure(config: BuildConfig) -> bool:
-    """运行 CMake 配置。
+def iter_cmake_files(project_dir: Path, build_dir: Path) -> Iterator[Path]:
+    """遍历项目中所有影响配置的 CMake 文件。
+
+    包括 CMakeLists.txt 和 *.cmake，跳过构建目录和隐藏目录。
+
+    Args:
+        project_dir: 项目目录
+        build_dir: 构建（根）目录
+
+    Yields:
+        CMake 文件路径（按路径排序）
+    """
+    build_dir = build_dir.resolve()
+    for root, dirs, files in os.walk(project_dir):
+        root_path = Path(root)
+        dirs[:] = sorted(
+            d for d in dirs
+            if not d.startswith(".") and (root_path / d).resolve() != build_dir
+        )
+        for name in sorted(files):
+            if name == "CMakeLists.txt" or name.endswith(".cmake"):
+                yield root_path / name
+
+
+def _configure_command(config: BuildConfig) -> list[str]:
+    """生成 CMake 配置命令。
 
     Args:
         config: 构建配置
 
     Returns:
-        如果成功返回 True
+        命令参数列表
+    """
+    cmd = [
+        "cmake",
+        "-B", str(config.build_dir),
+        "-G", config.generator,
+        f"-DCMAKE_BUILD_TYPE={config.build_type}",
+    ]
+
+    # 模板把输出目录固定为 <project>/build，这里按配置把产物重定向到各自的构建树，
+    # 避免不同配置的构建树互相覆盖可执行文件
+    config_suffix = config.build_type.upper()
+    for kind in ("RUNTIME", "LIBRARY", "ARCHIVE"):
+        cmd.append(f"-DCMAKE_{kind}_OUTPUT_DIRECTORY_{config_suffix}={config.build_dir}")
+
+    # 构建变体的编译/链接选项（变体使用独立的构建树，未设置时保留 CMake 默认值）
+    if config.compile_flags is not None:
+        for lang in ("C", "CXX"):
+            cmd.append(f"-DCMAKE_{lang}_FLAGS_{config_suffix}={config.compile_flags}")
+    if config.link_flags is not None:
+        for kind in ("EXE", "SHARED", "MODULE"):
+            cmd.append(f"-DCMAKE_{kind}_LINKER_FLAGS_{config_suffix}={config.link_flags}")
+
+    # 编译器缓存：未启用时显式清空，避免沿用 CMakeCache 中的旧值
+    # 记录编译单元耗时时，在编译器缓存之前插入计时包装脚本（Ninja 直接读取 .ninja_log）
+    launchers = [config.launcher] if config.launcher else []
+    linker_launcher = ""
+    version = get_cmake_version()
+    has_linker_launcher = version is not None and version >= CMAKE_LINKER_LAUNCHER_VERSION
+    if config.timings_format and config.generator != "Ninja":
+        wrapper = str(config.build_dir / TIMING_WRAPPER_NAME)
+        launchers.insert(0, wrapper)
+        linker_launcher = wrapper
+        if not has_linker_launcher:
+            warn("CMake 3.21 以下不支持 CMAKE_<LANG>_LINKER_LAUNCHER，将不记录链接耗时")
+    launcher = ";".join(launchers)
+    for lang in ("C", "CXX"):
+        cmd.append(f"-DCMAKE_{lang}_COMPILER_LAUNCHER={launcher}")
+        if has_linker_launcher:
+            cmd.append(f"-DCMAKE_{lang}_LINKER_LAUNCHER={linker_launcher}")
+
+    # 链接时优化：未启用时显式关闭
+    cmd.append(f"-DCMAKE_INTERPROCEDURAL_OPTIMIZATION={'ON' if config.lto else 'OFF'}")
+
+    # 链接器：未使用自定义链接器时显式重置
+    cmd.extend(linker_cmake_args(config.linker))
+
+    # unity 构建：未启用时显式关闭
+    cmd.append(f"-DCMAKE_UNITY_BUILD={'ON' if config.unity else 'OFF'}")
+    if config.unity:
+        cmd.append(f"-DCMAKE_UNITY_BUILD_BATCH_SIZE={config.unity_batch}")
+
+    # 预编译头：未启用时从缓存中删除（CMake 会把空值当作路径报错，不能像上面一样置空）
+    if config.pch:
+        cmd.append(f"-DCMAKE_PROJECT_INCLUDE={config.build_dir / PCH_INCLUDE_NAME}")
+    else:
+        cmd.append("-UCMAKE_PROJECT_INCLUDE")
+
+    return cmd
+
+
+def get_build_features(config: BuildConfig) -> list[str]:
+    """列出当前构建启用的、影响构建时间的特性（记录在计时历史中用于对比）。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        特性列表，例如 ["generator=Ninja", "launcher=ccache"]
     """
-    print_purple_b("[1/3] CMake Configure")
+    features = [f"generator={config.generator}"]
+    if config.variant:
+        features.append(f"variant={config.variant}")
+    if config.lto:
+        features.append("lto")
+    if config.launcher:
+        features.append(f"launcher={config.launcher}")
+    if config.linker:
+        features.append(f"linker={config.linker}")
+    if config.pch:
+        features.append("pch")
+    if config.unity:
+        features.append(f"unity={config.unity_batch}")
+    return features
+
+
+def _compile_stamp(config: BuildConfig) -> str:
+    """影响所有编译命令的特性（变化时所有编译单元都会重新编译）。"""
+    return (f"pch={config.pch};unity={config.unity_batch if config.unity else 0};"
+            f"flags={config.compile_flags};link={config.link_flags};lto={config.lto}\n")
+
+
+def _configure_env(config: BuildConfig) -> dict[str, str]:
+    """生成 CMake 配置时使用的环境变量。
 
+    Args:
+        config: 构建配置
+
+    Returns:
+        环境变量字典
+    """
     env = os.environ.copy()
     if config.cc:
         env["CC"] = config.cc
     if config.cxx:
         env["CXX"] = config.cxx
+    return env
 
-    cmd = [
-        "cmake",
-        "-B", str(config.build_dir),
-        "-G", config.generator,
-        f"-DCMAKE_BUILD_TYPE={config.build_type}",
-    ]
+
+def compute_configure_fingerprint(config: BuildConfig, cmd: list[str], env: dict[str, str]) -> str:
+    """计算 CMake 配置指纹。
+
+    指纹覆盖所有 CMake 文件内容、CC/CXX、生成器、配置命令和相关环境变量。
+
+    Args:
+        config: 构建配置
+        cmd: CMake 配置命令
+        env: 配置时使用的环境变量
+
+    Returns:
+        十六进制指纹字符串
+    """
+    digest = hashlib.sha256()
+    digest.update("\0".join(cmd).encode())
+    for key in ("CC", "CXX") + CONFIGURE_ENV_VARS:
+        digest.update(f"\0{key}={env.get(key, '')}".encode())
+
+    build_root = config.build_root or config.build_dir
+    for cmake_file in iter_cmake_files(config.project_dir, build_root):
+        digest.update(f"\0{cmake_file.relative_to(config.project_dir)}\0".encode())
+        try:
+            digest.update(cmake_file.read_bytes())
+        except OSError:
+            pass
+
+    return digest.hexdigest()
+
+
+def is_configure_up_to_date(build_dir: Path, fingerprint: str) -> bool:
+    """检查构建目录中的配置是否与指纹一致。
+
+    Args:
+        build_dir: 构建目录
+        fingerprint: 当前配置指纹
+
+    Returns:
+        如果可以跳过配置返回 True
+    """
+    fingerprint_file = build_dir / FINGERPRINT_FILE
+    if not (build_dir / "CMakeCache.txt").exists() or not fingerprint_file.exists():
+        return False
+    return fingerprint_file.read_text().strip() == fingerprint
+
+
+def run_cmake_configure(config: BuildConfig) -> bool:
+    """运行 CMake 配置。
+
+    如果配置指纹与上次成功配置时一致，则跳过配置。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        如果成功返回 True
+    """
+    _emit(config, print_purple_b, "[1/3] CMake Configure")
+
+    env = _configure_env(config)
+    cmd = _configure_command(config)
+
+    fingerprint = compute_configure_fingerprint(config, cmd, env)
+    fingerprint_file = config.build_dir / FINGERPRINT_FILE
+    if not config.reconfigure and is_configure_up_to_date(config.build_dir, fingerprint):
+        _emit(config, print_blue, "Configure skipped (fingerprint unchanged).")
+        if config.timings is not None:
+            config.timings.configure_skipped = True
+            config.timings.add_phase("configure", 0.0)
+        return True
+
+    # 配置失败时不能保留旧指纹
+    fingerprint_file.unlink(missing_ok=True)
 
     start = time.time()
     try:
-        subprocess.run(
-            cmd,
-            cwd=config.project_dir,
-            env=env,
-            check=True,
-        )
-        duration = time.time() - start
-        print_blue(f"Configure finished in {duration:.2f}s.")
-        return True
-    except subprocess.CalledProcessError:
+        returncode, output = _run_step(config, cmd, keep_output=config.linker is not None,
+                                       cwd=config.project_dir, env=env)
+    finally:
+        if config.timings is not None:
+            config.timings.add_phase("configure", time.time() - start)
+
+    if returncode != 0:
+        if config.linker and is_linker_failure(output):
+            return _fallback_from_linker(config)
+        _report_diagnostics(config, "configure")
         return False
 
+    duration = time.time() - start
+    fingerprint_file.write_text(fingerprint)
+    _emit(config, print_blue, f"Configure finished in {duration:.2f}s.")
+    return True
+
 
 def run_cmake_build(config: BuildConfig) -> bool:
     """运行 CMake 构建。
@@ -260,28 +842,165 @@ def run_cmake_build(config: BuildConfig) -> bool:
     Returns:
         如果成功返回 True
     """
-    print_purple_b("[2/3] Build")
+    _emit(config, print_purple_b, "[2/3] Build")
+
+    plan = config.job_plan or plan_jobs()
+    _emit(config, print_blue, f"Parallel jobs: {plan.describe()}")
 
-    cmd = ["cmake", "--build", str(config.build_dir)]
+    cmd = ["cmake", "--build", str(config.build_dir), "--parallel", str(plan.jobs)]
+
+    stats_before = get_cache_stats(config.launcher) if config.launcher else None
+    offset = log_offset(config.build_dir, config.generator)
+
+    stamp_file = config.build_dir / BUILD_STAMP_FILE
+    stamp = _compile_stamp(config)
+    full_build = not stamp_file.exists() or stamp_file.read_text() != stamp
+    stamp_file.unlink(missing_ok=True)
 
     start = time.time()
     try:
-        subprocess.run(
-            cmd,
-            cwd=config.project_dir,
-            check=True,
-        )
-        duration = time.time() - start
-        print_blue(f"Compilation finished in {duration:.2f}s.")
-        return True
-    except subprocess.CalledProcessError:
+        # unity 构建和自定义链接器需要分析输出，以便在出错时回退
+        returncode, output = _run_step(config, cmd, keep_output=config.unity or bool(config.linker),
+                                       cwd=config.project_dir)
+    finally:
+        if config.timings is not None:
+            config.timings.full_build = config.timings.full_build or full_build
+            _record_build_timings(config, time.time() - start, offset)
+
+    if returncode != 0:
+        if config.unity and is_unity_clash(output):
+            return _fallback_from_unity(config)
+        if config.linker and is_linker_failure(output):
+            return _fallback_from_linker(config)
+        _report_diagnostics(config, "build")
+        return False
+
+    duration = time.time() - start
+    stamp_file.write_text(stamp)
+    _emit(config, print_blue, f"Compilation finished in {duration:.2f}s.")
+    if config.artifact_key is not None:
+        _store_artifacts(config)
+    if stats_before is not None:
+        stats_after = get_cache_stats(config.launcher)
+        if stats_after is not None:
+            stats = (stats_after - stats_before).describe()
+            _emit(config, print_blue, f"Compiler cache ({config.launcher}): {stats}")
+    return True
+
+
+def _artifact_toolchain(config: BuildConfig) -> list[str]:
+    """影响构建树内容的编译器、构建类型、生成器、工具链版本和环境变量。"""
+    fields = [config.compiler, config.build_type, config.generator, _compile_stamp(config).strip()]
+    for command in (config.cc, config.cxx, "cmake"):
+        tool = check_command(command, command)
+        fields.append(f"{command}={shutil.which(command)} {tool.version}")
+    # PATH 因用户而异，编译器路径已经包含在上面
+    fields.extend(
+        f"{key}={os.environ.get(key, '')}" for key in CONFIGURE_ENV_VARS if key != "PATH"
+    )
+    return fields
+
+
+def _seed_from_artifact_cache(config: BuildConfig) -> None:
+    """全新的构建树：尝试从构建产物缓存复制，未命中时记下缓存键，构建成功后存入。
+
+    Args:
+        config: 构建配置
+    """
+    key = compute_artifact_key(config.project_dir, config.build_root, _artifact_toolchain(config))
+    if key is None:
+        return
+
+    entry = seed_build_tree(key, config.project_dir, config.build_dir, config.project_name)
+    if entry is None:
+        config.artifact_key = key
+        return
+    reused = "configure results and objects" if entry.objects else "configure results"
+    _emit(config, print_blue, f"Seeded build tree from artifact cache ({reused}, key {key[:12]})")
+
+
+def _store_artifacts(config: BuildConfig) -> None:
+    """把首次构建成功的构建树存入构建产物缓存。
+
+    Args:
+        config: 构建配置
+    """
+    key, config.artifact_key = config.artifact_key, None
+    if store_build_tree(key, config.project_dir, config.build_dir, config.project_name,
+                        config.generator, config.build_type, config.artifact_cache_mb):
+        _emit(config, print_blue, f"Stored build tree in artifact cache (key {key[:12]})")
+
+
+def _fallback_from_unity(config: BuildConfig) -> bool:
+    """unity 构建出现符号冲突时，关闭 unity 重新配置并构建。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        如果普通构建成功返回 True
+    """
+    _emit(config, print_yellow_b,
+          "Unity build failed with redefinition/ambiguity errors, retrying without unity build")
+    config.unity = False
+    if config.timings is not None:
+        config.timings.features = [
+            "unity-fallback" if feature.startswith("unity=") else feature
+            for feature in config.timings.features
+        ]
+    return run_cmake_configure(config) and run_cmake_build(config)
+
+
+def _fallback_from_linker(config: BuildConfig) -> bool:
+    """自定义链接器出错时，改用默认链接器重新配置和构建。
+
+    只有默认链接器构建成功（确认是链接器本身的问题）时才记录到构建树中，
+    之后在该构建树中直接使用默认链接器；否则下次仍使用所选链接器。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        如果使用默认链接器构建成功返回 True
+    """
+    linker = config.linker
+    _emit(config, print_yellow_b,
+          f"Linking with {linker} failed, retrying with the default linker")
+    config.linker = None
+    if config.timings is not None:
+        config.timings.features = [
+            "linker-fallback" if feature.startswith("linker=") else feature
+            for feature in config.timings.features
+        ]
+    if not (run_cmake_configure(config) and run_cmake_build(config)):
         return False
+    write_linker_fallback(config.build_dir, linker)
+    return True
+
+
+def _record_build_timings(config: BuildConfig, duration: float, offset: int) -> None:
+    """记录构建阶段耗时以及每个编译单元、链接步骤的耗时。
+
+    Args:
+        config: 构建配置
+        duration: 构建总耗时
+        offset: 构建前的计时日志长度
+    """
+    timings = config.timings
+    timings.add_phase("build", duration)
+    units = collect_unit_timings(config.build_dir, config.generator, offset)
+    timings.units.extend(units)
+    link_units = [unit for unit in units if unit.kind == "link"]
+    if link_units:
+        timings.add_phase("link", sum(unit.seconds for unit in link_units))
 
 
 def get_executable_path(config: BuildConfig) -> Path:
     """获取可执行文件路径。
 
-    对于库模板，会尝试查找 ${PROJECT_NAME}_test 作为回退选项。
+    可执行文件名来自项目中随模板复制来的清单（okcpp-template.json 的 entry），
+    没有清单时使用项目名。优先在当前配置的构建树中查找，其次是 build 根目录
+    （项目自行设置了输出目录的情况）。
 
     Args:
         config: 构建配置
@@ -289,16 +1008,26 @@ def get_executable_path(config: BuildConfig) -> Path:
     Returns:
         可执行文件的路径
     """
-    if config.project_name:
-        exe_path = config.build_dir / config.project_name
-        # 如果主可执行文件不存在，尝试查找 _test 后缀的（用于库模板）
-        if not exe_path.exists():
-            test_path = config.build_dir / f"{config.project_name}_test"
-            if test_path.exists():
-                return test_path
-        return exe_path
     # 如果没有项目名，使用目录名
-    return config.build_dir / config.project_dir.name
+    name = config.project_name or config.project_dir.name
+    manifest = read_project_manifest(config.project_dir)
+    if manifest is not None:
+        candidates = [manifest.get_entry(name)]
+    else:
+        # 清单出现之前由库模板创建的项目：运行 ${PROJECT_NAME}_test
+        candidates = [name, f"{name}_test"]
+
+    search_dirs = [config.build_dir]
+    if config.build_root is not None and config.build_root != config.build_dir:
+        search_dirs.append(config.build_root)
+
+    for directory in search_dirs:
+        for candidate in candidates:
+            exe_path = directory / candidate
+            if exe_path.is_file():
+                return exe_path
+
+    return config.build_dir / candidates[0]
 
 
 def run_executable(exe_path: Path, build_type: str) -> int:
@@ -309,11 +1038,11 @@ def run_executable(exe_path: Path, build_type: str) -> int:
         build_type: 构建类型
 
     Returns:
-        退出码
+        程序的退出码（被信号终止时为 128 + 信号编号），无法启动时返回 EXIT_RUN_FAILED
     """
     if not exe_path.exists():
         err(f"未找到可执行文件: {exe_path}")
-        return 1
+        return EXIT_RUN_FAILED
 
     if build_type == "Debug":
         # 检查 gdb 是否存在
@@ -321,7 +1050,7 @@ def run_executable(exe_path: Path, build_type: str) -> int:
 
         if shutil.which("gdb") is None:
             err("Debug 模式需要 GDB，但未找到。请先安装。")
-            return 1
+            return EXIT_RUN_FAILED
 
         print_purple_b("[3/3] Debug (GDB)")
         print("=" * 70)
@@ -333,52 +1062,176 @@ def run_executable(exe_path: Path, build_type: str) -> int:
         print("=" * 70)
         result = subprocess.run([str(exe_path)])
         print("=" * 70)
-        return result.returncode
+        # 与 shell 一致：被信号终止的程序返回 128 + 信号编号
+        return 128 - result.returncode if result.returncode < 0 else result.returncode
 
 
-def build_and_run(config: BuildConfig) -> int:
-    """执行完整的构建和运行流程。
+def prepare_build(config: BuildConfig) -> BuildConfig:
+    """准备构建：设置编译器环境、解析项目名并定位构建树。
 
     Args:
         config: 构建配置
 
     Returns:
-        退出码
+        更新后的构建配置
     """
     # 1. 设置编译器环境
     config = setup_compiler_env(config)
 
-    print_yellow_b(f"项目路径: {config.project_dir}")
+    _emit(config, print_yellow_b, f"项目路径: {config.project_dir}")
 
     # 2. 解析项目名
     if config.project_name is None:
         config.project_name = get_cmake_project_name(config.project_dir)
         if config.project_name:
-            info(f"Detected project name from CMake: {config.project_name}")
+            _emit(config, info, f"Detected project name from CMake: {config.project_name}")
         else:
             config.project_name = config.project_dir.name
-            info(f"未检测到 project(...)，回退为目录名: {config.project_name}")
+            _emit(config, info, f"未检测到 project(...)，回退为目录名: {config.project_name}")
 
-    print_blue_b(f"Compiler: {config.cxx}")
-    print_blue_b(f"Build type: {config.build_type}")
+    _emit(config, print_blue_b, f"Compiler: {config.cxx}")
+    if config.launcher:
+        _emit(config, print_blue_b, f"Compiler cache: {config.launcher}")
+    _emit(config, print_blue_b, f"Build type: {config.build_type}")
+    _emit(config, print_blue_b, f"Generator: {config.generator}")
 
-    # 3. 检查是否需要清理构建缓存
+    # 3. 定位当前配置的构建树
+    resolve_build_dir(config)
+    migrate_legacy_build_root(config)
     if check_build_cache_needs_clean(config.build_dir, config.compiler, config.build_type):
-        clean_build_dir(config.build_dir)
+        clean_build_dir(config.build_dir, config=config)
+    cached_generator = get_cached_generator(config.build_dir)
+    if cached_generator is not None and cached_generator != config.generator:
+        # CMake 不允许在已配置的构建树中更换生成器
+        reason = f"CMake 生成器变更 ({cached_generator} -> {config.generator})"
+        clean_build_dir(config.build_dir, reason=reason, config=config)
+    _emit(config, print_blue_b, f"Build dir: {config.build_dir}")
+
+    # 4. 确定链接器（在该构建树中链接失败过的链接器直接跳过，--reconfigure 时重新尝试）
+    config.linker = resolve_linker(config.linker, config.compiler, config.lto)
+    if config.linker and read_linker_fallback(config.build_dir) == config.linker:
+        if config.reconfigure:
+            (config.build_dir / LINKER_FALLBACK_FILE).unlink(missing_ok=True)
+        else:
+            _emit(config, info, f"Linker {config.linker} failed in this build dir before, "
+                                "using the default linker (--reconfigure to retry)")
+            config.linker = None
+    if config.linker:
+        _emit(config, print_blue_b, f"Linker: {config.linker}")
 
-    # 4. 写入构建标记
+    if config.artifact_cache_mb and not (config.build_dir / "CMakeCache.txt").exists():
+        _seed_from_artifact_cache(config)
+
+    # 5. 写入构建标记（同时记录构建树的最近使用时间）
     write_build_markers(config.build_dir, config.compiler, config.build_type)
+    if config.timings_format and config.generator != "Ninja":
+        write_timing_wrapper(config.build_dir)
+    if config.pch:
+        write_pch_script(config.build_dir)
+
+    return config
+
+
+def build_and_run(config: BuildConfig) -> int:
+    """执行完整的构建和运行流程。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        退出码
+    """
+    start = time.time()
+    config = prepare_build(config)
+    config.timings = start_timings(
+        config.project_name, config.compiler, config.build_type, config.generator,
+        get_build_features(config),
+    )
 
     # 5. CMake 配置
     if not run_cmake_configure(config):
-        handle_error("CMake 配置失败")
-        return 1
+        finish_timings(config, start)
+        handle_error("CMake 配置失败", EXIT_CONFIGURE_FAILED)
+        return EXIT_CONFIGURE_FAILED
 
     # 6. CMake 构建
     if not run_cmake_build(config):
-        handle_error("编译失败")
-        return 1
+        finish_timings(config, start)
+        handle_error("编译失败", EXIT_BUILD_FAILED)
+        return EXIT_BUILD_FAILED
+
+    # 控制构建缓存大小
+    evict_build_trees(config.build_root, config.build_dir, config.max_build_cache_mb)
 
-    # 7. 运行可执行文件
+    # 7. 运行可执行文件（或在性能分析器下运行）
     exe_path = get_executable_path(config)
-    return run_executable(exe_path, config.build_type)
+    run_start = time.time()
+    try:
+        if config.profiler:
+            from okcpp.core.profile import profile_executable
+
+            return profile_executable(config, exe_path)
+        return run_executable(exe_path, config.build_type)
+    finally:
+        config.timings.add_phase("run", time.time() - run_start)
+        finish_timings(config, start)
+
+
+def finish_timings(config: BuildConfig, start: float) -> None:
+    """计算总耗时和 ok-cpp 自身开销，写入计时历史，并按需输出报告。
+
+    总耗时从进程启动算起（包括解释器启动和导入），无法获取时从 start 算起。
+
+    Args:
+        config: 构建配置
+        start: build_and_run 开始的时间
+    """
+    timings = config.timings
+    if timings is None or config.build_root is None:
+        return
+
+    uptime = get_process_uptime()
+    total = uptime if uptime is not None else time.time() - start
+    measured = sum(timings.phases.get(phase, 0.0) for phase in ("configure", "build", "run"))
+    timings.add_phase("total", total)
+    timings.add_phase("overhead", max(0.0, total - measured))
+
+    # 与历史记录对比 PCH / unity 构建和链接器的效果，结果同时写入历史
+    messages = []
+    link_units = any(unit.kind == "link" for unit in timings.units)
+    history = load_history(config.build_root) if config.pch or config.unity or link_units else []
+    if config.pch or config.unity:
+        if config.pch:
+            savings = estimate_pch_savings(history, timings)
+            if savings is not None:
+                timings.comparisons["pch_saved_s"] = round(savings.saved, 4)
+                messages.append(savings.describe())
+            elif timings.units:
+                messages.append("PCH savings: build once without --pch to get a baseline")
+        if config.unity:
+            speedup = estimate_unity_speedup(history, timings)
+            if speedup is not None:
+                timings.comparisons["unity_speedup"] = round(speedup.speedup, 4)
+                messages.append(speedup.describe())
+            elif timings.full_build:
+                messages.append("Unity speedup: do a full build without --unity to get a baseline")
+    if link_units:
+        link = compare_link_times(history, timings)
+        if link is not None:
+            timings.comparisons["link_saved_s"] = round(link.saved, 4)
+            # 只在输出计时报告或刚切换链接器时提示
+            if config.timings_format or (history and get_record_linker(history[-1]) != link.linker):
+                messages.append(link.describe())
+
+    try:
+        append_history(config.build_root, timings)
+    except OSError:
+        pass
+    if config.timings_format:
+        try:
+            print_report(timings, config.timings_format, config.timings_out)
+        except OSError as e:
+            err(f"无法写入计时报告 {config.timings_out}: {e}")
+
+    for message in messages:
+        print_blue(message)
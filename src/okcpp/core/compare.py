@@ -0,0 +1,303 @@
+"""A/B performance comparison of two projects or two git revisions of one project.
+
+两个版本都以 Release 方式构建（与 ok-cpp bench 相同的构建流程），然后交替运行
+（A B B A A B ...），使 CPU 频率、温度、后台负载等随时间的漂移对两边的影响相互抵消。
+结果用 Welch t 检验判断差异是否显著，并用自助法给出加速比的置信区间。
+
+比较 git 版本时，每个版本检出到 ${XDG_CACHE_HOME:-~/.cache}/ok-cpp/compare/ 下的
+git worktree 中，worktree 和其中的构建树会保留，再次比较同一版本时只需增量构建。
+"""
+
+import hashlib
+import os
+import shutil
+import subprocess
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from okcpp.core.bench import (
+    RunSample,
+    build_for_bench,
+    format_seconds,
+    print_stats,
+    run_once,
+    summarize,
+)
+from okcpp.core.builder import EXIT_RUN_FAILED, BuildConfig
+from okcpp.core.stats import Comparison, compare_samples
+from okcpp.utils.log import err, info, ok, print_blue, print_purple_b, print_section
+from okcpp.utils.path import get_cache_dir
+
+# 默认每边的计时运行次数和预热次数
+DEFAULT_COMPARE_RUNS = 20
+DEFAULT_COMPARE_WARMUP = 2
+
+# 每个仓库保留的 worktree 数量（按最近使用时间淘汰）
+MAX_WORKTREES = 8
+
+
+class GitError(Exception):
+    """git 命令失败。"""
+
+
+@dataclass
+class CompareSide:
+    """比较的一方。"""
+
+    label: str
+    config: BuildConfig
+    exe_path: Optional[Path] = None
+    samples: List[RunSample] = field(default_factory=list)
+
+
+def _git(repo: Path, *args: str) -> str:
+    """在仓库中运行 git 命令。
+
+    Returns:
+        标准输出（去掉首尾空白）
+
+    Raises:
+        GitError: 命令失败
+    """
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(repo), *args],
+            capture_output=True,
+            text=True,
+        )
+    except OSError as e:
+        raise GitError(f"无法运行 git: {e}") from e
+    if result.returncode != 0:
+        raise GitError(result.stderr.strip() or f"git {' '.join(args)} failed")
+    return result.stdout.strip()
+
+
+def get_git_toplevel(path: Path) -> Optional[Path]:
+    """获取 path 所在 git 仓库的根目录。
+
+    Args:
+        path: 仓库中的任意路径
+
+    Returns:
+        仓库根目录，不在仓库中时返回 None
+    """
+    try:
+        return Path(_git(path, "rev-parse", "--show-toplevel"))
+    except GitError:
+        return None
+
+
+def resolve_revision(repo: Path, revision: str) -> str:
+    """把版本名（分支、标签、HEAD~1 等）解析为提交哈希。
+
+    Args:
+        repo: 仓库根目录
+        revision: 版本名
+
+    Returns:
+        完整的提交哈希
+
+    Raises:
+        GitError: 版本不存在
+    """
+    return _git(repo, "rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}")
+
+
+def get_worktree_root(repo: Path) -> Path:
+    """获取仓库的 worktree 存放目录。
+
+    Args:
+        repo: 仓库根目录
+
+    Returns:
+        ${XDG_CACHE_HOME:-~/.cache}/ok-cpp/compare/<仓库路径哈希>
+    """
+    digest = hashlib.sha1(str(repo.resolve()).encode()).hexdigest()[:16]
+    return get_cache_dir() / "compare" / digest
+
+
+def checkout_revision(repo: Path, commit: str) -> Path:
+    """把提交检出到独立的 worktree（已存在时直接复用）。
+
+    Args:
+        repo: 仓库根目录
+        commit: 提交哈希
+
+    Returns:
+        worktree 目录
+
+    Raises:
+        GitError: 检出失败
+    """
+    worktree = get_worktree_root(repo) / commit[:12]
+    if worktree.is_dir():
+        try:
+            if _git(worktree, "rev-parse", "HEAD") == commit:
+                os.utime(worktree)
+                return worktree
+        except GitError:
+            pass
+        _remove_worktree(repo, worktree)
+
+    worktree.parent.mkdir(parents=True, exist_ok=True)
+    _git(repo, "worktree", "prune")
+    _git(repo, "worktree", "add", "--detach", "--force", str(worktree), commit)
+    _evict_worktrees(repo, keep=worktree)
+    return worktree
+
+
+def _remove_worktree(repo: Path, worktree: Path) -> None:
+    """删除 worktree（包括其中的构建树）。"""
+    try:
+        _git(repo, "worktree", "remove", "--force", str(worktree))
+    except GitError:
+        shutil.rmtree(worktree, ignore_errors=True)
+        try:
+            _git(repo, "worktree", "prune")
+        except GitError:
+            pass
+
+
+def _evict_worktrees(repo: Path, keep: Path) -> None:
+    """只保留最近使用的 MAX_WORKTREES 个 worktree。"""
+    worktrees = sorted(
+        (path for path in get_worktree_root(repo).iterdir() if path.is_dir() and path != keep),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for worktree in worktrees[MAX_WORKTREES - 1:]:
+        _remove_worktree(repo, worktree)
+
+
+def check_outputs(sides: List[CompareSide], program_args: List[str]) -> bool:
+    """运行两边各一次，检查标准输出是否相同。
+
+    Args:
+        sides: 比较的两方（已构建）
+        program_args: 程序参数
+
+    Returns:
+        如果输出相同返回 True
+    """
+    outputs = []
+    for side in sides:
+        result = subprocess.run(
+            [str(side.exe_path)] + program_args,
+            cwd=side.config.project_dir,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        outputs.append(result.stdout)
+
+    if outputs[0] == outputs[1]:
+        ok(f"Outputs are identical ({len(outputs[0])} bytes)")
+        return True
+
+    lines_a = outputs[0].decode(errors="replace").splitlines()
+    lines_b = outputs[1].decode(errors="replace").splitlines()
+    line = next(
+        (i for i, (a, b) in enumerate(zip(lines_a, lines_b)) if a != b),
+        min(len(lines_a), len(lines_b)),
+    )
+    err(f"Outputs differ at line {line + 1}:")
+    for side, lines in zip(sides, (lines_a, lines_b)):
+        text = lines[line] if line < len(lines) else "<end of output>"
+        print(f"  {side.label}: {text}")
+    return False
+
+
+def run_interleaved(sides: List[CompareSide], runs: int, warmup: int,
+                    program_args: List[str]) -> Optional[CompareSide]:
+    """交替运行两边（A B, B A, A B, ...），样本记录在各自的 samples 中。
+
+    Args:
+        sides: 比较的两方（已构建）
+        runs: 每边的计时运行次数
+        warmup: 每边的预热次数
+        program_args: 程序参数
+
+    Returns:
+        运行失败（非零退出码）的一方，全部成功时返回 None
+    """
+    for round_index in range(warmup + runs):
+        order = sides if round_index % 2 == 0 else sides[::-1]
+        for side in order:
+            sample = run_once([str(side.exe_path)] + program_args, cwd=side.config.project_dir)
+            if sample.exit_code != 0:
+                side.samples.append(sample)
+                return side
+            if round_index >= warmup:
+                side.samples.append(sample)
+    return None
+
+
+def compare(sides: List[CompareSide], runs: int = DEFAULT_COMPARE_RUNS,
+            warmup: int = DEFAULT_COMPARE_WARMUP, program_args: Optional[List[str]] = None,
+            check_output: bool = False) -> int:
+    """构建并比较两个版本的运行时间。
+
+    Args:
+        sides: 比较的两方，第一个为基准（A）
+        runs: 每边的计时运行次数（至少 2）
+        warmup: 每边的预热次数
+        program_args: 传给程序的参数
+        check_output: 是否检查两边的标准输出相同
+
+    Returns:
+        退出码
+    """
+    program_args = list(program_args or [])
+    for name, side in zip("AB", sides):
+        print_section(f"Build {name}: {side.label}")
+        side.config.build_type = "Release"
+        side.exe_path = build_for_bench(side.config)
+        if side.exe_path is None:
+            return EXIT_RUN_FAILED
+
+    print_section("Compare")
+    if check_output and not check_outputs(sides, program_args):
+        return 1
+
+    print_purple_b("Running interleaved (A B, B A, ...)")
+    print_blue(f"Warmup: {warmup}, runs: {runs} per side")
+    start = time.time()
+    failed = run_interleaved(sides, runs, warmup, program_args)
+    if failed is not None:
+        err(f"{failed.label}: 程序退出码为 {failed.samples[-1].exit_code}，比较中止")
+        return failed.samples[-1].exit_code or 1
+    print_blue(f"Finished in {time.time() - start:.1f}s")
+
+    report_comparison(sides)
+    return 0
+
+
+def report_comparison(sides: List[CompareSide], names: Tuple[str, str] = ("A", "B")) -> Comparison:
+    """输出两边的统计结果和比较结论。
+
+    Args:
+        sides: 比较的两方（已有样本），第一个为基准
+        names: 两方在结论中的名称
+
+    Returns:
+        Comparison 对象
+    """
+    for name, side in zip(names, sides):
+        print_section(f"{name}: {side.label}")
+        print_stats(summarize(side.samples))
+
+    times_a = [sample.wall_time for sample in sides[0].samples]
+    times_b = [sample.wall_time for sample in sides[1].samples]
+    result = compare_samples(times_a, times_b)
+    print_section("Result")
+    info(f"Median {names[0]} {format_seconds(result.median_a)}, "
+         f"{names[1]} {format_seconds(result.median_b)}")
+    info(f"Welch t-test: t = {result.t:.3f}, df = {result.dof:.1f}, p = {result.p_value:.3g}")
+    describe = result.describe(*names)
+    if result.significant:
+        ok(describe)
+    else:
+        info(describe)
+    return result
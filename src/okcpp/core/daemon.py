@@ -0,0 +1,476 @@
+"""Resident ok-cpp daemon that keeps the interpreter warm.
+
+客户端通过本地 Unix socket 把命令转发给守护进程，并通过 SCM_RIGHTS 传递自身的
+stdin/stdout/stderr。守护进程为每个请求 fork 一个子进程，直接在客户端的终端上
+执行命令，因此输出是实时的，交互（如 GDB）也照常工作。
+
+本模块只依赖标准库，客户端转发路径不会导入 rich。
+"""
+
+import array
+import json
+import os
+import select
+import signal
+import socket
+import stat
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+# 可以转发给守护进程的命令（含别名）
+DAEMON_COMMANDS = ("run", "r", "bench", "b", "compare", "cmp", "sweep", "sw", "mkp", "m", "doctor", "d")
+
+# 默认空闲超时（秒）
+DEFAULT_IDLE_TIMEOUT = 900
+
+# 设置此环境变量可禁止转发
+NO_DAEMON_ENV = "OKCPP_NO_DAEMON"
+
+# 在守护进程的子进程中为 True，防止再次转发
+_in_daemon = False
+
+
+def get_runtime_dir() -> Path:
+    """获取守护进程的运行时目录。
+
+    使用 /tmp 时目录可能被其他用户抢先创建，使用前需经过 is_private_dir 检查。
+
+    Returns:
+        ${XDG_RUNTIME_DIR:-/tmp}/ok-cpp-<uid>
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return Path(base) / f"ok-cpp-{os.getuid()}"
+
+
+def get_socket_path() -> Path:
+    """获取守护进程 socket 路径。"""
+    return get_runtime_dir() / "daemon.sock"
+
+
+def is_private_dir(path: Path) -> bool:
+    """检查目录是否只属于当前用户。
+
+    运行时目录可能位于所有人可写的 /tmp，其他用户可以抢先创建同名目录或 socket，
+    窃取客户端传递的终端和环境变量，因此要求目录不是符号链接、属主是当前用户且权限为 0700。
+
+    Args:
+        path: 目录路径
+
+    Returns:
+        如果目录安全返回 True
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return (
+        stat.S_ISDIR(st.st_mode)
+        and st.st_uid == os.getuid()
+        and stat.S_IMODE(st.st_mode) == 0o700
+    )
+
+
+def ensure_runtime_dir() -> Path:
+    """创建运行时目录并检查其安全性。
+
+    Returns:
+        运行时目录
+
+    Raises:
+        PermissionError: 目录已存在但不属于当前用户、是符号链接或权限不是 0700
+    """
+    runtime_dir = get_runtime_dir()
+    try:
+        os.mkdir(runtime_dir, 0o700)
+    except FileExistsError:
+        pass
+    if not is_private_dir(runtime_dir):
+        raise PermissionError(f"运行时目录不安全（需要属于当前用户且权限为 0700）: {runtime_dir}")
+    return runtime_dir
+
+
+def _is_same_user(sock: socket.socket) -> bool:
+    """通过 SO_PEERCRED 检查 socket 对端是否为当前用户。"""
+    try:
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    except (OSError, AttributeError):
+        return False
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid == os.getuid()
+
+
+def _send_message(sock: socket.socket, message: dict, fds: Optional[List[int]] = None) -> None:
+    """发送一行 JSON 消息，可附带文件描述符。"""
+    data = (json.dumps(message) + "\n").encode()
+    if fds:
+        sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))])
+    else:
+        sock.sendall(data)
+
+
+def _recv_line(sock: socket.socket, buffer: bytearray) -> Optional[dict]:
+    """接收一行 JSON 消息。"""
+    while b"\n" not in buffer:
+        chunk = sock.recv(4096)
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    line, _, rest = bytes(buffer).partition(b"\n")
+    buffer[:] = rest
+    return json.loads(line)
+
+
+def _recv_request(conn: socket.socket) -> tuple:
+    """接收请求消息和附带的文件描述符。"""
+    fds = array.array("i")
+    data = bytearray()
+    while b"\n" not in data:
+        msg, ancdata, _, _ = conn.recvmsg(65536, socket.CMSG_SPACE(3 * fds.itemsize))
+        if not msg:
+            break
+        data.extend(msg)
+        for level, kind, payload in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(payload[: len(payload) - (len(payload) % fds.itemsize)])
+    if b"\n" not in data:
+        return None, list(fds)
+    return json.loads(bytes(data).partition(b"\n")[0]), list(fds)
+
+
+# ---------------------------------------------------------------------------
+# 客户端
+# ---------------------------------------------------------------------------
+
+
+def _connect(timeout: Optional[float] = 1.0) -> Optional[socket.socket]:
+    """连接守护进程，失败返回 None。
+
+    运行时目录不安全或对端不是当前用户时也返回 None（在本地执行），不发送任何数据。
+    """
+    path = get_socket_path()
+    if not is_private_dir(path.parent) or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    if not _is_same_user(sock):
+        sock.close()
+        return None
+    return sock
+
+
+def request(message: dict) -> Optional[dict]:
+    """向守护进程发送控制请求（ping / stop）。
+
+    Args:
+        message: 请求消息
+
+    Returns:
+        响应消息，守护进程不可用时返回 None
+    """
+    sock = _connect(timeout=5)
+    if sock is None:
+        return None
+    try:
+        _send_message(sock, message)
+        return _recv_line(sock, bytearray())
+    except (OSError, ValueError):
+        return None
+    finally:
+        sock.close()
+
+
+def forward_to_daemon(argv: List[str]) -> Optional[int]:
+    """把命令转发给守护进程执行。
+
+    Args:
+        argv: 命令行参数（不含程序名）
+
+    Returns:
+        命令退出码；守护进程未运行或不可用时返回 None，由调用方在本地执行
+    """
+    if _in_daemon or os.environ.get(NO_DAEMON_ENV):
+        return None
+
+    sock = _connect()
+    if sock is None:
+        return None
+
+    try:
+        message = {"type": "run", "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+        _send_message(sock, message, fds=[0, 1, 2])
+        sock.settimeout(None)
+        buffer = bytearray()
+        started = _recv_line(sock, buffer)
+    except (OSError, ValueError):
+        sock.close()
+        return None
+    if not started or "pid" not in started:
+        sock.close()
+        return None
+
+    # 终端信号只会发给客户端，转发给执行命令的子进程所在的进程组
+    child_pid = started["pid"]
+
+    def forward_signal(signum, frame):
+        try:
+            os.killpg(child_pid, signum)
+        except ProcessLookupError:
+            pass
+
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT):
+        signal.signal(sig, forward_signal)
+
+    try:
+        while True:
+            try:
+                result = _recv_line(sock, buffer)
+                break
+            except InterruptedError:
+                continue
+    except (OSError, ValueError):
+        result = None
+    finally:
+        sock.close()
+
+    if not result or "exit" not in result:
+        return 1
+    return int(result["exit"])
+
+
+# ---------------------------------------------------------------------------
+# 服务端
+# ---------------------------------------------------------------------------
+
+
+class DaemonServer:
+    """守护进程服务端。"""
+
+    def __init__(self, idle_timeout: int = DEFAULT_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.socket_path = get_socket_path()
+        self.started_at = time.time()
+        self.last_activity = time.time()
+        self.children = set()
+        self.running = True
+        self._server: Optional[socket.socket] = None
+        self._config_mtime: Optional[float] = None
+
+    def warm_up(self) -> None:
+        """预先导入命令模块、加载配置并探测工具，供 fork 出的子进程复用。"""
+        import okcpp.cli.bench  # noqa: F401
+        import okcpp.cli.compare  # noqa: F401
+        import okcpp.cli.doctor  # noqa: F401
+        import okcpp.cli.mkp  # noqa: F401
+        import okcpp.cli.run  # noqa: F401
+        import okcpp.cli.sweep  # noqa: F401
+        import okcpp.core.watch  # noqa: F401
+        from okcpp.core.detector import run_doctor
+
+        self._refresh_config()
+        run_doctor()
+
+    def _refresh_config(self) -> None:
+        """配置文件变化时重新加载。"""
+        from okcpp.utils.config import get_config, reset_config
+
+        config = get_config()
+        config_file = config._config_file
+        mtime = config_file.stat().st_mtime if config_file.exists() else None
+        if mtime != self._config_mtime:
+            reset_config()
+            get_config()
+            self._config_mtime = mtime
+
+    def bind(self) -> None:
+        """创建并监听 Unix socket。"""
+        ensure_runtime_dir()
+        self.socket_path.unlink(missing_ok=True)
+
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        self._server.listen(16)
+
+    def serve_forever(self) -> None:
+        """监听请求直到空闲超时或收到 stop 请求。"""
+        if self._server is None:
+            self.bind()
+        server = self._server
+
+        try:
+            while self.running:
+                self._reap_children()
+                ready, _, _ = select.select([server], [], [], 1.0)
+                if ready:
+                    conn, _ = server.accept()
+                    if not _is_same_user(conn):
+                        conn.close()
+                        continue
+                    self.last_activity = time.time()
+                    self._handle(conn, server)
+                elif not self.children and time.time() - self.last_activity > self.idle_timeout:
+                    break
+        finally:
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
+
+    def _reap_children(self) -> None:
+        """回收已结束的子进程。"""
+        for pid in list(self.children):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                self.children.discard(pid)
+                self.last_activity = time.time()
+
+    def _handle(self, conn: socket.socket, server: socket.socket) -> None:
+        """处理一个连接。"""
+        try:
+            message, fds = _recv_request(conn)
+        except (OSError, ValueError):
+            conn.close()
+            return
+
+        if message is None:
+            conn.close()
+            return
+
+        kind = message.get("type")
+        if kind == "ping":
+            _send_message(conn, {
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started_at,
+                "active": len(self.children),
+                "idle_timeout": self.idle_timeout,
+            })
+            conn.close()
+        elif kind == "stop":
+            self.running = False
+            _send_message(conn, {"stopped": True})
+            conn.close()
+        elif kind == "run" and len(fds) == 3:
+            self._refresh_config()
+            pid = os.fork()
+            if pid == 0:
+                server.close()
+                self._run_child(conn, message, fds)
+            self.children.add(pid)
+            conn.close()
+        else:
+            conn.close()
+
+        for fd in fds:
+            os.close(fd)
+
+    def _run_child(self, conn: socket.socket, message: dict, fds: List[int]) -> None:
+        """在子进程中执行命令（不返回）。"""
+        global _in_daemon
+        _in_daemon = True
+        code = 1
+        try:
+            # 独立进程组，客户端转发的信号会同时送达被运行的程序（与本地终端行为一致）
+            os.setpgid(0, 0)
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+            os.chdir(message["cwd"])
+            os.environ.clear()
+            os.environ.update(message["env"])
+            for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT):
+                signal.signal(sig, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+
+            from okcpp.utils.log import reset_console
+
+            reset_console()
+            _send_message(conn, {"pid": os.getpid()})
+
+            from okcpp.cli import main
+
+            sys.argv = ["ok-cpp"] + list(message["argv"])
+            try:
+                code = main() or 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except KeyboardInterrupt:
+                code = 130
+        except BaseException:
+            import traceback
+
+            traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                _send_message(conn, {"exit": code})
+            except Exception:
+                pass
+            os._exit(code)
+
+
+def start_daemon(idle_timeout: int = DEFAULT_IDLE_TIMEOUT) -> Optional[int]:
+    """在后台启动守护进程。
+
+    Args:
+        idle_timeout: 空闲超时（秒）
+
+    Returns:
+        守护进程 pid，如果已在运行则返回已有进程的 pid
+
+    Raises:
+        PermissionError: 运行时目录不安全
+    """
+    status = request({"type": "ping"})
+    if status:
+        return status["pid"]
+    ensure_runtime_dir()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid > 0:
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            line = pipe.readline().strip()
+        os.waitpid(pid, 0)
+        return int(line) if line.isdigit() else None
+
+    # 第一个子进程：脱离终端后再次 fork
+    os.close(read_fd)
+    os.setsid()
+    if os.fork() > 0:
+        os._exit(0)
+
+    log_file = get_runtime_dir() / "daemon.log"
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    log_fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_NOFOLLOW, 0o600)
+    os.dup2(devnull, 0)
+    os.dup2(log_fd, 1)
+    os.dup2(log_fd, 2)
+    os.chdir("/")
+
+    server = DaemonServer(idle_timeout=idle_timeout)
+    try:
+        server.warm_up()
+        server.bind()
+    except Exception:
+        import traceback
+
+        traceback.print_exc()
+        os.close(write_fd)
+        os._exit(1)
+    os.write(write_fd, f"{os.getpid()}\n".encode())
+    os.close(write_fd)
+
+    try:
+        server.serve_forever()
+    finally:
+        os._exit(0)
@@ -1,9 +1,15 @@
 """Environment detection for ok-cpp."""
 
+import json
+import os
 import shutil
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from okcpp.utils.path import get_cache_dir
 
 
 @dataclass
@@ -23,6 +29,105 @@ class ToolInfo:
         return f"✘ {self.name}: not found"
 
 
+# 进程内的版本探测缓存：(命令, 解析后的路径, mtime) -> 版本
+_version_cache: Dict[Tuple[str, str, float], Optional[str]] = {}
+
+# 磁盘缓存：所有 ok-cpp 进程共享的版本探测结果
+TOOL_CACHE_FILE = "tools.json"
+
+# 磁盘缓存内容：(探测函数:命令) -> {"path", "mtime", "version"}，首次使用时加载
+_disk_cache: Optional[Dict[str, dict]] = None
+_disk_cache_lock = threading.Lock()
+
+
+def _load_disk_cache() -> Dict[str, dict]:
+    """加载磁盘上的版本缓存（只加载一次）。"""
+    global _disk_cache
+    if _disk_cache is None:
+        try:
+            data = json.loads((get_cache_dir() / TOOL_CACHE_FILE).read_text(encoding="utf-8"))
+            _disk_cache = data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            _disk_cache = {}
+    return _disk_cache
+
+
+def _save_disk_cache() -> None:
+    """把版本缓存写回磁盘（原子替换）。"""
+    cache_file = get_cache_dir() / TOOL_CACHE_FILE
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{TOOL_CACHE_FILE}.{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(_disk_cache, indent=1), encoding="utf-8")
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def clear_version_cache() -> None:
+    """清除内存和磁盘上的版本缓存（ok-cpp doctor --refresh）。"""
+    global _disk_cache
+    with _disk_cache_lock:
+        _version_cache.clear()
+        _disk_cache = {}
+        (get_cache_dir() / TOOL_CACHE_FILE).unlink(missing_ok=True)
+
+
+def _cached_version(command: str, probe: Callable[[str], Optional[str]]) -> Optional[str]:
+    """获取版本信息，同一可执行文件（路径和 mtime 均未变化）只探测一次。
+
+    结果同时缓存在进程内和磁盘上，可执行文件被替换（路径或 mtime 变化）后自动失效。
+
+    Args:
+        command: 命令名称
+        probe: 实际执行探测的函数
+
+    Returns:
+        版本字符串
+    """
+    path = shutil.which(command)
+    if path is None:
+        return probe(command)
+    try:
+        real_path = os.path.realpath(path)
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return probe(command)
+
+    key = (command, real_path, mtime)
+    if key in _version_cache:
+        return _version_cache[key]
+
+    disk_key = f"{probe.__name__}:{command}"
+    with _disk_cache_lock:
+        entry = _load_disk_cache().get(disk_key)
+    if entry and entry.get("path") == real_path and entry.get("mtime") == mtime:
+        version = entry.get("version")
+    else:
+        version = probe(command)
+        with _disk_cache_lock:
+            _load_disk_cache()[disk_key] = {"path": real_path, "mtime": mtime, "version": version}
+            _save_disk_cache()
+
+    _version_cache[key] = version
+    return version
+
+
+def probe_versions(probes: Iterable[Tuple[str, Callable[[str], Optional[str]]]]) -> None:
+    """在线程池中并发探测多个工具的版本，结果写入缓存。
+
+    之后的 check_* 调用直接命中缓存。
+
+    Args:
+        probes: (命令, 探测函数) 列表，未安装的命令会被跳过
+    """
+    probes = [(command, probe) for command, probe in probes if shutil.which(command)]
+    if not probes:
+        return
+    with ThreadPoolExecutor(max_workers=len(probes)) as executor:
+        list(executor.map(lambda item: _cached_version(*item), probes))
+
+
 def check_command(name: str, command: str) -> ToolInfo:
     """检查命令是否存在并获取版本。
 
@@ -37,7 +142,7 @@ def check_command(name: str, command: str) -> ToolInfo:
     if path is None:
         return ToolInfo(name=name, command=command, installed=False)
 
-    version = _get_version(command)
+    version = _cached_version(command, _get_version)
     return ToolInfo(name=name, command=command, installed=True, version=version)
 
 
@@ -94,7 +199,7 @@ def check_compilers() -> list[ToolInfo]:
     for compiler in compilers:
         path = shutil.which(compiler.command)
         if path is not None:
-            version = _get_version(compiler.command)
+            version = _cached_version(compiler.command, _get_version)
             results.append(
                 ToolInfo(name=compiler.name, command=compiler.command, installed=True, version=version)
             )
@@ -115,6 +220,8 @@ def check_build_tools() -> dict[str, ToolInfo]:
     return {
         "cmake": check_command("CMake", "cmake"),
         "ninja": check_command("Ninja", "ninja"),
+        "ccache": check_command("ccache", "ccache"),
+        "sccache": check_command("sccache", "sccache"),
     }
 
 
@@ -126,6 +233,21 @@ def check_debug_tools() -> dict[str, ToolInfo]:
     """
     return {
         "gdb": check_command("GDB", "gdb"),
+        "perf": check_command("perf", "perf"),
+        "gprof": check_command("gprof", "gprof"),
+    }
+
+
+def check_linkers() -> dict[str, ToolInfo]:
+    """检查可选的快速链接器。
+
+    Returns:
+        链接器名称到 ToolInfo 的映射
+    """
+    return {
+        "mold": check_command("mold", "mold"),
+        "lld": check_command("LLD (ld.lld)", "ld.lld"),
+        "gold": check_command("gold (ld.gold)", "ld.gold"),
     }
 
 
@@ -138,7 +260,7 @@ def check_qt() -> ToolInfo:
     # 检查 qmake
     qmake_path = shutil.which("qmake")
     if qmake_path is not None:
-        version = _get_qt_version("qmake")
+        version = _cached_version("qmake", _get_qt_version)
         return ToolInfo(name="Qt (qmake)", command="qmake", installed=True, version=version)
 
     # 检查 qtpaths
@@ -179,15 +301,42 @@ def _get_qt_version(command: str) -> Optional[str]:
     return None
 
 
-def run_doctor() -> dict:
+# run_doctor 探测的所有工具（命令, 探测函数）
+DOCTOR_PROBES = (
+    ("g++", _get_version),
+    ("clang++", _get_version),
+    ("cmake", _get_version),
+    ("ninja", _get_version),
+    ("ccache", _get_version),
+    ("sccache", _get_version),
+    ("gdb", _get_version),
+    ("perf", _get_version),
+    ("gprof", _get_version),
+    ("mold", _get_version),
+    ("ld.lld", _get_version),
+    ("ld.gold", _get_version),
+    ("qmake", _get_qt_version),
+)
+
+
+def run_doctor(refresh: bool = False) -> dict:
     """运行完整的环境检测。
 
+    所有工具的版本探测在线程池中并发执行，结果缓存在磁盘上。
+
+    Args:
+        refresh: 是否忽略缓存重新探测
+
     Returns:
         包含所有检测结果的字典
     """
+    if refresh:
+        clear_version_cache()
+    probe_versions(DOCTOR_PROBES)
     return {
         "compilers": check_compilers(),
         "build_tools": check_build_tools(),
         "debug_tools": check_debug_tools(),
+        "linkers": check_linkers(),
         "qt": check_qt(),
     }
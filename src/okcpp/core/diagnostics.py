@@ -0,0 +1,145 @@
+"""Structured compiler, linker and CMake diagnostics parsed from build output."""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+# GCC / Clang: file:line[:column]: severity: message
+_COMPILER_PATTERN = re.compile(
+    r"^(?P<file>[^\s:][^:]*):(?P<line>\d+):(?:(?P<column>\d+):)?\s*"
+    r"(?P<severity>fatal error|error|warning|note):\s*(?P<message>.*)$"
+)
+
+# CMake: "CMake Error at CMakeLists.txt:12 (add_executable):"（消息在后续缩进行中）
+# 或 "CMake Error: message"
+_CMAKE_PATTERN = re.compile(
+    r"^CMake (?P<severity>Error|Warning)(?: \(dev\))?"
+    r"(?: at (?P<file>.+?):(?P<line>\d+)[^:]*)?:\s*(?P<message>.*)$"
+)
+
+# 链接器自身的消息：/usr/bin/ld: cannot find -lfoo
+_LINKER_PATTERN = re.compile(r"^(?:\S*/)?(?:ld(?:\.\w+)?|ld\.lld|lld|mold):\s*(?P<message>.*)$")
+
+# 链接器引用目标文件中位置的消息：main.cpp:(.text+0x1d): undefined reference to `foo()'
+_LINKER_SECTION_PATTERN = re.compile(r"^(?P<file>[^\s:][^:]*):\(\.[^)]*\):\s*(?P<message>.*)$")
+
+# 链接器给出后续错误所在函数的提示行：/usr/bin/ld: main.cpp.o: in function `main':
+_LINKER_CONTEXT_PATTERN = re.compile(r": in function .*:$")
+
+
+@dataclass
+class Diagnostic:
+    """一条诊断信息。"""
+
+    severity: str  # "error" / "warning" / "note"
+    message: str
+    file: Optional[str] = None
+    line: Optional[int] = None
+    column: Optional[int] = None
+    source: str = "compiler"  # "compiler" / "linker" / "cmake"
+
+    @property
+    def location(self) -> str:
+        """file:line:column 形式的位置（缺失的部分省略）。"""
+        parts = [part for part in (self.file, self.line, self.column) if part is not None]
+        return ":".join(str(part) for part in parts)
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        location = f"{self.location}: " if self.location else ""
+        return f"{location}{self.severity}: {self.message}"
+
+
+class DiagnosticParser:
+    """逐行解析构建输出，收集错误和警告。"""
+
+    def __init__(self):
+        self.diagnostics: List[Diagnostic] = []
+        # 正在收集消息的 CMake 诊断（消息在标题之后的缩进行中）
+        self._cmake: Optional[Diagnostic] = None
+
+    def feed(self, line: str) -> Optional[Diagnostic]:
+        """解析一行输出。
+
+        Args:
+            line: 输出行（不含换行符）
+
+        Returns:
+            新识别出的诊断，没有时返回 None
+        """
+        if self._cmake is not None:
+            # 消息块由缩进行和空行组成，遇到不缩进的行结束
+            if not line.strip():
+                return None
+            if line.startswith("  "):
+                self._cmake.message = f"{self._cmake.message} {line.strip()}".strip()
+                return None
+            self._cmake = None
+
+        match = _COMPILER_PATTERN.match(line)
+        if match:
+            severity = match.group("severity")
+            return self._add(Diagnostic(
+                severity="error" if severity == "fatal error" else severity,
+                message=match.group("message").strip(),
+                file=match.group("file"),
+                line=int(match.group("line")),
+                column=int(match.group("column")) if match.group("column") else None,
+            ))
+
+        match = _CMAKE_PATTERN.match(line)
+        if match:
+            diagnostic = Diagnostic(
+                severity=match.group("severity").lower(),
+                message=match.group("message").strip(),
+                file=match.group("file"),
+                line=int(match.group("line")) if match.group("line") else None,
+                source="cmake",
+            )
+            if not diagnostic.message:
+                self._cmake = diagnostic
+            return self._add(diagnostic)
+
+        match = _LINKER_SECTION_PATTERN.match(line)
+        if match:
+            return self._add(Diagnostic(
+                severity="error",
+                message=match.group("message").strip(),
+                file=match.group("file"),
+                source="linker",
+            ))
+
+        match = _LINKER_PATTERN.match(line)
+        if match:
+            message = match.group("message").strip()
+            if _LINKER_CONTEXT_PATTERN.search(message):
+                severity = "note"
+            elif message.startswith("warning:"):
+                severity, message = "warning", message[len("warning:"):].strip()
+            else:
+                # gold / lld / mold 在消息前加 "error:" 或 "fatal:"
+                severity = "error"
+                message = re.sub(r"^(?:fatal error|error|fatal):\s*", "", message)
+            return self._add(Diagnostic(severity=severity, message=message, source="linker"))
+        return None
+
+    def _add(self, diagnostic: Diagnostic) -> Diagnostic:
+        """记录诊断。"""
+        self.diagnostics.append(diagnostic)
+        return diagnostic
+
+    def count(self, severity: str) -> int:
+        """统计某种级别的诊断数量。"""
+        return sum(1 for diagnostic in self.diagnostics if diagnostic.severity == severity)
+
+    @property
+    def first_error(self) -> Optional[Diagnostic]:
+        """第一条错误（通常是后续错误的根源）。"""
+        return next((d for d in self.diagnostics if d.severity == "error"), None)
+
+    def summary(self) -> str:
+        """返回错误和警告数量的汇总。"""
+        errors = self.count("error")
+        warnings = self.count("warning")
+        return (f"{errors} error{'s' if errors != 1 else ''}, "
+                f"{warnings} warning{'s' if warnings != 1 else ''}")
@@ -0,0 +1,157 @@
+"""Folded call stacks, hot function tables and flame graph SVG rendering.
+
+折叠栈格式与 Brendan Gregg 的 FlameGraph 工具相同：每行 "root;caller;leaf <samples>"，
+可以直接交给 flamegraph.pl / inferno / speedscope 等工具。
+"""
+
+import hashlib
+from dataclasses import dataclass
+from html import escape
+from pathlib import Path
+from typing import Dict, List
+
+# 火焰图尺寸（像素）
+SVG_WIDTH = 1200
+FRAME_HEIGHT = 16
+# 宽度小于该值的帧不绘制
+MIN_FRAME_WIDTH = 0.1
+# 每个字符的近似宽度（12px 等宽字体）
+CHAR_WIDTH = 7.2
+
+
+@dataclass
+class HotFunction:
+    """热点函数：自身采样数（栈顶）和总采样数（出现在栈中）。"""
+
+    name: str
+    self_samples: float
+    total_samples: float
+
+
+def write_folded(stacks: Dict[str, float], path: Path) -> None:
+    """把折叠栈写入文件，采样数最多的排在最前。
+
+    Args:
+        stacks: 折叠栈 -> 采样数
+        path: 输出文件
+    """
+    lines = [
+        f"{stack} {round(count)}"
+        for stack, count in sorted(stacks.items(), key=lambda item: -item[1])
+        if round(count) > 0
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def hot_functions(stacks: Dict[str, float], top: int) -> List[HotFunction]:
+    """按自身采样数统计最热的函数。
+
+    Args:
+        stacks: 折叠栈 -> 采样数
+        top: 返回的函数数量
+
+    Returns:
+        HotFunction 列表，自身采样数从多到少
+    """
+    self_samples: Dict[str, float] = {}
+    total_samples: Dict[str, float] = {}
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_samples[frames[-1]] = self_samples.get(frames[-1], 0.0) + count
+        # 递归函数在同一个栈中只计一次
+        for frame in set(frames):
+            total_samples[frame] = total_samples.get(frame, 0.0) + count
+    ranked = sorted(self_samples.items(), key=lambda item: -item[1])[:top]
+    return [HotFunction(name, count, total_samples[name]) for name, count in ranked]
+
+
+def print_hot_functions(functions: List[HotFunction], total: float, unit: str = "samples") -> None:
+    """打印热点函数表。
+
+    Args:
+        functions: 热点函数列表
+        total: 总采样数
+        unit: 采样数的单位名称
+    """
+    print(f"  {'Self':>7}  {'Total':>7}  {unit.capitalize():>10}  Function")
+    for function in functions:
+        self_pct = function.self_samples / total * 100 if total else 0.0
+        total_pct = function.total_samples / total * 100 if total else 0.0
+        print(f"  {self_pct:>6.1f}%  {total_pct:>6.1f}%  {function.self_samples:>10.0f}  "
+              f"{function.name}")
+
+
+class _Frame:
+    """火焰图中的一个节点。"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.value = 0.0
+        self.children: Dict[str, "_Frame"] = {}
+
+
+def _frame_color(name: str) -> str:
+    """按函数名生成稳定的暖色（同一函数在不同火焰图中颜色相同）。"""
+    digest = hashlib.md5(name.encode()).digest()
+    return f"rgb({205 + digest[0] % 50},{80 + digest[1] % 150},{digest[2] % 60})"
+
+
+def render_flamegraph(stacks: Dict[str, float], title: str, unit: str = "samples") -> str:
+    """把折叠栈渲染为火焰图 SVG（鼠标悬停显示函数名和占比）。
+
+    Args:
+        stacks: 折叠栈 -> 采样数
+        title: 标题
+        unit: 采样数的单位名称
+
+    Returns:
+        SVG 文本
+    """
+    root = _Frame("all")
+    for stack, count in stacks.items():
+        root.value += count
+        node = root
+        for name in stack.split(";"):
+            node = node.children.setdefault(name, _Frame(name))
+            node.value += count
+
+    def depth(node: _Frame) -> int:
+        return 1 + max((depth(child) for child in node.children.values()), default=0)
+
+    levels = depth(root)
+    top_margin = 40
+    height = top_margin + levels * FRAME_HEIGHT + 10
+    scale = (SVG_WIDTH - 20) / root.value if root.value else 0.0
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'viewBox="0 0 {SVG_WIDTH} {height}" font-family="monospace" font-size="12">',
+        f'<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        f'<text x="{SVG_WIDTH / 2}" y="24" text-anchor="middle" font-size="17">{escape(title)}</text>',
+    ]
+
+    def draw(node: _Frame, x: float, level: int) -> None:
+        width = node.value * scale
+        if width < MIN_FRAME_WIDTH:
+            return
+        y = height - 10 - (level + 1) * FRAME_HEIGHT
+        pct = node.value / root.value * 100
+        label = f"{node.name} ({node.value:,.0f} {unit}, {pct:.2f}%)"
+        parts.append(f"<g><title>{escape(label)}</title>")
+        parts.append(
+            f'<rect x="{x:.2f}" y="{y}" width="{width:.2f}" height="{FRAME_HEIGHT - 1}" '
+            f'rx="2" fill="{_frame_color(node.name)}"/>'
+        )
+        chars = int((width - 6) / CHAR_WIDTH)
+        if chars >= 3:
+            text = node.name if len(node.name) <= chars else node.name[:chars - 2] + ".."
+            parts.append(f'<text x="{x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{escape(text)}</text>')
+        parts.append("</g>")
+        for child in sorted(node.children.values(), key=lambda child: child.name):
+            draw(child, x, level + 1)
+            x += child.value * scale
+
+    if root.value:
+        draw(root, 10.0, 0)
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
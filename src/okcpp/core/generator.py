@@ -0,0 +1,86 @@
+"""CMake generator selection, independent of the compiler."""
+
+import re
+import shutil
+from pathlib import Path
+from typing import Optional
+
+from okcpp.utils.log import warn
+
+# 配置值到 CMake 生成器名称的映射，按 auto 模式下的优先级排列
+GENERATORS = {
+    "ninja": "Ninja",
+    "make": "Unix Makefiles",
+}
+
+# 每个生成器需要的构建工具
+_GENERATOR_TOOLS = {
+    "ninja": ("ninja",),
+    "make": ("make", "gmake"),
+}
+
+
+def validate_generator(value: str) -> bool:
+    """验证生成器配置值。
+
+    Args:
+        value: auto / ninja / make
+
+    Returns:
+        如果有效返回 True
+    """
+    return value == "auto" or value in GENERATORS
+
+
+def is_generator_available(name: str) -> bool:
+    """检查生成器所需的构建工具是否存在。
+
+    Args:
+        name: ninja / make
+
+    Returns:
+        如果可用返回 True
+    """
+    return any(shutil.which(tool) is not None for tool in _GENERATOR_TOOLS[name])
+
+
+def resolve_generator(preference: str = "auto") -> str:
+    """根据配置确定使用的 CMake 生成器。
+
+    auto 模式下只要安装了 ninja 就使用 Ninja（无操作构建和增量构建都比 Make 快得多），
+    否则使用 Unix Makefiles。
+
+    Args:
+        preference: auto / ninja / make
+
+    Returns:
+        CMake 生成器名称
+    """
+    if preference in GENERATORS:
+        if is_generator_available(preference):
+            return GENERATORS[preference]
+        fallback = "make" if preference == "ninja" else "ninja"
+        warn(f"生成器 {preference} 所需的构建工具未找到，改用 {fallback}")
+        return GENERATORS[fallback]
+
+    for name, generator in GENERATORS.items():
+        if is_generator_available(name):
+            return generator
+    return GENERATORS["make"]
+
+
+def get_cached_generator(build_dir: Path) -> Optional[str]:
+    """读取构建树 CMakeCache.txt 中记录的生成器。
+
+    Args:
+        build_dir: 构建树
+
+    Returns:
+        生成器名称，构建树尚未配置时返回 None
+    """
+    try:
+        content = (build_dir / "CMakeCache.txt").read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    match = re.search(r"^CMAKE_GENERATOR:INTERNAL=(.*)$", content, re.MULTILINE)
+    return match.group(1).strip() if match else None
@@ -0,0 +1,152 @@
+"""Template instantiation: reflink / hardlink / copy directory trees.
+
+大模板（资源文件、内置 SDK）每次 mkp 都完整复制一遍既慢又占磁盘。这里按以下顺序
+为每个文件选择最便宜的方式：
+
+1. reflink（FICLONE，btrfs / xfs 等支持写时复制的文件系统）：共享数据块，修改时才复制；
+2. hardlink：只用于只读文件（没有任何写权限位），编辑器无法原地修改，不会改动模板；
+3. 普通复制。
+
+之后会被改写的文件（如 CMakeLists.txt）始终是独立的副本。
+"""
+
+import errno
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Collection, Dict, Tuple
+
+try:
+    import fcntl
+except ImportError:  # 非 POSIX 平台
+    fcntl = None
+
+# linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# reflink 不可用时 ioctl 返回的错误码
+_REFLINK_UNSUPPORTED = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS)
+
+# 写权限位
+_WRITE_BITS = 0o222
+
+
+@dataclass
+class InstantiateStats:
+    """一次实例化中各种方式处理的文件数和字节数。"""
+
+    reflinked: int = 0
+    hardlinked: int = 0
+    copied: int = 0
+    bytes: int = 0
+    # (源设备, 目标设备) -> 是否支持 reflink，避免对每个文件重复尝试
+    _reflink_support: Dict[Tuple[int, int], bool] = field(init=False, repr=False, default_factory=dict)
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        total = self.reflinked + self.hardlinked + self.copied
+        parts = [f"{count} {name}" for name, count in (
+            ("reflinked", self.reflinked),
+            ("hardlinked", self.hardlinked),
+            ("copied", self.copied),
+        ) if count]
+        return f"{total} files, {self.bytes / 1024 / 1024:.1f} MB ({', '.join(parts) or 'empty'})"
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """用 FICLONE 创建写时复制的副本。
+
+    Args:
+        src: 源文件
+        dst: 目标文件（不存在）
+
+    Returns:
+        如果成功返回 True；文件系统不支持时返回 False（不会留下目标文件）
+
+    Raises:
+        OSError: 其他错误
+    """
+    if fcntl is None:
+        return False
+    with open(src, "rb") as fsrc:
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            fcntl.ioctl(fd, FICLONE, fsrc.fileno())
+        except OSError as e:
+            os.close(fd)
+            os.unlink(dst)
+            if e.errno in _REFLINK_UNSUPPORTED:
+                return False
+            raise
+        os.close(fd)
+    shutil.copystat(src, dst)
+    return True
+
+
+def instantiate_file(src: str, dst: str, stats: InstantiateStats, private: bool = False) -> None:
+    """用最便宜的可用方式把 src 实例化为 dst。
+
+    Args:
+        src: 源文件
+        dst: 目标文件（不存在）
+        stats: 统计信息（同时记录各设备是否支持 reflink）
+        private: 目标之后会被改写，必须是独立副本（不使用 hardlink）
+    """
+    st = os.stat(src)
+    dst_dev = os.stat(os.path.dirname(dst)).st_dev
+    stats.bytes += st.st_size
+
+    devices = (st.st_dev, dst_dev)
+    if stats._reflink_support.get(devices, True):
+        if _reflink(src, dst):
+            stats._reflink_support[devices] = True
+            stats.reflinked += 1
+            return
+        stats._reflink_support[devices] = False
+
+    if not private and not st.st_mode & _WRITE_BITS and st.st_dev == dst_dev:
+        try:
+            os.link(src, dst)
+            stats.hardlinked += 1
+            return
+        except OSError:
+            pass  # 文件系统不支持或链接数已满
+
+    shutil.copy2(src, dst)
+    stats.copied += 1
+
+
+def instantiate_tree(src_dir: Path, dst_dir: Path, private: Collection[str] = ()) -> InstantiateStats:
+    """把目录树实例化到新位置（行为与 shutil.copytree 相同：跟随符号链接，保留元数据）。
+
+    Args:
+        src_dir: 源目录
+        dst_dir: 目标目录（不存在）
+        private: 之后会被改写、必须独立复制的文件（相对 src_dir 的路径，使用 / 分隔）
+
+    Returns:
+        统计信息
+
+    Raises:
+        OSError: 复制失败
+    """
+    stats = InstantiateStats()
+    private = {Path(path).as_posix() for path in private}
+    _instantiate_dir(str(src_dir), str(dst_dir), "", private, stats)
+    return stats
+
+
+def _instantiate_dir(src: str, dst: str, relative: str, private: set, stats: InstantiateStats) -> None:
+    """递归实例化一个目录。"""
+    os.makedirs(dst)
+    with os.scandir(src) as entries:
+        entries = sorted(entries, key=lambda entry: entry.name)
+    for entry in entries:
+        child_relative = f"{relative}{entry.name}"
+        target = os.path.join(dst, entry.name)
+        if entry.is_dir():
+            _instantiate_dir(entry.path, target, f"{child_relative}/", private, stats)
+        else:
+            instantiate_file(entry.path, target, stats, private=child_relative in private)
+    shutil.copystat(src, dst)
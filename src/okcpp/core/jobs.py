@@ -0,0 +1,119 @@
+"""Parallel job scheduling for ok-cpp builds."""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from okcpp.utils.path import get_cpu_count
+
+# 每个编译任务预留的内存（MB），C++ 模板/Qt 头文件的编译进程通常需要几百 MB
+MEMORY_PER_JOB_MB = 1024
+
+
+@dataclass
+class JobPlan:
+    """并行任务规划结果。"""
+
+    jobs: int
+    source: str  # "cli" / "config" / "auto"
+    reason: str = ""
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        if self.reason:
+            return f"{self.jobs} ({self.source}: {self.reason})"
+        return f"{self.jobs} ({self.source})"
+
+
+def parse_jobs(value: Optional[str]) -> Optional[int]:
+    """解析并行任务数。
+
+    Args:
+        value: 字符串形式的任务数，"auto"、"0" 或空表示自动
+
+    Returns:
+        任务数，自动模式返回 None
+
+    Raises:
+        ValueError: 如果值不是正整数或 auto
+    """
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value in ("", "auto", "0"):
+        return None
+    jobs = int(value)
+    if jobs < 0:
+        raise ValueError(f"Invalid jobs value: {value}")
+    return jobs
+
+
+def get_load_average() -> Optional[float]:
+    """获取 1 分钟平均负载。
+
+    Returns:
+        平均负载，如果无法获取则返回 None
+    """
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def get_available_memory_mb() -> Optional[int]:
+    """从 /proc/meminfo 获取可用内存。
+
+    Returns:
+        可用内存（MB），如果无法获取则返回 None
+    """
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def compute_auto_jobs() -> JobPlan:
+    """根据 CPU 核心数、当前负载和可用内存计算默认并行任务数。
+
+    Returns:
+        JobPlan 对象
+    """
+    cpu_count = get_cpu_count()
+    jobs = cpu_count
+    details = [f"{cpu_count} CPUs"]
+
+    load = get_load_average()
+    if load is not None:
+        details.append(f"load {load:.2f}")
+        # 已被其他进程占用的核心不再分配
+        jobs = min(jobs, max(1, round(cpu_count - load)))
+
+    mem_mb = get_available_memory_mb()
+    if mem_mb is not None:
+        details.append(f"{mem_mb / 1024:.1f} GiB free")
+        jobs = min(jobs, max(1, mem_mb // MEMORY_PER_JOB_MB))
+
+    return JobPlan(jobs=max(1, jobs), source="auto", reason=", ".join(details))
+
+
+def plan_jobs(requested: Optional[int] = None, configured: Optional[int] = None) -> JobPlan:
+    """确定本次构建使用的并行任务数。
+
+    优先级：命令行 > 配置文件 > 自动计算
+
+    Args:
+        requested: 命令行指定的任务数
+        configured: 配置文件中的任务数
+
+    Returns:
+        JobPlan 对象
+    """
+    if requested:
+        return JobPlan(jobs=requested, source="cli")
+    if configured:
+        return JobPlan(jobs=configured, source="config")
+    return compute_auto_jobs()
@@ -0,0 +1,129 @@
+"""Compiler launcher (ccache / sccache) integration."""
+
+import json
+import shutil
+import subprocess
+from dataclasses import dataclass
+from typing import Optional
+
+from okcpp.utils.log import warn
+
+# 支持的编译器缓存工具，按 auto 模式下的优先级排列
+LAUNCHERS = ("ccache", "sccache")
+
+
+@dataclass
+class CacheStats:
+    """编译器缓存命中统计。"""
+
+    hits: int = 0
+    misses: int = 0
+
+    def __sub__(self, other: "CacheStats") -> "CacheStats":
+        """计算两次统计之间的差值。"""
+        return CacheStats(hits=self.hits - other.hits, misses=self.misses - other.misses)
+
+    @property
+    def total(self) -> int:
+        """总请求数。"""
+        return self.hits + self.misses
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        if self.total == 0:
+            return "no cacheable compilations"
+        rate = self.hits / self.total * 100
+        return f"{self.hits}/{self.total} hits ({rate:.1f}%)"
+
+
+def validate_launcher(value: str) -> bool:
+    """验证编译器缓存配置值。
+
+    Args:
+        value: auto / none / ccache / sccache
+
+    Returns:
+        如果有效返回 True
+    """
+    return value in ("auto", "none") + LAUNCHERS
+
+
+def resolve_launcher(preference: str = "auto") -> Optional[str]:
+    """根据配置确定使用的编译器缓存工具。
+
+    Args:
+        preference: auto（自动检测）、none（禁用）或具体工具名
+
+    Returns:
+        工具名称，如果不使用则返回 None
+    """
+    if preference == "none":
+        return None
+
+    if preference == "auto":
+        for launcher in LAUNCHERS:
+            if shutil.which(launcher) is not None:
+                return launcher
+        return None
+
+    if shutil.which(preference) is None:
+        warn(f"编译器缓存 {preference} 未找到，将不使用编译器缓存")
+        return None
+    return preference
+
+
+def get_cache_stats(launcher: str) -> Optional[CacheStats]:
+    """读取编译器缓存的累计统计。
+
+    Args:
+        launcher: ccache 或 sccache
+
+    Returns:
+        CacheStats 对象，如果无法读取则返回 None
+    """
+    try:
+        if launcher == "ccache":
+            return _get_ccache_stats()
+        if launcher == "sccache":
+            return _get_sccache_stats()
+    except (OSError, subprocess.SubprocessError, ValueError, KeyError):
+        pass
+    return None
+
+
+def _get_ccache_stats() -> Optional[CacheStats]:
+    """解析 ccache --print-stats 的输出（ccache 4.x）。"""
+    result = subprocess.run(
+        ["ccache", "--print-stats"],
+        capture_output=True,
+        text=True,
+        timeout=5,
+    )
+    if result.returncode != 0:
+        return None
+
+    counters = {}
+    for line in result.stdout.splitlines():
+        parts = line.split("\t")
+        if len(parts) == 2 and parts[1].strip().isdigit():
+            counters[parts[0].strip()] = int(parts[1])
+
+    hits = counters.get("direct_cache_hit", 0) + counters.get("preprocessed_cache_hit", 0)
+    return CacheStats(hits=hits, misses=counters.get("cache_miss", 0))
+
+
+def _get_sccache_stats() -> Optional[CacheStats]:
+    """解析 sccache --show-stats 的 JSON 输出。"""
+    result = subprocess.run(
+        ["sccache", "--show-stats", "--stats-format", "json"],
+        capture_output=True,
+        text=True,
+        timeout=5,
+    )
+    if result.returncode != 0:
+        return None
+
+    stats = json.loads(result.stdout)["stats"]
+    hits = sum(stats.get("cache_hits", {}).get("counts", {}).values())
+    misses = sum(stats.get("cache_misses", {}).get("counts", {}).values())
+    return CacheStats(hits=hits, misses=misses)
@@ -0,0 +1,271 @@
+"""Linker selection (mold / lld / gold), independent of the compiler."""
+
+import functools
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from okcpp.core.timings import BuildTimings
+from okcpp.utils.log import warn
+
+# 支持的链接器，按 auto 模式下的优先级（链接速度）排列
+LINKERS = ("mold", "lld", "gold")
+
+# 链接器名称到可执行文件的映射
+LINKER_COMMANDS = {
+    "mold": "mold",
+    "lld": "ld.lld",
+    "gold": "ld.gold",
+}
+
+# CMake 3.29 起可以用 CMAKE_LINKER_TYPE 选择链接器，更早的版本使用 -fuse-ld
+CMAKE_LINKER_TYPE_VERSION = (3, 29)
+
+# 构建树中记录链接失败、已回退为默认链接器的标记文件
+LINKER_FALLBACK_FILE = ".okcpp-linker-fallback"
+
+# 链接器本身出错时的输出特征：编译器或 CMake 不支持所选链接器、链接器不支持某个选项、
+# 链接器崩溃。不匹配 Ninja 回显的失败命令（其中含 -fuse-ld）和一般的 "<linker>: error:"，
+# 缺少库等程序本身的错误换链接器也无法解决
+LINKER_FAILURE_PATTERN = re.compile(
+    r"invalid linker name|(?:unrecognized|unknown|unsupported)[^\n]*'?-fuse-ld|"
+    r"LINKER_TYPE[^\n]*(?:unknown|not supported)|cannot find (?:ld|'ld')|"
+    r"(?:mold|ld\.lld|ld\.gold|lld)[^\n]*(?:unknown|unrecognized) (?:command[ -]line )?(?:option|argument)|"
+    r"(?:ld|mold|lld|gold) terminated with signal|linker command failed due to signal|"
+    r"plugin needed to handle lto object"
+)
+PROGRAM_ERROR_PATTERN = re.compile(
+    r"undefined (?:reference|symbol)|multiple definition|duplicate symbol"
+)
+
+
+def validate_linker(value: str) -> bool:
+    """验证链接器配置值。
+
+    Args:
+        value: auto / default / mold / lld / gold
+
+    Returns:
+        如果有效返回 True
+    """
+    return value in ("auto", "default") + LINKERS
+
+
+@functools.lru_cache(maxsize=None)
+def get_cmake_version() -> Optional[Tuple[int, int]]:
+    """获取 CMake 的主、次版本号。
+
+    Returns:
+        (major, minor)，无法获取时返回 None
+    """
+    try:
+        result = subprocess.run(["cmake", "--version"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = re.search(r"cmake version (\d+)\.(\d+)", result.stdout)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+@functools.lru_cache(maxsize=None)
+def _gcc_major() -> Optional[int]:
+    """获取 g++ 的主版本号。"""
+    try:
+        result = subprocess.run(["g++", "-dumpversion"], capture_output=True, text=True, timeout=5)
+        return int(result.stdout.strip().split(".")[0])
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return None
+
+
+def is_linker_compatible(linker: str, compiler: str, lto: bool = False) -> bool:
+    """检查编译器能否使用该链接器。
+
+    gcc 从 12 开始支持 -fuse-ld=mold；LTO 需要链接器能读取编译器的中间表示：
+    gcc 的 LTO 需要 mold 或 gold（链接器插件），clang 的 LTO 只使用 lld。
+
+    Args:
+        linker: mold / lld / gold
+        compiler: gun / clang
+        lto: 是否启用链接时优化
+
+    Returns:
+        如果兼容返回 True
+    """
+    if compiler == "gun":
+        if linker == "mold" and (_gcc_major() or 0) < 12:
+            return False
+        return not lto or linker in ("mold", "gold")
+    return not lto or linker == "lld"
+
+
+def resolve_linker(preference: Optional[str], compiler: str, lto: bool = False) -> Optional[str]:
+    """根据配置确定使用的链接器。
+
+    Args:
+        preference: auto（自动选择最快的可用链接器）、default（系统默认）或具体链接器名
+        compiler: gun / clang
+        lto: 是否启用链接时优化
+
+    Returns:
+        链接器名称，使用系统默认链接器时返回 None
+    """
+    if preference in (None, "default"):
+        return None
+
+    if preference == "auto":
+        for linker in LINKERS:
+            if shutil.which(LINKER_COMMANDS[linker]) and is_linker_compatible(linker, compiler, lto):
+                return linker
+        return None
+
+    if shutil.which(LINKER_COMMANDS[preference]) is None:
+        warn(f"链接器 {preference} 未找到，将使用默认链接器")
+        return None
+    if not is_linker_compatible(preference, compiler, lto):
+        warn(f"链接器 {preference} 不支持当前编译器配置，将使用默认链接器")
+        return None
+    return preference
+
+
+def linker_cmake_args(linker: Optional[str]) -> List[str]:
+    """生成选择链接器的 CMake 参数。
+
+    未使用自定义链接器时也显式重置，避免沿用 CMakeCache 中的旧值。
+
+    Args:
+        linker: 链接器名称，None 表示系统默认
+
+    Returns:
+        CMake 参数列表
+    """
+    version = get_cmake_version()
+    if version is not None and version >= CMAKE_LINKER_TYPE_VERSION:
+        if linker is None:
+            return ["-UCMAKE_LINKER_TYPE"]
+        return [f"-DCMAKE_LINKER_TYPE={linker.upper()}"]
+
+    # 旧版 CMake：把 -fuse-ld 追加到链接选项（保留 LDFLAGS，它原本只在首次配置时生效）
+    flags = os.environ.get("LDFLAGS", "")
+    if linker is not None:
+        flags = f"{flags} -fuse-ld={linker}".strip()
+    return [f"-DCMAKE_{kind}_LINKER_FLAGS={flags}" for kind in ("EXE", "SHARED", "MODULE")]
+
+
+def is_linker_failure(output: List[str]) -> bool:
+    """判断构建失败是否由链接器本身引起（此时回退为默认链接器可能成功）。
+
+    未定义符号等程序本身的错误不算，换链接器也无法解决。
+
+    Args:
+        output: 构建输出行
+
+    Returns:
+        如果是链接器本身的错误返回 True
+    """
+    if any(PROGRAM_ERROR_PATTERN.search(line) for line in output):
+        return False
+    return any(LINKER_FAILURE_PATTERN.search(line) for line in output)
+
+
+def read_linker_fallback(build_dir: Path) -> Optional[str]:
+    """读取构建树中记录的、链接失败过的链接器。
+
+    Args:
+        build_dir: 构建树
+
+    Returns:
+        链接器名称，没有记录时返回 None
+    """
+    try:
+        return (build_dir / LINKER_FALLBACK_FILE).read_text().strip() or None
+    except OSError:
+        return None
+
+
+def write_linker_fallback(build_dir: Path, linker: str) -> None:
+    """记录链接失败的链接器，之后在该构建树中直接使用默认链接器。
+
+    Args:
+        build_dir: 构建树
+        linker: 链接器名称
+    """
+    (build_dir / LINKER_FALLBACK_FILE).write_text(linker + "\n")
+
+
+def get_record_linker(record: BuildTimings) -> str:
+    """获取计时记录使用的链接器。
+
+    Args:
+        record: 计时记录
+
+    Returns:
+        链接器名称，default 表示系统默认链接器
+    """
+    for feature in record.features:
+        if feature.startswith("linker="):
+            return feature.split("=", 1)[1]
+    return "default"
+
+
+@dataclass
+class LinkComparison:
+    """当前链接器与另一个链接器链接相同产物的耗时对比。"""
+
+    linker: str
+    other: str
+    outputs: int
+    time: float  # 当前链接器的链接耗时
+    other_time: float  # 另一个链接器的链接耗时
+
+    @property
+    def saved(self) -> float:
+        """节省的链接时间（负数表示更慢）。"""
+        return self.other_time - self.time
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        ratio = self.other_time / self.time if self.time > 0 else 0.0
+        return (f"Link time: {self.linker} {self.time:.3f}s vs {self.other} {self.other_time:.3f}s "
+                f"over {self.outputs} output(s) ({ratio:.1f}x, saved {self.saved:.3f}s)")
+
+
+def compare_link_times(history: List[BuildTimings], current: BuildTimings) -> Optional[LinkComparison]:
+    """与最近一次使用其他链接器的同配置构建对比链接耗时。
+
+    只比较两次构建中都重新链接过的产物。
+
+    Args:
+        history: 计时历史（不含本次）
+        current: 本次计时记录
+
+    Returns:
+        LinkComparison，没有可比较的数据时返回 None
+    """
+    after = {unit.output: unit.seconds for unit in current.units if unit.kind == "link"}
+    if not after:
+        return None
+
+    linker = get_record_linker(current)
+    for record in reversed(history):
+        if (
+            get_record_linker(record) == linker
+            or record.compiler != current.compiler
+            or record.build_type != current.build_type
+            or record.generator != current.generator
+        ):
+            continue
+        before = {unit.output: unit.seconds for unit in record.units if unit.kind == "link"}
+        common = after.keys() & before.keys()
+        if not common:
+            continue
+        return LinkComparison(
+            linker=linker,
+            other=get_record_linker(record),
+            outputs=len(common),
+            time=sum(after[output] for output in common),
+            other_time=sum(before[output] for output in common),
+        )
+    return None
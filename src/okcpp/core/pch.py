@@ -0,0 +1,178 @@
+"""Opt-in precompiled headers injected without editing the user's CMakeLists.
+
+通过 CMAKE_PROJECT_INCLUDE 注入一个生成的 CMake 脚本：它在 project() 之后被包含，
+并用 cmake_language(DEFER) 推迟到顶层目录处理完毕（所有目标都已定义）后，
+为每个 C++ 目标调用 target_precompile_headers。
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from okcpp.core.timings import BuildTimings
+
+# 生成的 CMake 脚本文件名（位于构建树中）
+PCH_INCLUDE_NAME = "okcpp_pch.cmake"
+
+# 预编译的标准库头文件
+STD_HEADERS = (
+    "algorithm", "array", "chrono", "cmath", "cstddef", "cstdint", "cstdio",
+    "cstdlib", "cstring", "functional", "iostream", "map", "memory", "numeric",
+    "optional", "set", "sstream", "string", "string_view", "tuple",
+    "unordered_map", "unordered_set", "utility", "vector",
+)
+
+# 链接了这些 Qt 模块的目标会额外预编译对应的头文件
+QT_MODULE_HEADERS = (
+    ("Widgets", "QtWidgets"),
+    ("Gui", "QtGui"),
+    ("Core", "QtCore"),
+)
+
+_PCH_SCRIPT = """# Generated by ok-cpp (ok-cpp run --pch). Do not edit.
+if(CMAKE_VERSION VERSION_LESS 3.19)
+    message(WARNING "ok-cpp: --pch requires CMake >= 3.19, skipped")
+    return()
+endif()
+
+get_property(_okcpp_pch_deferred GLOBAL PROPERTY OKCPP_PCH_DEFERRED)
+if(_okcpp_pch_deferred)
+    return()
+endif()
+set_property(GLOBAL PROPERTY OKCPP_PCH_DEFERRED TRUE)
+
+function(_okcpp_collect_targets dir out_var)
+    get_property(_targets DIRECTORY "${{dir}}" PROPERTY BUILDSYSTEM_TARGETS)
+    get_property(_subdirs DIRECTORY "${{dir}}" PROPERTY SUBDIRECTORIES)
+    foreach(_subdir IN LISTS _subdirs)
+        _okcpp_collect_targets("${{_subdir}}" _sub_targets)
+        list(APPEND _targets ${{_sub_targets}})
+    endforeach()
+    set(${{out_var}} ${{_targets}} PARENT_SCOPE)
+endfunction()
+
+function(_okcpp_apply_pch)
+    _okcpp_collect_targets("${{CMAKE_SOURCE_DIR}}" _targets)
+    foreach(_target IN LISTS _targets)
+        get_target_property(_type ${{_target}} TYPE)
+        if(NOT _type MATCHES "^(EXECUTABLE|STATIC_LIBRARY|SHARED_LIBRARY|MODULE_LIBRARY|OBJECT_LIBRARY)$")
+            continue()
+        endif()
+        # 项目自己设置了预编译头时不覆盖
+        get_target_property(_existing ${{_target}} PRECOMPILE_HEADERS)
+        get_target_property(_reuse ${{_target}} PRECOMPILE_HEADERS_REUSE_FROM)
+        if(_existing OR _reuse)
+            continue()
+        endif()
+
+        set(_headers {std_headers})
+        get_target_property(_libs ${{_target}} LINK_LIBRARIES)
+        if(_libs)
+{qt_checks}
+        endif()
+
+        set(_pch "")
+        foreach(_header IN LISTS _headers)
+            list(APPEND _pch "$<$<COMPILE_LANGUAGE:CXX>:<${{_header}}>>")
+        endforeach()
+        target_precompile_headers(${{_target}} PRIVATE ${{_pch}})
+        message(STATUS "ok-cpp: precompiled headers enabled for ${{_target}}")
+    endforeach()
+endfunction()
+
+cmake_language(DEFER DIRECTORY "${{CMAKE_SOURCE_DIR}}" CALL _okcpp_apply_pch)
+"""
+
+_QT_CHECK = """            if(_libs MATCHES "Qt[56]?::{module}")
+                list(APPEND _headers {header})
+            endif()"""
+
+
+@dataclass
+class PchSavings:
+    """预编译头节省的编译时间（基于两次构建中相同编译单元的耗时对比）。"""
+
+    units: int
+    before: float  # 未使用 PCH 时这些编译单元的总耗时
+    after: float  # 使用 PCH 时这些编译单元的总耗时
+    pch_cost: float  # 本次构建生成预编译头的耗时（预编译头未变化时为 0）
+
+    @property
+    def saved(self) -> float:
+        """节省的编译时间（不含预编译头本身的生成时间）。"""
+        return self.before - self.after
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        rate = self.saved / self.before * 100 if self.before > 0 else 0.0
+        text = (f"PCH saved {self.saved:.2f}s over {self.units} translation unit(s) "
+                f"({self.before:.2f}s -> {self.after:.2f}s, {rate:.0f}%)")
+        if self.pch_cost > 0:
+            text += f"; building the header cost {self.pch_cost:.2f}s"
+        return text
+
+
+def generate_pch_script() -> str:
+    """生成注入预编译头的 CMake 脚本内容。
+
+    Returns:
+        CMake 脚本
+    """
+    qt_checks = "\n".join(
+        _QT_CHECK.format(module=module, header=header)
+        for module, header in QT_MODULE_HEADERS
+    )
+    return _PCH_SCRIPT.format(std_headers=" ".join(STD_HEADERS), qt_checks=qt_checks)
+
+
+def write_pch_script(build_dir: Path) -> Path:
+    """在构建树中写入预编译头脚本（内容不变时不重写，避免触发重新配置）。
+
+    Args:
+        build_dir: 构建树
+
+    Returns:
+        脚本路径
+    """
+    script = build_dir / PCH_INCLUDE_NAME
+    content = generate_pch_script()
+    if not script.exists() or script.read_text(encoding="utf-8") != content:
+        script.write_text(content, encoding="utf-8")
+    return script
+
+
+def estimate_pch_savings(history: List[BuildTimings], current: BuildTimings) -> Optional[PchSavings]:
+    """与最近一次未使用 PCH 的同配置构建对比，估算节省的编译时间。
+
+    只比较两次构建中都重新编译过的编译单元。
+
+    Args:
+        history: 计时历史（不含本次）
+        current: 本次（使用 PCH）的计时记录
+
+    Returns:
+        PchSavings，没有可比较的数据时返回 None
+    """
+    after = {unit.output: unit.seconds for unit in current.units if unit.kind == "compile"}
+    if not after:
+        return None
+
+    for record in reversed(history):
+        if (
+            "pch" in record.features
+            or record.compiler != current.compiler
+            or record.build_type != current.build_type
+            or record.generator != current.generator
+        ):
+            continue
+        before = {unit.output: unit.seconds for unit in record.units if unit.kind == "compile"}
+        common = after.keys() & before.keys()
+        if not common:
+            continue
+        return PchSavings(
+            units=len(common),
+            before=sum(before[output] for output in common),
+            after=sum(after[output] for output in common),
+            pch_cost=sum(unit.seconds for unit in current.units if unit.kind == "pch"),
+        )
+    return None
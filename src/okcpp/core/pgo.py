@@ -0,0 +1,346 @@
+"""Two-stage profile-guided optimisation (PGO) pipeline.
+
+流程分为四个阶段，每个阶段的产物都会缓存，只有输入变化的阶段才会重新执行：
+
+1. 插桩构建：-fprofile-generate（gcc）/ -fprofile-instr-generate（clang），
+   构建树 build/<compiler>-PGO-instrumented，增量构建
+2. 训练运行：用训练参数/输入运行插桩程序；插桩程序、训练参数和输入都未变化时跳过
+3. 合并 profile：clang 用 llvm-profdata merge 合并 .profraw；gcc 的 .gcda 与目标文件
+   一一对应，复制到优化构建树的相同位置
+4. 优化构建：-fprofile-use / -fprofile-instr-use 并启用 LTO，构建树
+   build/<compiler>-PGO-optimized；profile 数据变化时删除目标文件强制重新编译
+
+最后与普通 Release 构建交替运行（与 ok-cpp compare 相同），报告 PGO 的加速比。
+使用自定义构建类型 PGO 的原因与 sweep 相同：模板直接设置了 CMAKE_CXX_FLAGS_RELEASE。
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from okcpp.core.bench import build_for_bench
+from okcpp.core.builder import EXIT_RUN_FAILED, BuildConfig
+from okcpp.core.compare import CompareSide, report_comparison, run_interleaved
+from okcpp.utils.log import err, info, ok, print_blue, print_purple_b, print_section, warn
+
+# PGO 各阶段使用的自定义构建类型和基础编译选项（与模板的 Release 相同）
+PGO_BUILD_TYPE = "PGO"
+PGO_BASE_FLAGS = "-O3 -DNDEBUG"
+
+# 各编译器的插桩和使用 profile 的选项
+GCC_GENERATE_FLAGS = "-fprofile-generate -fprofile-update=prefer-atomic"
+GCC_USE_FLAGS = "-fprofile-use -fprofile-correction -Wno-missing-profile"
+CLANG_GENERATE_FLAGS = "-fprofile-instr-generate"
+CLANG_USE_FLAGS = "-Wno-profile-instr-unprofiled -Wno-profile-instr-out-of-date"
+
+# profile 数据目录（位于 build 根目录下，按编译器区分）和其中的文件
+PGO_DIR_NAME = "pgo"
+TRAINING_STAMP_FILE = "training.json"
+MERGED_PROFILE_FILE = "merged.profdata"
+
+# 优化构建树中记录所用 profile 摘要的文件
+PROFILE_DIGEST_FILE = ".okcpp-pgo-profile"
+
+
+class PgoError(Exception):
+    """PGO 流程中的错误。"""
+
+
+def get_profile_dir(config: BuildConfig) -> Path:
+    """获取 profile 数据目录。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        build/pgo/<compiler>
+    """
+    return config.build_root / PGO_DIR_NAME / config.compiler
+
+
+def find_llvm_profdata() -> Optional[str]:
+    """查找 llvm-profdata（优先使用与 clang 主版本号相同的带版本后缀的命令）。
+
+    Returns:
+        命令名，未找到返回 None
+    """
+    try:
+        result = subprocess.run(["clang", "--version"], capture_output=True, text=True)
+        match = re.search(r"clang version (\d+)", result.stdout)
+    except OSError:
+        match = None
+    candidates = ["llvm-profdata"]
+    if match:
+        candidates.insert(0, f"llvm-profdata-{match.group(1)}")
+    return next((name for name in candidates if shutil.which(name)), None)
+
+
+def instrumented_config(base: BuildConfig) -> BuildConfig:
+    """生成插桩构建的配置。"""
+    flags = GCC_GENERATE_FLAGS if base.compiler == "gun" else CLANG_GENERATE_FLAGS
+    return dataclasses.replace(
+        base,
+        build_type=PGO_BUILD_TYPE,
+        variant="instrumented",
+        compile_flags=f"{PGO_BASE_FLAGS} {flags}",
+        link_flags=flags,
+        lto=False,
+        artifact_cache_mb=None,
+    )
+
+
+def optimized_config(base: BuildConfig) -> BuildConfig:
+    """生成使用 profile 并启用 LTO 的优化构建配置。
+
+    目标文件的编译结果取决于 profile 数据，构建树之间共享的产物缓存无法感知，因此关闭。
+    """
+    if base.compiler == "gun":
+        flags = GCC_USE_FLAGS
+    else:
+        profile = get_profile_dir(base) / MERGED_PROFILE_FILE
+        flags = f"-fprofile-instr-use={profile} {CLANG_USE_FLAGS}"
+    return dataclasses.replace(
+        base,
+        build_type=PGO_BUILD_TYPE,
+        variant="optimized",
+        compile_flags=f"{PGO_BASE_FLAGS} {flags}",
+        link_flags=None,
+        lto=True,
+        artifact_cache_mb=None,
+    )
+
+
+def _file_digest(path: Path) -> str:
+    """计算文件内容的 SHA-1。"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _gcda_files(build_dir: Path) -> List[Path]:
+    """列出构建树中的 .gcda 文件（相对路径，已排序）。"""
+    return sorted(path.relative_to(build_dir) for path in build_dir.rglob("*.gcda"))
+
+
+def _clear_profile_data(config: BuildConfig, build_dir: Path, profile_dir: Path) -> None:
+    """删除上一次训练的原始 profile 数据（gcc 会在已有的 .gcda 上累加计数）。"""
+    if config.compiler == "gun":
+        for relative in _gcda_files(build_dir):
+            (build_dir / relative).unlink(missing_ok=True)
+    else:
+        for path in profile_dir.glob("*.profraw"):
+            path.unlink(missing_ok=True)
+
+
+def _has_profile_data(config: BuildConfig, build_dir: Path, profile_dir: Path) -> bool:
+    """检查训练运行是否生成了原始 profile 数据。"""
+    if config.compiler == "gun":
+        return bool(_gcda_files(build_dir))
+    return any(profile_dir.glob("*.profraw"))
+
+
+def _training_key(exe_path: Path, train_args: List[str], train_input: Optional[Path]) -> dict:
+    """训练运行的缓存键：插桩程序、训练参数和训练输入。"""
+    st = exe_path.stat()
+    return {
+        "executable": [str(exe_path), st.st_mtime_ns, st.st_size],
+        "args": train_args,
+        "input": [str(train_input), _file_digest(train_input)] if train_input else None,
+    }
+
+
+def run_training(config: BuildConfig, exe_path: Path, train_args: List[str],
+                 train_input: Optional[Path]) -> bool:
+    """用训练参数和输入运行插桩程序，生成原始 profile 数据。
+
+    Args:
+        config: 插桩构建的配置（已准备）
+        exe_path: 插桩程序
+        train_args: 训练参数
+        train_input: 作为标准输入的训练输入文件（None 表示不提供输入）
+
+    Returns:
+        是否实际运行了训练（False 表示复用了上一次的 profile 数据）
+
+    Raises:
+        PgoError: 训练运行失败或没有生成 profile 数据
+    """
+    profile_dir = get_profile_dir(config)
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    stamp_file = profile_dir / TRAINING_STAMP_FILE
+    key = _training_key(exe_path, train_args, train_input)
+    try:
+        cached = json.loads(stamp_file.read_text(encoding="utf-8")) == key
+    except (OSError, ValueError):
+        cached = False
+    if cached and _has_profile_data(config, config.build_dir, profile_dir):
+        return False
+
+    stamp_file.unlink(missing_ok=True)
+    _clear_profile_data(config, config.build_dir, profile_dir)
+    env = dict(os.environ)
+    env["LLVM_PROFILE_FILE"] = str(profile_dir / "default-%p.profraw")
+
+    print_blue(f"Training: {exe_path} {' '.join(train_args)}".rstrip()
+               + (f" < {train_input}" if train_input else ""))
+    stdin = open(train_input, "rb") if train_input else subprocess.DEVNULL
+    try:
+        result = subprocess.run(
+            [str(exe_path)] + train_args,
+            cwd=config.project_dir,
+            env=env,
+            stdin=stdin,
+            stdout=subprocess.DEVNULL,
+        )
+    finally:
+        if train_input:
+            stdin.close()
+    if result.returncode != 0:
+        raise PgoError(f"训练运行失败，退出码 {result.returncode}")
+    if not _has_profile_data(config, config.build_dir, profile_dir):
+        raise PgoError("训练运行没有生成 profile 数据")
+
+    stamp_file.write_text(json.dumps(key), encoding="utf-8")
+    return True
+
+
+def merge_profiles(config: BuildConfig, trained: bool) -> str:
+    """合并原始 profile 数据，返回 profile 摘要（用于判断优化构建是否需要重新编译）。
+
+    Args:
+        config: 插桩构建的配置（已准备）
+        trained: 本次是否重新运行了训练
+
+    Returns:
+        profile 摘要
+
+    Raises:
+        PgoError: 合并失败
+    """
+    profile_dir = get_profile_dir(config)
+    if config.compiler == "gun":
+        # gcc 没有合并步骤，摘要由所有 .gcda 的路径和内容组成
+        digest = hashlib.sha1()
+        for relative in _gcda_files(config.build_dir):
+            digest.update(str(relative).encode())
+            digest.update(_file_digest(config.build_dir / relative).encode())
+        return digest.hexdigest()
+
+    merged = profile_dir / MERGED_PROFILE_FILE
+    if trained or not merged.exists():
+        profdata = find_llvm_profdata()
+        if profdata is None:
+            raise PgoError("未找到 llvm-profdata，无法合并 clang 的 profile 数据")
+        raw = sorted(str(path) for path in profile_dir.glob("*.profraw"))
+        result = subprocess.run([profdata, "merge", f"-output={merged}"] + raw,
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            merged.unlink(missing_ok=True)
+            raise PgoError(f"llvm-profdata merge 失败: {result.stderr.strip()}")
+        info(f"Merged {len(raw)} profile(s) into {merged}")
+    return _file_digest(merged)
+
+
+def install_profile(source: BuildConfig, target: BuildConfig, digest: str) -> None:
+    """把 profile 数据放入优化构建树；profile 变化时删除目标文件，强制重新编译。
+
+    Args:
+        source: 插桩构建的配置
+        target: 优化构建的配置（已准备）
+        digest: profile 摘要
+    """
+    if source.compiler == "gun":
+        # .gcda 按目标文件的路径查找，两个构建树的布局相同，按相对路径复制即可
+        for path in target.build_dir.rglob("*.gcda"):
+            path.unlink()
+        for relative in _gcda_files(source.build_dir):
+            destination = target.build_dir / relative
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source.build_dir / relative, destination)
+
+    digest_file = target.build_dir / PROFILE_DIGEST_FILE
+    previous = digest_file.read_text().strip() if digest_file.exists() else None
+    if previous != digest:
+        if previous is not None:
+            info("Profile changed, recompiling the optimised build")
+        for path in target.build_dir.rglob("*.o"):
+            path.unlink()
+        digest_file.write_text(digest)
+
+
+def pgo(base: BuildConfig, runs: int, warmup: int, program_args: Optional[List[str]] = None,
+        train_args: Optional[List[str]] = None, train_input: Optional[Path] = None) -> int:
+    """运行 PGO 流程，并与普通 Release 构建比较。
+
+    Args:
+        base: 基础构建配置
+        runs: 比较时每边的计时运行次数（至少 2）
+        warmup: 比较时每边的预热次数
+        program_args: 基准测试时传给程序的参数
+        train_args: 训练运行的参数（None 表示与 program_args 相同）
+        train_input: 训练运行的标准输入文件
+
+    Returns:
+        退出码
+    """
+    program_args = list(program_args or [])
+    train_args = program_args if train_args is None else list(train_args)
+
+    print_section("PGO 1/4: Instrumented build")
+    generate = instrumented_config(base)
+    exe_path = build_for_bench(generate)
+    if exe_path is None:
+        return EXIT_RUN_FAILED
+
+    print_section("PGO 2/4: Training run")
+    try:
+        trained = run_training(generate, exe_path, train_args, train_input)
+        if trained:
+            ok("Training finished")
+        else:
+            info("Instrumented binary and training input unchanged, reusing the profile")
+
+        print_section("PGO 3/4: Merge profiles")
+        digest = merge_profiles(generate, trained)
+        info(f"Profile: {digest[:12]}")
+    except PgoError as e:
+        err(str(e))
+        return EXIT_RUN_FAILED
+
+    print_section("PGO 4/4: Optimised build (profile + LTO)")
+    optimize = optimized_config(base)
+    optimized_exe = build_for_bench(optimize, lambda config: install_profile(generate, config, digest))
+    if optimized_exe is None:
+        return EXIT_RUN_FAILED
+
+    print_section("Baseline: Release build")
+    release = dataclasses.replace(base, build_type="Release", variant=None, compile_flags=None,
+                                  link_flags=None, lto=False)
+    release_exe = build_for_bench(release)
+    if release_exe is None:
+        return EXIT_RUN_FAILED
+
+    sides = [
+        CompareSide(label=str(release_exe), config=release, exe_path=release_exe),
+        CompareSide(label=str(optimized_exe), config=optimize, exe_path=optimized_exe),
+    ]
+    print_section("Compare")
+    print_purple_b("Running interleaved (Release PGO, PGO Release, ...)")
+    print_blue(f"Warmup: {warmup}, runs: {runs} per side")
+    failed = run_interleaved(sides, runs, warmup, program_args)
+    if failed is not None:
+        err(f"{failed.label}: 程序退出码为 {failed.samples[-1].exit_code}，比较中止")
+        return failed.samples[-1].exit_code or 1
+
+    result = report_comparison(sides, ("Release", "PGO"))
+    if result.significant and result.speedup < 1:
+        warn("PGO build is slower: the training input may not be representative of the benchmark")
+    return 0
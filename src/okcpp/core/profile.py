@@ -0,0 +1,447 @@
+"""CPU profiling of the built program with perf, falling back to gprof.
+
+ok-cpp run --profile 以 RelWithDebInfo 方式（-O2、调试符号、保留帧指针）构建项目，然后：
+
+- perf 可用时：在 perf stat 下运行 perf record，程序只运行一次，同时读取 cycles / instructions /
+  cache-misses 等硬件计数器并按帧指针采集调用栈；
+- 否则使用 gprof：以 -pg 插桩构建（独立的构建树），运行后用 gprof 解析 gmon.out，
+  按调用图把每个函数的自身耗时分摊到各条调用路径上（近似的调用栈）。
+
+结果写入构建树下的 profile/ 目录：折叠栈 profile.folded、火焰图 flamegraph.svg，
+并在终端输出热点函数表和硬件计数器。
+"""
+
+import os
+import re
+import shutil
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from okcpp.core.flamegraph import hot_functions, print_hot_functions, render_flamegraph, write_folded
+from okcpp.utils.log import err, print_blue, print_purple_b, print_section, warn
+
+# 支持的性能分析器
+PROFILERS = ("perf", "gprof")
+
+# 性能分析使用的构建类型和编译选项（优化 + 调试符号 + 帧指针，便于回溯调用栈）
+PROFILE_BUILD_TYPE = "RelWithDebInfo"
+PROFILE_FLAGS = "-O2 -g -DNDEBUG -fno-omit-frame-pointer"
+# gprof 插桩选项（编译和链接都需要）
+GPROF_FLAGS = "-pg"
+
+# 输出目录（位于构建树下）
+PROFILE_DIR_NAME = "profile"
+
+# 热点函数表的行数
+PROFILE_TOP = 15
+
+# perf record 采样频率（Hz）
+PERF_FREQUENCY = 999
+
+# perf stat 读取的硬件计数器
+PERF_EVENTS = ("cycles", "instructions", "cache-references", "cache-misses",
+               "branches", "branch-misses")
+
+# gprof 每个采样代表的时间（秒），用于把耗时换算为采样数
+_GPROF_SAMPLE_SECONDS = 0.01
+
+# 分摊 gprof 调用路径时忽略的占比和最大深度
+_GPROF_MIN_FRACTION = 0.001
+_GPROF_MAX_DEPTH = 64
+
+# perf script 中的栈帧：地址 符号+偏移 (模块)
+_PERF_FRAME = re.compile(r"^\s+[0-9a-f]+\s+(?P<symbol>.*?)\s+\((?P<module>[^)]*)\)\s*$")
+
+# gprof 平面分析中的一行：% time, cumulative, self [, calls, self/call, total/call] name
+_GPROF_FLAT_LINE = re.compile(
+    r"^\s*[\d.]+\s+[\d.]+\s+(?P<self>[\d.]+)\s+(?:\d+\s+[\d.]+\s+[\d.]+\s+)?(?P<name>\S.*)$"
+)
+
+# gprof 调用图中的函数名和序号：name [N]
+_GPROF_NAME = re.compile(r"^(?P<name>.*?)\s+\[\d+\]$")
+
+
+@dataclass
+class CounterReport:
+    """perf stat 读取的硬件计数器。"""
+
+    counters: Dict[str, float]
+
+    @property
+    def ipc(self) -> Optional[float]:
+        """每周期指令数。"""
+        cycles = self.counters.get("cycles")
+        instructions = self.counters.get("instructions")
+        if not cycles or instructions is None:
+            return None
+        return instructions / cycles
+
+    def _ratio(self, part: str, whole: str) -> Optional[float]:
+        """两个计数器的百分比。"""
+        if not self.counters.get(whole) or part not in self.counters:
+            return None
+        return self.counters[part] / self.counters[whole] * 100
+
+    def print(self) -> None:
+        """输出计数器和派生指标。"""
+        for event in PERF_EVENTS:
+            value = self.counters.get(event)
+            print(f"  {event:<18} {'not supported' if value is None else f'{value:,.0f}'}")
+        derived = [
+            ("IPC", self.ipc, "{:.2f}"),
+            ("cache miss rate", self._ratio("cache-misses", "cache-references"), "{:.2f}%"),
+            ("branch miss rate", self._ratio("branch-misses", "branches"), "{:.2f}%"),
+        ]
+        for name, value, fmt in derived:
+            if value is not None:
+                print(f"  {name:<18} {fmt.format(value)}")
+
+
+def can_use_perf() -> bool:
+    """判断 perf 是否可用（已安装，且当前用户可以采集用户态事件）。
+
+    Returns:
+        如果可以使用 perf 返回 True
+    """
+    if shutil.which("perf") is None:
+        return False
+    if os.geteuid() == 0:
+        return True
+    try:
+        paranoid = int(Path("/proc/sys/kernel/perf_event_paranoid").read_text().strip())
+    except (OSError, ValueError):
+        return True
+    # > 2（部分发行版的 3）禁止普通用户使用 perf_event_open
+    return paranoid <= 2
+
+
+def resolve_profiler(name: Optional[str] = None) -> Optional[str]:
+    """确定使用的性能分析器。
+
+    Args:
+        name: 指定的分析器（perf / gprof），None 表示自动选择
+
+    Returns:
+        分析器名称，不可用时返回 None
+    """
+    if name == "perf":
+        return "perf" if can_use_perf() else None
+    if name == "gprof":
+        return "gprof" if shutil.which("gprof") else None
+    if can_use_perf():
+        return "perf"
+    if shutil.which("gprof"):
+        return "gprof"
+    return None
+
+
+def configure_profile_build(config, profiler: str) -> None:
+    """把构建配置设置为性能分析构建。
+
+    Args:
+        config: 构建配置（BuildConfig）
+        profiler: 分析器名称
+    """
+    config.build_type = PROFILE_BUILD_TYPE
+    config.profiler = profiler
+    config.compile_flags = PROFILE_FLAGS
+    if profiler == "gprof":
+        # 插桩后的目标文件和普通构建不能共用，使用独立的构建树
+        config.variant = "gprof"
+        config.compile_flags = f"{PROFILE_FLAGS} {GPROF_FLAGS}"
+        config.link_flags = GPROF_FLAGS
+
+
+def parse_perf_script(output: str, root: str) -> Dict[str, float]:
+    """把 perf script 的输出折叠为调用栈。
+
+    Args:
+        output: perf script 输出
+        root: 栈底名称（程序名）
+
+    Returns:
+        折叠栈 -> 采样数
+    """
+    stacks: Dict[str, float] = {}
+    frames: List[str] = []
+
+    def flush() -> None:
+        if frames:
+            stack = ";".join([root] + frames[::-1])
+            stacks[stack] = stacks.get(stack, 0.0) + 1
+            frames.clear()
+
+    for line in output.splitlines():
+        if not line.strip():
+            flush()
+            continue
+        match = _PERF_FRAME.match(line)
+        if match is None:
+            # 样本头（comm pid time event），开始新的调用栈
+            flush()
+            continue
+        symbol = re.sub(r"\+0x[0-9a-f]+$", "", match.group("symbol"))
+        if symbol == "[unknown]":
+            symbol = f"[{Path(match.group('module')).name or 'unknown'}]"
+        # 折叠格式用 ; 分隔栈帧
+        frames.append(symbol.replace(";", ":"))
+    flush()
+    return stacks
+
+
+def parse_perf_stat(output: str) -> CounterReport:
+    """解析 perf stat -x, 的输出。
+
+    Args:
+        output: perf stat 输出（CSV）
+
+    Returns:
+        CounterReport，不支持的计数器不包含在内
+    """
+    counters = {}
+    for line in output.splitlines():
+        fields = line.split(",")
+        if len(fields) < 3 or line.startswith("#"):
+            continue
+        # 事件名可能带有 :u 等修饰符
+        event = fields[2].split(":")[0]
+        try:
+            counters[event] = float(fields[0])
+        except ValueError:
+            continue  # <not supported> / <not counted>
+    return CounterReport(counters)
+
+
+def parse_gprof_flat(output: str) -> Dict[str, float]:
+    """解析 gprof -p 的平面分析。
+
+    Args:
+        output: gprof 输出
+
+    Returns:
+        函数名 -> 自身耗时（秒）
+    """
+    self_time = {}
+    for line in output.splitlines():
+        match = _GPROF_FLAT_LINE.match(line)
+        if match:
+            self_time[match.group("name").strip()] = float(match.group("self"))
+    return self_time
+
+
+def parse_gprof_callers(output: str) -> Dict[str, Dict[str, int]]:
+    """解析 gprof -q 的调用图。
+
+    Args:
+        output: gprof 输出
+
+    Returns:
+        函数名 -> {调用者: 调用次数}
+    """
+    callers: Dict[str, Dict[str, int]] = {}
+    for entry in output.split("-----------------------------------------------"):
+        parents: List[Tuple[str, int]] = []
+        for line in entry.splitlines():
+            if not line.strip() or line.lstrip().startswith("<spontaneous>"):
+                continue
+            if line.startswith("["):
+                # 主行：[N] %time self children called name [N]
+                name = _gprof_line_name(line.split("]", 1)[1])
+                if name is not None:
+                    callers[name] = {parent: calls for parent, calls in parents}
+                break
+            fields = line.split()
+            name = _gprof_line_name(line)
+            calls = next((field for field in fields if re.fullmatch(r"\d+(/\d+)?", field)), None)
+            if name is not None and calls is not None:
+                parents.append((name, int(calls.split("/")[0])))
+    return callers
+
+
+def _gprof_line_name(line: str) -> Optional[str]:
+    """从调用图的一行中取出函数名（去掉调用次数等数值列和序号）。"""
+    match = _GPROF_NAME.match(line.strip())
+    if match is None:
+        return None
+    fields = match.group("name").split()
+    while fields and re.fullmatch(r"[\d.]+(/\d+)?(\+\d+)?", fields[0]):
+        fields.pop(0)
+    return " ".join(fields) or None
+
+
+def fold_gprof(self_time: Dict[str, float], callers: Dict[str, Dict[str, int]],
+               root: str) -> Dict[str, float]:
+    """把 gprof 的自身耗时按调用次数分摊到各条调用路径，得到近似的折叠栈。
+
+    Args:
+        self_time: 函数名 -> 自身耗时（秒）
+        callers: 函数名 -> {调用者: 调用次数}
+        root: 栈底名称（程序名）
+
+    Returns:
+        折叠栈 -> 采样数
+    """
+
+    def paths(name: str, seen: Tuple[str, ...]) -> List[Tuple[List[str], float]]:
+        parents = {
+            parent: calls for parent, calls in callers.get(name, {}).items()
+            if parent not in seen and parent != name
+        }
+        total = sum(parents.values())
+        if not total or len(seen) >= _GPROF_MAX_DEPTH:
+            return [([name], 1.0)]
+        result = []
+        for parent, calls in parents.items():
+            for path, fraction in paths(parent, seen + (name,)):
+                share = fraction * calls / total
+                if share >= _GPROF_MIN_FRACTION:
+                    result.append((path + [name], share))
+        return result or [([name], 1.0)]
+
+    stacks: Dict[str, float] = {}
+    for name, seconds in self_time.items():
+        samples = seconds / _GPROF_SAMPLE_SECONDS
+        if samples <= 0:
+            continue
+        for path, fraction in paths(name, ()):
+            stack = ";".join([root] + [frame.replace(";", ":") for frame in path])
+            stacks[stack] = stacks.get(stack, 0.0) + samples * fraction
+    return stacks
+
+
+def _run_perf(exe_path: Path, output_dir: Path, cwd: Path) -> Tuple[int, Dict[str, float], Optional[CounterReport]]:
+    """在 perf stat 下运行 perf record，一次运行同时得到硬件计数器和调用栈采样。
+
+    程序只运行一次（可能有副作用或需要交互输入），继承终端的 stdin/stdout。
+    计数器包含 perf record 自身的少量开销。
+
+    Returns:
+        (程序退出码, 折叠栈, 硬件计数器)
+    """
+    stat_file = output_dir / "perf-stat.csv"
+    data_file = output_dir / "perf.data"
+    stat_file.unlink(missing_ok=True)
+    data_file.unlink(missing_ok=True)
+
+    print_purple_b("[3/3] Run Executable (perf)")
+    print_blue(f"Counting {', '.join(PERF_EVENTS)} and sampling call stacks "
+               f"(perf record -F {PERF_FREQUENCY} --call-graph fp)")
+    print("=" * 70)
+    result = subprocess.run(
+        ["perf", "stat", "-x", ",", "-o", str(stat_file), "-e", ",".join(PERF_EVENTS), "--",
+         "perf", "record", "-q", "-F", str(PERF_FREQUENCY), "--call-graph", "fp",
+         "-o", str(data_file), "--", str(exe_path)],
+        cwd=cwd,
+    )
+    print("=" * 70)
+    counters = None
+    try:
+        counters = parse_perf_stat(stat_file.read_text(encoding="utf-8", errors="replace"))
+    except OSError:
+        warn("perf stat 没有输出计数器")
+
+    if not data_file.exists():
+        warn(f"perf record 失败 (exit {result.returncode})")
+        return result.returncode, {}, counters
+
+    script = subprocess.run(
+        ["perf", "script", "-i", str(data_file)],
+        capture_output=True,
+        text=True,
+        errors="replace",
+    )
+    return result.returncode, parse_perf_script(script.stdout, exe_path.name), counters
+
+
+def _run_gprof(exe_path: Path, output_dir: Path, cwd: Path) -> Tuple[int, Dict[str, float]]:
+    """运行 -pg 插桩的程序并用 gprof 分析。
+
+    Returns:
+        (程序退出码, 折叠栈)
+    """
+    for old in output_dir.glob("gmon.out*"):
+        old.unlink()
+    env = os.environ.copy()
+    # gmon.out 写入 <output_dir>/gmon.out.<pid>，而不是程序的工作目录
+    env["GMON_OUT_PREFIX"] = str(output_dir / "gmon.out")
+
+    print_purple_b("[3/3] Run Executable (gprof)")
+    print("=" * 70)
+    result = subprocess.run([str(exe_path)], cwd=cwd, env=env)
+    print("=" * 70)
+
+    gmon_files = sorted(output_dir.glob("gmon.out.*"), key=lambda path: path.stat().st_mtime)
+    if not gmon_files:
+        warn("程序没有生成 gmon.out（可能被信号终止或调用了 _exit）")
+        return result.returncode, {}
+
+    def gprof(mode: str) -> str:
+        return subprocess.run(
+            ["gprof", "-b", mode, str(exe_path), str(gmon_files[-1])],
+            capture_output=True,
+            text=True,
+            errors="replace",
+        ).stdout
+
+    self_time = parse_gprof_flat(gprof("-p"))
+    callers = parse_gprof_callers(gprof("-q"))
+    return result.returncode, fold_gprof(self_time, callers, exe_path.name)
+
+
+def profile_executable(config, exe_path: Path) -> int:
+    """在性能分析器下运行程序并输出报告。
+
+    Args:
+        config: 构建配置（BuildConfig）
+        exe_path: 可执行文件路径
+
+    Returns:
+        程序的退出码
+    """
+    from okcpp.core.builder import EXIT_RUN_FAILED
+
+    if not exe_path.exists():
+        err(f"未找到可执行文件: {exe_path}")
+        return EXIT_RUN_FAILED
+
+    output_dir = config.build_dir / PROFILE_DIR_NAME
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    counters = None
+    if config.profiler == "perf":
+        returncode, stacks, counters = _run_perf(exe_path, output_dir, config.project_dir)
+        unit = "samples"
+    else:
+        returncode, stacks = _run_gprof(exe_path, output_dir, config.project_dir)
+        unit = "10ms ticks"
+
+    print_section(f"Profile ({config.profiler})")
+    total = sum(stacks.values())
+    if total:
+        print_blue(f"Hot functions (top {PROFILE_TOP} by self time, {total:,.0f} {unit}):")
+        print_hot_functions(hot_functions(stacks, PROFILE_TOP), total, unit)
+    else:
+        warn("没有采集到样本（程序运行时间太短？）")
+
+    if counters is not None:
+        print()
+        print_blue("Hardware counters:")
+        counters.print()
+    elif config.profiler == "gprof":
+        print_blue("Hardware counters: unavailable without perf")
+
+    if total:
+        folded_file = output_dir / "profile.folded"
+        svg_file = output_dir / "flamegraph.svg"
+        write_folded(stacks, folded_file)
+        title = f"{exe_path.name} ({config.profiler}"
+        title += ", call paths approximated from the call graph)" if config.profiler == "gprof" else ")"
+        svg_file.write_text(render_flamegraph(stacks, title, unit), encoding="utf-8")
+        print()
+        print_blue(f"Folded stacks: {folded_file}")
+        print_blue(f"Flame graph:   {svg_file}")
+
+    # 与 shell 一致：被信号终止的程序返回 128 + 信号编号
+    return 128 - returncode if returncode < 0 else returncode
@@ -0,0 +1,204 @@
+"""Persistent index of CMake projects under a workspace root.
+
+索引按工作区根目录保存在 ${XDG_CACHE_HOME:-~/.cache}/ok-cpp/projects/ 下，
+记录每个已遍历目录的 mtime 和子目录列表。目录的 mtime 只在其直接条目增删改名时
+变化，因此未变化的目录无需重新列出，只需一次 stat；CMakeLists.txt 的 project()
+名称按文件 mtime 缓存。
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from okcpp.utils.path import get_cache_dir
+
+# 索引格式版本，格式变化时递增以丢弃旧索引
+INDEX_VERSION = 1
+
+
+@dataclass
+class ProjectEntry:
+    """索引中的一个项目。"""
+
+    path: Path
+    cmake_name: Optional[str] = None
+
+
+def get_index_file(root: Path) -> Path:
+    """获取工作区根目录对应的索引文件。
+
+    Args:
+        root: 工作区根目录（绝对路径）
+
+    Returns:
+        索引文件路径
+    """
+    digest = hashlib.sha1(str(root).encode()).hexdigest()[:16]
+    return get_cache_dir() / "projects" / f"{root.name or 'root'}-{digest}.json"
+
+
+class ProjectIndex:
+    """工作区根目录下 CMake 项目的持久化索引。"""
+
+    def __init__(self, root: Path, max_depth: int):
+        self.root = root
+        self.max_depth = max_depth
+        self.index_file = get_index_file(root)
+        self._dirs: Dict[str, dict] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self) -> None:
+        """读取已有索引（格式或参数不匹配时丢弃）。"""
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if (
+            data.get("version") == INDEX_VERSION
+            and data.get("root") == str(self.root)
+            and data.get("max_depth") == self.max_depth
+        ):
+            self._dirs = data.get("dirs", {})
+
+    def save(self) -> None:
+        """索引有变化时写回磁盘（原子替换）。"""
+        if not self._dirty:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "root": str(self.root),
+            "max_depth": self.max_depth,
+            "dirs": self._dirs,
+        }
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_name(f"{self.index_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _scan_dir(self, rel: str, path: Path, mtime: int, depth: int) -> dict:
+        """重新列出目录内容并生成索引条目。"""
+        from okcpp.core.builder import _is_build_tree
+
+        subdirs = []
+        has_cmake = False
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.name == "CMakeLists.txt" and entry.is_file():
+                        has_cmake = True
+                    elif (
+                        depth < self.max_depth
+                        and not entry.name.startswith(".")
+                        and entry.is_dir(follow_symlinks=False)
+                        and not _is_build_tree(Path(entry.path))
+                    ):
+                        subdirs.append(entry.name)
+        except OSError:
+            pass
+
+        old = self._dirs.get(rel, {})
+        return {
+            "mtime": mtime,
+            "subdirs": sorted(subdirs),
+            "cmake": has_cmake,
+            "cmake_mtime": old.get("cmake_mtime"),
+            "cmake_name": old.get("cmake_name"),
+        }
+
+    def _refresh_cmake_name(self, entry: dict, path: Path) -> None:
+        """CMakeLists.txt 变化时重新解析 project() 名称。"""
+        from okcpp.core.builder import get_cmake_project_name
+
+        try:
+            mtime = (path / "CMakeLists.txt").stat().st_mtime_ns
+        except OSError:
+            entry["cmake"] = False
+            return
+        if entry.get("cmake_mtime") != mtime:
+            entry["cmake_mtime"] = mtime
+            entry["cmake_name"] = get_cmake_project_name(path)
+            self._dirty = True
+
+    def refresh(self) -> List[ProjectEntry]:
+        """增量更新索引。
+
+        只重新列出 mtime 发生变化的目录，已删除的目录从索引中移除。
+
+        Returns:
+            所有项目（按路径排序）
+        """
+        seen: Dict[str, dict] = {}
+        projects = []
+        stack = [("", self.root, 1)]
+        while stack:
+            rel, path, depth = stack.pop()
+            try:
+                mtime = path.stat().st_mtime_ns
+            except OSError:
+                continue
+
+            entry = self._dirs.get(rel)
+            if entry is None or entry.get("mtime") != mtime:
+                # 已存在的子目录中新生成了 CMakeCache.txt 时，该目录也会在这里被重新列出
+                if rel and (path / "CMakeCache.txt").exists():
+                    continue
+                entry = self._scan_dir(rel, path, mtime, depth)
+                self._dirty = True
+            seen[rel] = entry
+
+            if entry["cmake"]:
+                self._refresh_cmake_name(entry, path)
+                if entry["cmake"]:
+                    projects.append(ProjectEntry(path=path, cmake_name=entry.get("cmake_name")))
+
+            for name in reversed(entry["subdirs"]):
+                child_rel = f"{rel}/{name}" if rel else name
+                stack.append((child_rel, path / name, depth + 1))
+
+        if seen.keys() != self._dirs.keys():
+            self._dirty = True
+        self._dirs = seen
+        return sorted(projects, key=lambda project: project.path)
+
+    def find(self, name: str) -> List[Path]:
+        """按目录名或 CMake project() 名称查找项目。
+
+        目录名匹配优先于 project() 名称匹配。
+
+        Args:
+            name: 目录名或项目名
+
+        Returns:
+            匹配的项目目录列表
+        """
+        projects = self.refresh()
+        by_dir = [project.path for project in projects if project.path.name == name]
+        if by_dir:
+            return by_dir
+        return [project.path for project in projects if project.cmake_name == name]
+
+
+def find_projects(root: Path, name: str, max_depth: int) -> List[Path]:
+    """使用持久化索引在 root 下查找项目。
+
+    Args:
+        root: 工作区根目录
+        name: 目录名或 CMake 项目名
+        max_depth: 最大搜索深度
+
+    Returns:
+        匹配的项目目录列表
+    """
+    index = ProjectIndex(root.resolve(), max_depth)
+    try:
+        return index.find(name)
+    finally:
+        index.save()
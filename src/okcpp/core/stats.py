@@ -0,0 +1,194 @@
+"""Statistics for comparing two sets of timings: Welch's t-test and bootstrap intervals.
+
+只依赖标准库：t 分布的尾概率由正则化不完全 Beta 函数（连分式展开）计算。
+"""
+
+import math
+import random
+import statistics
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+# 自助法重抽样次数
+BOOTSTRAP_RESAMPLES = 2000
+
+# 固定随机种子，使同一组数据的置信区间可复现
+BOOTSTRAP_SEED = 0x0C99
+
+# 显著性水平
+DEFAULT_ALPHA = 0.05
+
+
+@dataclass
+class Comparison:
+    """两组耗时（A 为基准，B 为对比对象）的比较结果。"""
+
+    median_a: float
+    median_b: float
+    # A / B 的中位数之比，大于 1 表示 B 更快
+    speedup: float
+    ci_low: float
+    ci_high: float
+    # Welch t 检验
+    t: float
+    dof: float
+    p_value: float
+    confidence: float = 1 - DEFAULT_ALPHA
+
+    @property
+    def significant(self) -> bool:
+        """差异是否显著（p 值小于显著性水平，且置信区间不包含 1）。"""
+        alpha = 1 - self.confidence
+        return self.p_value < alpha and not self.ci_low <= 1.0 <= self.ci_high
+
+    def describe(self, name_a: str = "A", name_b: str = "B") -> str:
+        """返回结论描述。"""
+        interval = f"{self.confidence * 100:.0f}% CI {self.ci_low:.3f}x - {self.ci_high:.3f}x"
+        summary = f"{name_b} vs {name_a}: {self.speedup:.3f}x ({interval}), p = {self.p_value:.2g}"
+        if not self.significant:
+            return f"{summary}: no significant difference"
+        faster, slower = (name_b, name_a) if self.speedup > 1 else (name_a, name_b)
+        ratio = self.speedup if self.speedup > 1 else 1 / self.speedup
+        return (f"{summary}: {faster} is faster than {slower} "
+                f"({ratio:.3f}x, {(1 - 1 / ratio) * 100:.1f}% less time)")
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """不完全 Beta 函数的连分式（Lentz 算法）。"""
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        for numerator in (
+            m * (b - m) * x / ((a + m2 - 1) * (a + m2)),
+            -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1)),
+        ):
+            d = 1.0 + numerator * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + numerator / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def regularized_beta(a: float, b: float, x: float) -> float:
+    """正则化不完全 Beta 函数 I_x(a, b)。
+
+    Args:
+        a: 参数 a（> 0）
+        b: 参数 b（> 0）
+        x: 0 到 1 之间的值
+
+    Returns:
+        I_x(a, b)
+    """
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    log_front = (math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                 + a * math.log(x) + b * math.log1p(-x))
+    if x < (a + 1) / (a + b + 2):
+        return math.exp(log_front) * _betacf(a, b, x) / a
+    return 1.0 - math.exp(log_front) * _betacf(b, a, 1 - x) / b
+
+
+def student_t_two_sided_p(t: float, dof: float) -> float:
+    """t 分布的双侧 p 值。
+
+    Args:
+        t: t 统计量
+        dof: 自由度
+
+    Returns:
+        P(|T| >= |t|)
+    """
+    if math.isinf(t):
+        return 0.0
+    return regularized_beta(dof / 2, 0.5, dof / (dof + t * t))
+
+
+def welch_t_test(a: Sequence[float], b: Sequence[float]) -> Tuple[float, float, float]:
+    """Welch t 检验（不假设两组方差相等）。
+
+    Args:
+        a: 第一组样本（至少 2 个）
+        b: 第二组样本（至少 2 个）
+
+    Returns:
+        (t 统计量, Welch-Satterthwaite 自由度, 双侧 p 值)
+    """
+    mean_a, mean_b = statistics.fmean(a), statistics.fmean(b)
+    se_a = statistics.variance(a) / len(a)
+    se_b = statistics.variance(b) / len(b)
+    se = se_a + se_b
+    if se == 0:
+        # 两组都没有波动：均值相同则无差异，否则差异确定
+        if mean_a == mean_b:
+            return 0.0, 1.0, 1.0
+        return math.copysign(math.inf, mean_a - mean_b), 1.0, 0.0
+    t = (mean_a - mean_b) / math.sqrt(se)
+    dof = se * se / (se_a * se_a / (len(a) - 1) + se_b * se_b / (len(b) - 1))
+    return t, dof, student_t_two_sided_p(t, dof)
+
+
+def bootstrap_ratio_ci(a: Sequence[float], b: Sequence[float],
+                       confidence: float = 1 - DEFAULT_ALPHA,
+                       resamples: int = BOOTSTRAP_RESAMPLES) -> Tuple[float, float]:
+    """用自助法（百分位法）估计中位数之比 median(a) / median(b) 的置信区间。
+
+    Args:
+        a: 第一组样本
+        b: 第二组样本
+        confidence: 置信水平
+        resamples: 重抽样次数
+
+    Returns:
+        (下限, 上限)
+    """
+    rng = random.Random(BOOTSTRAP_SEED)
+    ratios: List[float] = []
+    for _ in range(resamples):
+        median_b = statistics.median(rng.choices(b, k=len(b)))
+        if median_b > 0:
+            ratios.append(statistics.median(rng.choices(a, k=len(a))) / median_b)
+    if not ratios:
+        return math.nan, math.nan
+    ratios.sort()
+    tail = (1 - confidence) / 2
+    low = ratios[int(tail * (len(ratios) - 1))]
+    high = ratios[math.ceil((1 - tail) * (len(ratios) - 1))]
+    return low, high
+
+
+def compare_samples(a: Sequence[float], b: Sequence[float],
+                    confidence: float = 1 - DEFAULT_ALPHA) -> Comparison:
+    """比较两组耗时。
+
+    Args:
+        a: 基准组耗时（至少 2 个）
+        b: 对比组耗时（至少 2 个）
+        confidence: 置信水平
+
+    Returns:
+        Comparison 对象
+    """
+    median_a, median_b = statistics.median(a), statistics.median(b)
+    t, dof, p_value = welch_t_test(a, b)
+    ci_low, ci_high = bootstrap_ratio_ci(a, b, confidence)
+    return Comparison(
+        median_a=median_a,
+        median_b=median_b,
+        speedup=median_a / median_b if median_b > 0 else math.inf,
+        ci_low=ci_low,
+        ci_high=ci_high,
+        t=t,
+        dof=dof,
+        p_value=p_value,
+        confidence=confidence,
+    )
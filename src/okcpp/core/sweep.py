@@ -0,0 +1,319 @@
+"""Compiler and optimisation flag sweep: build a matrix of configurations and benchmark each.
+
+每个组合（编译器 × 优化级别 × -march=native × LTO）使用自定义构建类型 Sweep 和独立的
+构建树（如 build/gun-Sweep-O3-native-lto）。使用自定义构建类型是因为模板在 CMakeLists.txt
+中直接 set(CMAKE_CXX_FLAGS_RELEASE "-O3")，会覆盖命令行传入的 Release 编译选项。
+
+所有组合先并行构建（共享一个全局任务预算，与 run --all 相同），然后逐个进行基准测试
+（避免互相干扰），最后按运行时间排序输出。
+"""
+
+import dataclasses
+import itertools
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from okcpp.core.batch import JobBudget
+from okcpp.core.bench import BenchStats, format_seconds, measure, summarize
+from okcpp.core.build_cache import evict_build_trees
+from okcpp.core.builder import (
+    BuildConfig,
+    append_log,
+    get_executable_path,
+    migrate_legacy_build_root,
+    prepare_build,
+    run_cmake_build,
+    run_cmake_configure,
+)
+from okcpp.core.jobs import JobPlan, plan_jobs
+from okcpp.utils.log import err, info, print_blue, print_green_b, print_red_b, print_section, print_yellow_b
+
+# 扫描使用的自定义构建类型
+SWEEP_BUILD_TYPE = "Sweep"
+
+# 可选的维度取值
+OPT_LEVELS = ("O2", "O3", "Os")
+
+# 默认每个组合的计时运行次数和预热次数
+DEFAULT_SWEEP_RUNS = 5
+DEFAULT_SWEEP_WARMUP = 1
+
+# 编译器名称到 C++ 编译器命令（用于检测是否安装）
+COMPILER_COMMANDS = {"gun": "g++", "clang": "clang++"}
+
+
+@dataclass
+class SweepCell:
+    """矩阵中的一个组合及其结果。"""
+
+    compiler: str
+    opt: str
+    native: bool
+    lto: bool
+    status: str = "PENDING"  # "PASS" / "FAIL"
+    phase: str = ""  # 失败的阶段：configure / build / run / error
+    first_error: Optional[str] = None
+    jobs: int = 0
+    build_time: float = 0.0
+    binary_size: int = 0
+    build_dir: Optional[Path] = None
+    exe_path: Optional[Path] = None
+    log_file: Optional[Path] = None
+    stats: Optional[BenchStats] = None
+
+    @property
+    def variant(self) -> str:
+        """构建变体名（也是构建树名的后缀），例如 O3-native-lto。"""
+        parts = [self.opt]
+        if self.native:
+            parts.append("native")
+        if self.lto:
+            parts.append("lto")
+        return "-".join(parts)
+
+    @property
+    def label(self) -> str:
+        """用于输出的名称，例如 gun -O3 -march=native LTO。"""
+        parts = [self.compiler, f"-{self.opt}"]
+        if self.native:
+            parts.append("-march=native")
+        if self.lto:
+            parts.append("LTO")
+        return " ".join(parts)
+
+    @property
+    def compile_flags(self) -> str:
+        """该组合的编译选项。"""
+        flags = f"-{self.opt} -DNDEBUG"
+        return f"{flags} -march=native" if self.native else flags
+
+
+def installed_compilers() -> List[str]:
+    """返回已安装的编译器（gun / clang）。"""
+    return [name for name, command in COMPILER_COMMANDS.items() if shutil.which(command)]
+
+
+def build_matrix(compilers: List[str], opts: List[str], natives: List[bool],
+                 ltos: List[bool]) -> List[SweepCell]:
+    """生成所有组合。
+
+    Args:
+        compilers: 编译器列表
+        opts: 优化级别列表（O2 / O3 / Os）
+        natives: 是否使用 -march=native
+        ltos: 是否启用 LTO
+
+    Returns:
+        SweepCell 列表
+    """
+    return [
+        SweepCell(compiler=compiler, opt=opt, native=native, lto=lto)
+        for compiler, opt, native, lto in itertools.product(compilers, opts, natives, ltos)
+    ]
+
+
+def _cell_config(base: BuildConfig, cell: SweepCell) -> BuildConfig:
+    """生成组合的构建配置。
+
+    关闭构建产物缓存和编译器缓存（ccache / sccache），排名表中的构建时间是真实的编译时间。
+    """
+    return dataclasses.replace(
+        base,
+        compiler=cell.compiler,
+        build_type=SWEEP_BUILD_TYPE,
+        variant=cell.variant,
+        compile_flags=cell.compile_flags,
+        link_flags=None,
+        lto=cell.lto,
+        launcher=None,
+        artifact_cache_mb=None,
+        log_file=cell.log_file,
+        job_plan=JobPlan(jobs=cell.jobs, source="sweep"),
+        parse_diagnostics=True,
+    )
+
+
+def _build_cell(base: BuildConfig, cell: SweepCell, budget: JobBudget, fresh: bool) -> SweepCell:
+    """构建一个组合，输出写入该组合的日志。
+
+    Args:
+        base: 基础构建配置
+        cell: 组合
+        budget: 全局任务预算
+        fresh: 是否删除已有的构建树（测量完整构建时间）
+
+    Returns:
+        更新后的组合
+    """
+    cell.log_file = base.build_root / "sweep" / f"{cell.compiler}-{cell.variant}.log"
+    try:
+        # 分配失败前 cell.jobs 为 0，finally 中归还 0 不影响预算
+        cell.jobs = budget.acquire()
+        cell.log_file.parent.mkdir(parents=True, exist_ok=True)
+        cell.log_file.write_text("", encoding="utf-8")
+        config = prepare_build(_cell_config(base, cell))
+        if fresh and config.build_dir.exists():
+            shutil.rmtree(config.build_dir)
+            config = prepare_build(config)
+        cell.build_dir = config.build_dir
+
+        start = time.time()
+        for phase, step in (("configure", run_cmake_configure), ("build", run_cmake_build)):
+            if not step(config):
+                cell.status, cell.phase = "FAIL", phase
+                if config.diagnostics is not None and config.diagnostics.first_error is not None:
+                    cell.first_error = config.diagnostics.first_error.describe()
+                return cell
+        cell.build_time = time.time() - start
+
+        cell.exe_path = get_executable_path(config)
+        if not cell.exe_path.is_file():
+            cell.status, cell.phase = "FAIL", "run"
+            cell.first_error = f"executable not found: {cell.exe_path}"
+            return cell
+        cell.binary_size = cell.exe_path.stat().st_size
+        cell.status = "PASS"
+    except Exception as e:
+        cell.status, cell.phase = "FAIL", "error"
+        cell.first_error = f"{type(e).__name__}: {e}"
+        append_log(cell.log_file, cell.first_error)
+    finally:
+        budget.release(cell.jobs)
+    return cell
+
+
+def build_cells(base: BuildConfig, cells: List[SweepCell], fresh: bool = False) -> None:
+    """并行构建所有组合（共享 base.job_plan 的任务预算）。
+
+    Args:
+        base: 基础构建配置
+        cells: 组合列表
+        fresh: 是否删除已有的构建树
+    """
+    plan = base.job_plan or plan_jobs()
+    budget = JobBudget(plan.jobs, len(cells))
+    workers = min(len(cells), plan.jobs)
+    print_blue(f"Job budget: {plan.describe()}, {workers} configuration(s) at a time")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_build_cell, base, cell, budget, fresh) for cell in cells]
+        for future in as_completed(futures):
+            cell = future.result()
+            if cell.status == "PASS":
+                print_green_b(f"  built  {cell.label} ({cell.build_time:.2f}s, {cell.jobs} jobs)")
+            else:
+                print_red_b(f"  FAIL   {cell.label} ({cell.phase})")
+
+
+def bench_cells(cells: List[SweepCell], project_dir: Path, runs: int, warmup: int,
+                program_args: List[str]) -> None:
+    """逐个对构建成功的组合进行基准测试。
+
+    Args:
+        cells: 组合列表
+        project_dir: 运行程序的工作目录
+        runs: 计时运行次数
+        warmup: 预热次数
+        program_args: 程序参数
+    """
+    for cell in cells:
+        if cell.status != "PASS":
+            continue
+        samples = measure([str(cell.exe_path)] + program_args, runs, warmup, cwd=project_dir)
+        if samples[-1].exit_code != 0:
+            cell.status, cell.phase = "FAIL", "run"
+            cell.first_error = f"exit code {samples[-1].exit_code}"
+            print_red_b(f"  FAIL   {cell.label} (exit {samples[-1].exit_code})")
+            continue
+        cell.stats = summarize(samples)
+        print_blue(f"  {cell.label}: {cell.stats.describe()}")
+
+
+def _format_size(size: int) -> str:
+    """格式化文件大小。"""
+    if size >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def print_ranking(cells: List[SweepCell]) -> None:
+    """按运行时间（中位数）输出排名表，失败的组合列在最后。
+
+    Args:
+        cells: 组合列表
+    """
+    print_section("Sweep Ranking")
+    passed = sorted((cell for cell in cells if cell.stats is not None),
+                    key=lambda cell: cell.stats.median)
+    failed = [cell for cell in cells if cell.stats is None]
+    width = max([len("Configuration")] + [len(cell.label) for cell in cells])
+
+    print(f"{'#':>3}  {'Configuration':<{width}}  {'Median':>10}  {'Stddev':>10}  "
+          f"{'vs best':>8}  {'Size':>9}  {'Build':>8}")
+    print("-" * (width + 66))
+    best = passed[0].stats.median if passed else 0.0
+    for rank, cell in enumerate(passed, 1):
+        line = (f"{rank:>3}  {cell.label:<{width}}  {format_seconds(cell.stats.median):>10}  "
+                f"{format_seconds(cell.stats.stddev):>10}  "
+                f"{cell.stats.median / best if best else 0:>7.2f}x  "
+                f"{_format_size(cell.binary_size):>9}  {cell.build_time:>7.2f}s")
+        if rank == 1:
+            print_green_b(line)
+        else:
+            print(line)
+    for cell in failed:
+        print_red_b(f"{'-':>3}  {cell.label:<{width}}  FAIL ({cell.phase})")
+        if cell.first_error:
+            print(f"     {cell.first_error}")
+        if cell.log_file is not None:
+            print(f"     log: {cell.log_file}")
+
+    if len(passed) > 1 and best:
+        print()
+        info(f"Best: {passed[0].label}, "
+             f"{passed[-1].stats.median / best:.2f}x faster than {passed[-1].label}")
+
+
+def sweep(base: BuildConfig, cells: List[SweepCell], runs: int = DEFAULT_SWEEP_RUNS,
+          warmup: int = DEFAULT_SWEEP_WARMUP, program_args: Optional[List[str]] = None,
+          fresh: bool = False) -> int:
+    """构建并基准测试所有组合，输出排名。
+
+    Args:
+        base: 基础构建配置（项目目录、生成器、任务预算等）
+        cells: 组合列表
+        runs: 每个组合的计时运行次数
+        warmup: 每个组合的预热次数
+        program_args: 传给程序的参数
+        fresh: 是否删除已有的构建树（测量完整构建时间）
+
+    Returns:
+        退出码：全部组合成功返回 0，否则返回 1
+    """
+    program_args = list(program_args or [])
+    print_yellow_b(f"项目路径: {base.project_dir}")
+    info(f"Sweeping {len(cells)} configuration(s)")
+
+    print_section("Build")
+    # 所有组合共享 build 根目录，旧版布局的迁移（删除整个 build 目录）须在并行构建前完成
+    migrate_legacy_build_root(base)
+    build_cells(base, cells, fresh=fresh)
+
+    print_section("Benchmark")
+    print_blue(f"Warmup: {warmup}, runs: {runs} per configuration")
+    bench_cells(cells, base.project_dir, runs, warmup, program_args)
+
+    print_ranking(cells)
+
+    # 所有组合测试完成后再控制构建缓存大小，保留最快组合的构建树
+    ranked = sorted((cell for cell in cells if cell.stats is not None),
+                    key=lambda cell: cell.stats.median)
+    if ranked:
+        evict_build_trees(base.build_root, ranked[0].build_dir, base.max_build_cache_mb)
+    elif not cells:
+        err("没有可以扫描的组合")
+    return 0 if all(cell.stats is not None for cell in cells) and cells else 1
@@ -1,11 +1,12 @@
 """Template handling for ok-cpp."""
 
 import re
-import shutil
 from pathlib import Path
 from typing import List
 
-from okcpp.utils.log import die, info, print_blue, print_green_b, print_yellow_b
+from okcpp.core.instantiate import instantiate_tree
+from okcpp.core.template_catalog import load_catalog
+from okcpp.utils.log import die, info, print_blue, print_green_b, print_yellow_b, warn
 
 
 def list_templates(templates_dir: Path) -> List[str]:
@@ -17,15 +18,7 @@ def list_templates(templates_dir: Path) -> List[str]:
     Returns:
         模板名称列表
     """
-    templates = []
-    if not templates_dir.exists():
-        return templates
-
-    for item in templates_dir.iterdir():
-        if item.is_dir() and (item / "CMakeLists.txt").exists():
-            templates.append(item.name)
-
-    return sorted(templates)
+    return list(load_catalog(templates_dir))
 
 
 def create_project(
@@ -56,10 +49,14 @@ def create_project(
 
     # 检查模板是否存在
     template_dir = templates_dir / template_name
-    if not template_dir.exists():
+    manifest = load_catalog(templates_dir).get(template_name)
+    if manifest is None:
+        if template_dir.is_dir():
+            die(f"模板缺少 CMakeLists.txt: {template_name}")
         die(f"模板不存在: {template_name}")
-    if not (template_dir / "CMakeLists.txt").exists():
-        die(f"模板缺少 CMakeLists.txt: {template_name}")
+    missing = manifest.missing_tools()
+    if missing:
+        warn(f"模板 {template_name} 需要的工具未找到: {', '.join(missing)}")
 
     # 如果没有指定项目名，使用目录名
     if not project_name:
@@ -68,17 +65,22 @@ def create_project(
     # 创建父目录
     target_dir.parent.mkdir(parents=True, exist_ok=True)
 
-    # 复制模板目录
-    shutil.copytree(template_dir, target_dir)
+    # 实例化模板目录（reflink / 只读文件 hardlink / 复制），之后会被改写的文件必须独立复制
+    try:
+        stats = instantiate_tree(template_dir, target_dir, private=manifest.rewrite)
+    except OSError as e:
+        die(f"复制模板失败: {e}")
 
-    # 替换 CMakeLists.txt 中的项目名
-    cmake_file = target_dir / "CMakeLists.txt"
-    _replace_cmake_project_name(cmake_file, project_name)
+    # 替换清单中列出的文件里的项目名
+    for name in manifest.rewrite:
+        if (target_dir / name).is_file():
+            _replace_cmake_project_name(target_dir / name, project_name)
 
     print()
     print_green_b(f"已创建项目: {target_dir}")
     print_yellow_b(f"Template: {template_name}")
     print_blue(f"CMake project name: {project_name}")
+    print_blue(f"Files: {stats.describe()}")
     info(f"下一步: cd {target_dir} && ok-cpp run 来编译运行")
 
     return target_dir
@@ -117,32 +119,19 @@ def get_template_info(templates_dir: Path, template_name: str) -> dict:
         包含模板信息的字典
     """
     template_dir = templates_dir / template_name
+    manifest = load_catalog(templates_dir).get(template_name)
 
-    if not template_dir.exists():
-        return {"exists": False}
-
-    cmake_file = template_dir / "CMakeLists.txt"
-    project_name = None
-
-    if cmake_file.exists():
-        # 尝试读取项目名
-        try:
-            import re
-
-            content = cmake_file.read_text(encoding="utf-8")
-            match = re.search(
-                r"^\s*project\s*\(\s*([A-Za-z0-9_-]+)",
-                content,
-                re.MULTILINE | re.IGNORECASE,
-            )
-            if match:
-                project_name = match.group(1)
-        except Exception:
-            pass
+    if manifest is None:
+        if not template_dir.exists():
+            return {"exists": False}
+        return {"exists": True, "has_cmake": False, "project_name": None, "path": template_dir}
 
     return {
         "exists": True,
-        "has_cmake": cmake_file.exists(),
-        "project_name": project_name,
+        "has_cmake": True,
+        "project_name": manifest.project_name,
         "path": template_dir,
+        "description": manifest.description,
+        "requires": manifest.requires,
+        "entry": manifest.entry,
     }
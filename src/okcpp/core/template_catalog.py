@@ -0,0 +1,252 @@
+"""Template manifests and the cached template catalog.
+
+每个模板目录可以包含一个 okcpp-template.json 清单，描述模板的用途、依赖的工具、
+创建项目时需要改写 project() 名称的文件以及构建后运行的可执行文件。清单会随模板一起
+复制到新项目中，ok-cpp run 据此确定要运行的可执行文件。
+
+模板列表和清单解析结果缓存在 ${XDG_CACHE_HOME:-~/.cache}/ok-cpp/templates/ 下，
+只在模板目录（增删模板）或某个模板的目录、清单、CMakeLists.txt 变化时重建。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from okcpp.utils.log import warn
+from okcpp.utils.path import get_cache_dir
+
+# 模板清单文件名（位于模板根目录，随模板复制到新项目）
+MANIFEST_FILE = "okcpp-template.json"
+
+# 目录缓存格式版本，格式变化时递增以丢弃旧缓存
+CATALOG_VERSION = 1
+
+# 清单 entry 中代表 CMake 项目名的占位符
+PROJECT_NAME_PLACEHOLDER = "${PROJECT_NAME}"
+
+# 进程内缓存：模板目录 -> (签名, 模板目录内容, 签名覆盖的子目录)
+_catalogs: Dict[str, tuple] = {}
+
+
+@dataclass
+class TemplateManifest:
+    """模板清单。"""
+
+    name: str
+    description: str = ""
+    # 依赖的命令，"a|b" 表示任选其一
+    requires: List[str] = field(default_factory=lambda: ["cmake"])
+    # 创建项目时需要把 project() 改为新项目名的文件（相对模板根目录）
+    rewrite: List[str] = field(default_factory=lambda: ["CMakeLists.txt"])
+    # 构建后运行的可执行文件（相对构建目录），可以使用 ${PROJECT_NAME}
+    entry: str = PROJECT_NAME_PLACEHOLDER
+    # 模板 CMakeLists.txt 中的 project() 名称（从模板内容解析，不写入清单）
+    project_name: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: dict, name: str) -> "TemplateManifest":
+        """从 JSON 字典创建清单，忽略未知字段。
+
+        Args:
+            data: JSON 字典
+            name: 清单未指定名称时使用的名称
+
+        Returns:
+            TemplateManifest 对象
+
+        Raises:
+            ValueError: 字段类型不正确
+        """
+        if not isinstance(data, dict):
+            raise ValueError("manifest must be a JSON object")
+        manifest = cls(name=name)
+        for key in ("name", "description", "entry", "project_name"):
+            if key in data:
+                if not isinstance(data[key], str) and not (key == "project_name" and data[key] is None):
+                    raise ValueError(f"'{key}' must be a string")
+                setattr(manifest, key, data[key])
+        for key in ("requires", "rewrite"):
+            if key in data:
+                if not isinstance(data[key], list) or not all(isinstance(v, str) for v in data[key]):
+                    raise ValueError(f"'{key}' must be a list of strings")
+                setattr(manifest, key, list(data[key]))
+        return manifest
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["TemplateManifest"]:
+        """读取目录中的清单。
+
+        Args:
+            directory: 模板或项目目录
+
+        Returns:
+            TemplateManifest，没有清单时返回 None
+
+        Raises:
+            ValueError: 清单格式错误
+        """
+        try:
+            content = (directory / MANIFEST_FILE).read_text(encoding="utf-8")
+        except OSError:
+            return None
+        return cls.from_dict(json.loads(content), directory.name)
+
+    def save(self, directory: Path) -> None:
+        """把清单写入目录。
+
+        Args:
+            directory: 模板目录
+        """
+        data = asdict(self)
+        data.pop("project_name")
+        (directory / MANIFEST_FILE).write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
+
+    def get_entry(self, project_name: str) -> str:
+        """获取可执行文件名。
+
+        Args:
+            project_name: CMake 项目名
+
+        Returns:
+            替换占位符后的可执行文件路径（相对构建目录）
+        """
+        return self.entry.replace(PROJECT_NAME_PLACEHOLDER, project_name)
+
+    def missing_tools(self) -> List[str]:
+        """返回未安装的依赖命令。"""
+        return [
+            requirement for requirement in self.requires
+            if not any(shutil.which(command) for command in requirement.split("|"))
+        ]
+
+
+def read_project_manifest(project_dir: Path) -> Optional[TemplateManifest]:
+    """读取项目中随模板复制来的清单。
+
+    Args:
+        project_dir: 项目目录
+
+    Returns:
+        TemplateManifest，没有清单或清单损坏时返回 None
+    """
+    try:
+        return TemplateManifest.load(project_dir)
+    except ValueError:
+        return None
+
+
+def get_catalog_file(templates_dir: Path) -> Path:
+    """获取模板目录对应的缓存文件。
+
+    Args:
+        templates_dir: 模板根目录
+
+    Returns:
+        缓存文件路径
+    """
+    digest = hashlib.sha1(str(templates_dir.resolve()).encode()).hexdigest()[:16]
+    return get_cache_dir() / "templates" / f"catalog-{digest}.json"
+
+
+def _mtime(path: Path) -> Optional[int]:
+    """获取文件 mtime（纳秒），不存在时返回 None。"""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _signature(templates_dir: Path, names: List[str]) -> dict:
+    """计算模板目录的签名：根目录和每个子目录、清单、CMakeLists.txt 的 mtime。"""
+    return {
+        "": _mtime(templates_dir),
+        **{
+            name: [
+                _mtime(templates_dir / name),
+                _mtime(templates_dir / name / MANIFEST_FILE),
+                _mtime(templates_dir / name / "CMakeLists.txt"),
+            ]
+            for name in names
+        },
+    }
+
+
+def _build_catalog(templates_dir: Path) -> Dict[str, TemplateManifest]:
+    """扫描模板目录并解析每个模板的清单。"""
+    from okcpp.core.builder import get_cmake_project_name
+
+    catalog = {}
+    for item in sorted(templates_dir.iterdir()):
+        if not item.is_dir() or not (item / "CMakeLists.txt").exists():
+            continue
+        try:
+            manifest = TemplateManifest.load(item)
+        except ValueError as e:
+            warn(f"模板清单无效，使用默认值: {item / MANIFEST_FILE} ({e})")
+            manifest = None
+        if manifest is None:
+            manifest = TemplateManifest(name=item.name)
+        # 目录名就是模板名（mkp -t 使用的名称）
+        manifest.name = item.name
+        manifest.project_name = get_cmake_project_name(item)
+        catalog[item.name] = manifest
+    return catalog
+
+
+def load_catalog(templates_dir: Path) -> Dict[str, TemplateManifest]:
+    """获取模板目录（优先使用缓存）。
+
+    Args:
+        templates_dir: 模板根目录
+
+    Returns:
+        模板名 -> 清单，按名称排序
+    """
+    if not templates_dir.is_dir():
+        return {}
+
+    key = str(templates_dir.resolve())
+    cached = _catalogs.get(key)
+    if cached is not None:
+        signature, catalog, dirs = cached
+        if _signature(templates_dir, dirs) == signature:
+            return catalog
+
+    catalog_file = get_catalog_file(templates_dir)
+    try:
+        data = json.loads(catalog_file.read_text(encoding="utf-8"))
+        if data.get("version") == CATALOG_VERSION and data.get("root") == key:
+            dirs = [name for name in data["signature"] if name]
+            if _signature(templates_dir, dirs) == data["signature"]:
+                catalog = {
+                    name: TemplateManifest.from_dict(manifest, name)
+                    for name, manifest in data["templates"].items()
+                }
+                _catalogs[key] = (data["signature"], catalog, dirs)
+                return catalog
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        pass
+
+    dirs = sorted(item.name for item in templates_dir.iterdir() if item.is_dir())
+    signature = _signature(templates_dir, dirs)
+    catalog = _build_catalog(templates_dir)
+    _catalogs[key] = (signature, catalog, dirs)
+
+    data = {
+        "version": CATALOG_VERSION,
+        "root": key,
+        "signature": signature,
+        "templates": {name: asdict(manifest) for name, manifest in catalog.items()},
+    }
+    try:
+        catalog_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = catalog_file.with_name(f"{catalog_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_file, catalog_file)
+    except OSError:
+        pass
+    return catalog
@@ -0,0 +1,366 @@
+"""Build timing telemetry: per-phase and per-translation-unit times."""
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from okcpp.utils.log import print_blue, print_section
+
+# 计时历史文件名（位于 build 根目录，每行一条 JSON 记录）
+TIMINGS_HISTORY_FILE = "timings.jsonl"
+
+# 历史文件保留的记录条数
+MAX_HISTORY = 200
+
+# Makefile 生成器下记录每个编译/链接命令耗时的包装脚本及其日志（位于构建树中）
+TIMING_WRAPPER_NAME = "okcpp-timing.sh"
+TIMING_LOG_NAME = "okcpp-timing.log"
+
+# CMake 3.21 起支持 CMAKE_<LANG>_LINKER_LAUNCHER，更早的版本只能记录编译命令的耗时
+CMAKE_LINKER_LAUNCHER_VERSION = (3, 21)
+
+# 报告中显示的最慢编译单元数
+SLOWEST_UNITS = 10
+
+# 支持的输出格式
+TIMINGS_FORMATS = ("table", "json", "csv")
+
+# 计时阶段（按顺序）
+PHASES = ("configure", "build", "link", "run", "overhead", "total")
+
+# 目标文件和预编译头的扩展名，其余输出视为链接产物
+_OBJECT_SUFFIXES = (".o", ".obj")
+_PCH_SUFFIXES = (".gch", ".pch")
+
+_WRAPPER_SCRIPT = """#!/bin/sh
+# Generated by ok-cpp: records the duration of each compile/link command.
+out=
+prev=
+for arg in "$@"; do
+    [ "$prev" = "-o" ] && out=$arg
+    prev=$arg
+done
+start=$(date +%s%N)
+"$@"
+status=$?
+end=$(date +%s%N)
+echo "$start $end $out" >> '{log}'
+exit $status
+"""
+
+
+@dataclass
+class UnitTiming:
+    """单个编译单元（或链接步骤）的耗时。"""
+
+    output: str
+    seconds: float
+    kind: str = "compile"  # "compile" / "pch" / "link"
+
+
+@dataclass
+class BuildTimings:
+    """一次 ok-cpp run 的计时记录。"""
+
+    timestamp: float
+    project: str
+    compiler: str
+    build_type: str
+    generator: str
+    # 影响构建时间的特性（编译器缓存、PCH、unity build、链接器等），用于前后对比
+    features: List[str] = field(default_factory=list)
+    # 阶段 -> 秒，未测量的阶段不出现
+    phases: Dict[str, float] = field(default_factory=dict)
+    configure_skipped: bool = False
+    # 构建前构建树中没有可复用的产物（新建的构建树或编译参数相关的特性发生了变化）
+    full_build: bool = False
+    units: List[UnitTiming] = field(default_factory=list)
+    # 与历史记录的对比结果，例如 {"pch_saved_s": 1.3, "unity_speedup": 1.8}
+    comparisons: Dict[str, float] = field(default_factory=dict)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        """累加某个阶段的耗时。
+
+        Args:
+            name: 阶段名称
+            seconds: 耗时（秒）
+        """
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def slowest_units(self, count: int = SLOWEST_UNITS) -> List[UnitTiming]:
+        """返回最慢的编译单元。
+
+        Args:
+            count: 返回的数量
+
+        Returns:
+            按耗时降序排列的编译单元
+        """
+        compiles = [unit for unit in self.units if unit.kind == "compile"]
+        return sorted(compiles, key=lambda unit: unit.seconds, reverse=True)[:count]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BuildTimings":
+        """从 JSON 字典创建记录。"""
+        data = dict(data)
+        data["units"] = [UnitTiming(**unit) for unit in data.get("units", [])]
+        return cls(**data)
+
+
+def get_process_uptime() -> Optional[float]:
+    """获取当前进程从启动到现在的时间（包括解释器启动和导入开销）。
+
+    Returns:
+        秒数，无法获取时返回 None
+    """
+    try:
+        stat = Path("/proc/self/stat").read_text()
+        # comm 字段可能包含空格，从最后一个 ')' 之后开始解析；starttime 是第 22 个字段
+        fields = stat.rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def write_timing_wrapper(build_dir: Path) -> Path:
+    """在构建树中生成计时包装脚本。
+
+    Args:
+        build_dir: 构建树
+
+    Returns:
+        脚本路径
+    """
+    wrapper = build_dir / TIMING_WRAPPER_NAME
+    content = _WRAPPER_SCRIPT.format(log=build_dir / TIMING_LOG_NAME)
+    if not wrapper.exists() or wrapper.read_text() != content:
+        wrapper.write_text(content)
+        wrapper.chmod(0o755)
+    return wrapper
+
+
+def _unit_kind(output: str) -> str:
+    """根据输出文件判断是编译、生成预编译头还是链接。"""
+    if output.endswith(_OBJECT_SUFFIXES):
+        return "compile"
+    if output.endswith(_PCH_SUFFIXES):
+        return "pch"
+    return "link"
+
+
+def _relative_output(output: str, build_dir: Path) -> str:
+    """把输出路径转换为相对构建树的路径。"""
+    path = Path(output)
+    if path.is_absolute():
+        try:
+            return str(path.relative_to(build_dir))
+        except ValueError:
+            return output
+    return output
+
+
+def log_offset(build_dir: Path, generator: str) -> int:
+    """记录构建前计时日志的长度，构建后只解析新追加的部分。
+
+    Args:
+        build_dir: 构建树
+        generator: CMake 生成器
+
+    Returns:
+        日志文件当前大小（不存在时为 0）
+    """
+    name = ".ninja_log" if generator == "Ninja" else TIMING_LOG_NAME
+    try:
+        return (build_dir / name).stat().st_size
+    except OSError:
+        return 0
+
+
+def _read_appended(path: Path, offset: int) -> List[str]:
+    """读取文件中 offset 之后的行。"""
+    try:
+        with open(path, "rb") as f:
+            if f.seek(0, os.SEEK_END) < offset:
+                offset = 0  # 文件被重写（例如 ninja 压缩日志）
+            f.seek(offset)
+            return f.read().decode("utf-8", errors="replace").splitlines()
+    except OSError:
+        return []
+
+
+def collect_unit_timings(build_dir: Path, generator: str, offset: int) -> List[UnitTiming]:
+    """解析本次构建中每个编译/链接步骤的耗时。
+
+    Ninja 使用 .ninja_log（毫秒，制表符分隔），其他生成器使用计时包装脚本的日志（纳秒）。
+
+    Args:
+        build_dir: 构建树
+        generator: CMake 生成器
+        offset: 构建前的日志长度（见 log_offset）
+
+    Returns:
+        编译单元耗时列表
+    """
+    units = []
+    if generator == "Ninja":
+        for line in _read_appended(build_dir / ".ninja_log", offset):
+            parts = line.split("\t")
+            if line.startswith("#") or len(parts) < 4:
+                continue
+            try:
+                seconds = (int(parts[1]) - int(parts[0])) / 1000
+            except ValueError:
+                continue
+            units.append(UnitTiming(parts[3], seconds, _unit_kind(parts[3])))
+    else:
+        for line in _read_appended(build_dir / TIMING_LOG_NAME, offset):
+            parts = line.split(" ", 2)
+            if len(parts) < 3 or not parts[2]:
+                continue
+            try:
+                seconds = (int(parts[1]) - int(parts[0])) / 1e9
+            except ValueError:
+                continue
+            output = _relative_output(parts[2], build_dir)
+            units.append(UnitTiming(output, seconds, _unit_kind(output)))
+    return units
+
+
+def append_history(build_root: Path, timings: BuildTimings) -> Path:
+    """把计时记录追加到 build 根目录的历史文件。
+
+    Args:
+        build_root: build 根目录
+        timings: 计时记录
+
+    Returns:
+        历史文件路径
+    """
+    history_file = build_root / TIMINGS_HISTORY_FILE
+    lines = []
+    if history_file.exists():
+        lines = history_file.read_text(encoding="utf-8").splitlines()
+    lines.append(json.dumps(asdict(timings), separators=(",", ":")))
+    history_file.write_text("\n".join(lines[-MAX_HISTORY:]) + "\n", encoding="utf-8")
+    return history_file
+
+
+def load_history(build_root: Path) -> List[BuildTimings]:
+    """读取计时历史。
+
+    Args:
+        build_root: build 根目录
+
+    Returns:
+        计时记录列表（按时间顺序），损坏的行会被跳过
+    """
+    history = []
+    try:
+        lines = (build_root / TIMINGS_HISTORY_FILE).read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return history
+    for line in lines:
+        try:
+            history.append(BuildTimings.from_dict(json.loads(line)))
+        except (ValueError, TypeError):
+            continue
+    return history
+
+
+def format_csv(timings: BuildTimings) -> str:
+    """把计时记录格式化为 CSV（kind,name,seconds）。
+
+    Args:
+        timings: 计时记录
+
+    Returns:
+        CSV 文本
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(["kind", "name", "seconds"])
+    for phase in PHASES:
+        if phase in timings.phases:
+            writer.writerow(["phase", phase, f"{timings.phases[phase]:.4f}"])
+    for unit in timings.units:
+        writer.writerow([unit.kind, unit.output, f"{unit.seconds:.4f}"])
+    return buffer.getvalue()
+
+
+def print_report(timings: BuildTimings, output_format: str = "table",
+                 out_file: Optional[Path] = None) -> None:
+    """输出计时报告。
+
+    json / csv 报告写入 out_file，未指定时写入 stderr，避免与标准输出上的构建日志和
+    程序输出混在一起。
+
+    Args:
+        timings: 计时记录
+        output_format: table / json / csv
+        out_file: json / csv 报告的输出文件
+    """
+    if output_format in ("json", "csv"):
+        if output_format == "json":
+            text = json.dumps(asdict(timings), indent=2) + "\n"
+        else:
+            text = format_csv(timings)
+        if out_file is not None:
+            out_file.write_text(text, encoding="utf-8")
+        else:
+            sys.stderr.write(text)
+            sys.stderr.flush()
+        return
+
+    print_section("Timings")
+    total = timings.phases.get("total")
+    for phase in PHASES:
+        if phase not in timings.phases:
+            continue
+        seconds = timings.phases[phase]
+        share = f"{seconds / total * 100:5.1f}%" if total else ""
+        note = " (skipped)" if phase == "configure" and timings.configure_skipped else ""
+        print(f"  {phase:<10} {seconds:>8.3f}s {share}{note}")
+    if timings.features:
+        print_blue(f"Features: {', '.join(timings.features)}")
+
+    slowest = timings.slowest_units()
+    if slowest:
+        print()
+        print_blue(f"Slowest translation units ({len(slowest)} of "
+                   f"{sum(1 for unit in timings.units if unit.kind == 'compile')}):")
+        for unit in slowest:
+            print(f"  {unit.seconds:>8.3f}s  {unit.output}")
+    elif "build" in timings.phases:
+        print_blue("No translation units were rebuilt.")
+
+
+def start_timings(project: str, compiler: str, build_type: str, generator: str,
+                  features: List[str]) -> BuildTimings:
+    """创建计时记录。
+
+    Args:
+        project: 项目名称
+        compiler: 编译器
+        build_type: 构建类型
+        generator: CMake 生成器
+        features: 影响构建时间的特性列表
+
+    Returns:
+        BuildTimings 对象
+    """
+    return BuildTimings(
+        timestamp=time.time(),
+        project=project,
+        compiler=compiler,
+        build_type=build_type,
+        generator=generator,
+        features=list(features),
+    )
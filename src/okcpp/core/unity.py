@@ -0,0 +1,102 @@
+"""Unity (jumbo) build support: clash detection and speedup reporting."""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from okcpp.core.timings import BuildTimings
+
+# 默认每个 unity 源文件合并的编译单元数
+DEFAULT_UNITY_BATCH = 8
+
+# 合并编译单元后才会出现的编译错误：同名的静态函数/匿名命名空间符号、宏、using 声明等
+# 重定义或歧义。只匹配编译器的 error 行；链接阶段的重复定义（multiple definition of、
+# already defined）与 unity 构建无关，回退为普通构建也无法解决
+UNITY_CLASH_PATTERN = re.compile(
+    r"error: .*(?:redefinition of|conflicting declaration|has a previous declaration|"
+    r"redeclared as different kind of|is ambiguous|macro redefined)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class UnitySpeedup:
+    """unity 构建与普通构建的完整构建时间对比。"""
+
+    unity_time: float
+    normal_time: float
+
+    @property
+    def speedup(self) -> float:
+        """加速比（普通构建时间 / unity 构建时间）。"""
+        return self.normal_time / self.unity_time if self.unity_time > 0 else 0.0
+
+    def describe(self) -> str:
+        """返回用于输出的描述字符串。"""
+        return (f"Unity build: {self.unity_time:.2f}s vs {self.normal_time:.2f}s "
+                f"for the last non-unity full build ({self.speedup:.2f}x)")
+
+
+def parse_unity_batch(value: str) -> int:
+    """解析 unity 批大小。
+
+    Args:
+        value: 正整数字符串
+
+    Returns:
+        批大小
+
+    Raises:
+        ValueError: 如果不是正整数
+    """
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"Invalid unity batch size: {value}")
+    return int(value)
+
+
+def is_unity_clash(output: Iterable[str]) -> bool:
+    """判断构建失败是否可能由 unity 合并编译单元导致。
+
+    Args:
+        output: 构建输出行
+
+    Returns:
+        如果输出中包含重定义/歧义等错误返回 True
+    """
+    return any(UNITY_CLASH_PATTERN.search(line) for line in output)
+
+
+def _is_unity(record: BuildTimings) -> bool:
+    """记录是否使用了 unity 构建（包括回退为普通构建的记录）。"""
+    return any(feature.startswith("unity") for feature in record.features)
+
+
+def estimate_unity_speedup(history: List[BuildTimings], current: BuildTimings) -> Optional[UnitySpeedup]:
+    """与最近一次同配置、非 unity 的完整构建对比，计算加速比。
+
+    只有完整构建（全部编译单元重新编译）之间的对比才有意义。
+
+    Args:
+        history: 计时历史（不含本次）
+        current: 本次（unity）计时记录
+
+    Returns:
+        UnitySpeedup，没有可比较的数据时返回 None
+    """
+    if not current.full_build or "build" not in current.phases:
+        return None
+
+    pch = "pch" in current.features
+    for record in reversed(history):
+        if (
+            record.full_build
+            and not _is_unity(record)
+            and ("pch" in record.features) == pch
+            and record.compiler == current.compiler
+            and record.build_type == current.build_type
+            and record.generator == current.generator
+            and "build" in record.phases
+        ):
+            return UnitySpeedup(unity_time=current.phases["build"],
+                                normal_time=record.phases["build"])
+    return None
@@ -0,0 +1,341 @@
+"""Watch mode: rebuild and rerun the project when sources change."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import signal
+import struct
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
+
+from okcpp.core.builder import (
+    BuildConfig,
+    evict_build_trees,
+    get_executable_path,
+    prepare_build,
+    run_cmake_build,
+    run_cmake_configure,
+)
+from okcpp.utils.log import err, info, print_purple_b, print_yellow_b, warn
+
+# 触发重新构建的源文件扩展名
+SOURCE_SUFFIXES = {
+    ".c", ".cc", ".cpp", ".cxx", ".c++",
+    ".h", ".hh", ".hpp", ".hxx", ".h++", ".inl", ".ipp", ".tpp",
+    ".cmake", ".ui", ".qrc", ".in",
+}
+
+# 连续保存的防抖时间（秒）
+DEBOUNCE_SECONDS = 0.3
+
+# 轮询模式的扫描间隔（秒）
+POLL_INTERVAL = 0.5
+
+# inotify 常量（见 <sys/inotify.h>）
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_WATCH_MASK = (
+    _IN_CLOSE_WRITE | _IN_MODIFY | _IN_ATTRIB | _IN_MOVED_FROM | _IN_MOVED_TO
+    | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def is_relevant_file(path: Path) -> bool:
+    """判断文件变化是否需要重新构建。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        如果是源文件或 CMake 文件返回 True
+    """
+    return path.name == "CMakeLists.txt" or path.suffix.lower() in SOURCE_SUFFIXES
+
+
+def iter_source_dirs(project_dir: Path, build_root: Path) -> Iterator[Path]:
+    """遍历需要监听的目录，跳过构建目录和隐藏目录。
+
+    Args:
+        project_dir: 项目目录
+        build_root: build 根目录
+
+    Yields:
+        目录路径
+    """
+    build_root = build_root.resolve()
+    for root, dirs, _ in os.walk(project_dir):
+        root_path = Path(root)
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith(".") and (root_path / d).resolve() != build_root
+        ]
+        yield root_path
+
+
+class PollingWatcher:
+    """基于 mtime 轮询的文件监听（inotify 不可用时的回退方案）。"""
+
+    def __init__(self, project_dir: Path, build_root: Path):
+        self.project_dir = project_dir
+        self.build_root = build_root
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, tuple]:
+        """扫描所有相关文件的 (mtime, size)。"""
+        snapshot = {}
+        for directory in iter_source_dirs(self.project_dir, self.build_root):
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_file() and is_relevant_file(path):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self, timeout: float) -> Set[Path]:
+        """等待文件变化。
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            发生变化的文件集合，超时返回空集合
+        """
+        time.sleep(min(timeout, POLL_INTERVAL))
+        snapshot = self._scan()
+        changed = {
+            path for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        """释放资源。"""
+
+
+class InotifyWatcher:
+    """基于 Linux inotify 的文件监听。"""
+
+    def __init__(self, project_dir: Path, build_root: Path):
+        self.project_dir = project_dir
+        self.build_root = build_root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[int, Path] = {}
+        for directory in iter_source_dirs(project_dir, build_root):
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: Path) -> None:
+        """为目录添加监听。"""
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            if code == errno.ENOSPC:
+                raise OSError(code, "inotify watch limit reached")
+            return
+        self._watches[wd] = directory
+
+    def wait(self, timeout: float) -> Set[Path]:
+        """等待文件变化。
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            发生变化的文件集合，超时返回空集合
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            if mask & _IN_DELETE_SELF:
+                self._watches.pop(wd, None)
+                continue
+
+            path = directory / os.fsdecode(name)
+            if mask & _IN_ISDIR:
+                # 新建的子目录需要递归加入监听
+                if mask & (_IN_CREATE | _IN_MOVED_TO) and not path.name.startswith("."):
+                    for sub_dir in iter_source_dirs(path, self.build_root):
+                        self._add_watch(sub_dir)
+                continue
+            if is_relevant_file(path):
+                changed.add(path)
+
+        return changed
+
+    def close(self) -> None:
+        """释放资源。"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(project_dir: Path, build_root: Path):
+    """创建文件监听器，优先使用 inotify，失败时回退到轮询。
+
+    Args:
+        project_dir: 项目目录
+        build_root: build 根目录
+
+    Returns:
+        InotifyWatcher 或 PollingWatcher
+    """
+    try:
+        return InotifyWatcher(project_dir, build_root)
+    except (OSError, AttributeError) as e:
+        warn(f"inotify 不可用（{e}），回退为轮询模式")
+        return PollingWatcher(project_dir, build_root)
+
+
+def _wait_for_changes(watcher, process: Optional[subprocess.Popen]) -> Set[Path]:
+    """阻塞直到有相关文件变化，期间报告程序退出。
+
+    Args:
+        watcher: 文件监听器
+        process: 正在运行的程序
+
+    Returns:
+        发生变化的文件集合（已防抖合并）
+    """
+    while True:
+        changed = watcher.wait(POLL_INTERVAL)
+        if process is not None and process.poll() is not None:
+            print("=" * 70)
+            info(f"程序已退出，退出码 {process.returncode}，等待文件变化...")
+            process = None
+        if changed:
+            break
+
+    # 防抖：合并短时间内连续的保存
+    while True:
+        more = watcher.wait(DEBOUNCE_SECONDS)
+        if not more:
+            return changed
+        changed |= more
+
+
+def _start_executable(exe_path: Path) -> Optional[subprocess.Popen]:
+    """在后台启动程序。
+
+    Args:
+        exe_path: 可执行文件路径
+
+    Returns:
+        子进程对象，启动失败返回 None
+    """
+    if not exe_path.exists():
+        err(f"未找到可执行文件: {exe_path}")
+        return None
+
+    print_purple_b("[3/3] Run Executable (watch)")
+    print("=" * 70)
+    return subprocess.Popen([str(exe_path)], start_new_session=True)
+
+
+def _stop_executable(process: Optional[subprocess.Popen]) -> None:
+    """终止仍在运行的程序（包括其子进程）。
+
+    Args:
+        process: 子进程对象
+    """
+    if process is None or process.poll() is not None:
+        return
+
+    for sig, wait_time in ((signal.SIGTERM, 2), (signal.SIGKILL, None)):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            return
+        try:
+            process.wait(timeout=wait_time)
+            break
+        except subprocess.TimeoutExpired:
+            continue
+    print("=" * 70)
+    print_yellow_b("程序已终止")
+
+
+def _raise_keyboard_interrupt(signum, frame) -> None:
+    """把 SIGTERM 转换为 KeyboardInterrupt，以便统一清理子进程。"""
+    raise KeyboardInterrupt
+
+
+def watch_and_run(config: BuildConfig) -> int:
+    """监听模式：源文件变化时增量重新构建并重启程序。
+
+    CMake 配置只在 CMake 文件变化时重新运行（由配置指纹保证）。
+
+    Args:
+        config: 构建配置
+
+    Returns:
+        退出码
+    """
+    config = prepare_build(config)
+    watcher = create_watcher(config.project_dir, config.build_root)
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    info(f"Watching {config.project_dir} (Ctrl+C to stop)")
+
+    process = None
+    try:
+        while True:
+            if run_cmake_configure(config) and run_cmake_build(config):
+                evict_build_trees(config.build_root, config.build_dir, config.max_build_cache_mb)
+                process = _start_executable(get_executable_path(config))
+            else:
+                err("构建失败，等待文件变化后重试...")
+
+            changed = _wait_for_changes(watcher, process)
+            _stop_executable(process)
+            process = None
+
+            names = sorted(str(path.relative_to(config.project_dir)) for path in changed)
+            print()
+            print_yellow_b(f"检测到变更: {', '.join(names[:5])}" + (" ..." if len(names) > 5 else ""))
+    except KeyboardInterrupt:
+        _stop_executable(process)
+        print()
+        info("Watch mode stopped.")
+        return 0
+    finally:
+        watcher.close()
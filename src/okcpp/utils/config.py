@@ -18,6 +18,13 @@ class Config:
 
     compiler: str = "gun"
     template_name: str = "default"
+    jobs: str = "auto"
+    build_cache_mb: str = "2048"
+    launcher: str = "auto"
+    linker: str = "auto"
+    generator: str = "auto"
+    unity_batch: str = "8"
+    artifact_cache_mb: str = "0"
 
     # 内部字段
     _config_dir: Path = field(init=False, repr=False)
@@ -53,6 +60,20 @@ class Config:
                         self.compiler = value
                     elif key == "TEMPLATE_NAME":
                         self.template_name = value
+                    elif key == "JOBS":
+                        self.jobs = value
+                    elif key == "BUILD_CACHE_MB":
+                        self.build_cache_mb = value
+                    elif key == "LAUNCHER":
+                        self.launcher = value
+                    elif key == "LINKER":
+                        self.linker = value
+                    elif key == "GENERATOR":
+                        self.generator = value
+                    elif key == "UNITY_BATCH":
+                        self.unity_batch = value
+                    elif key == "ARTIFACT_CACHE_MB":
+                        self.artifact_cache_mb = value
         except Exception:
             # 如果读取失败，静默失败，保持默认值
             pass
@@ -65,6 +86,13 @@ class Config:
             "\n"
             f"COMPILER={self.compiler}\n"
             f"TEMPLATE_NAME={self.template_name}\n"
+            f"JOBS={self.jobs}\n"
+            f"BUILD_CACHE_MB={self.build_cache_mb}\n"
+            f"LAUNCHER={self.launcher}\n"
+            f"LINKER={self.linker}\n"
+            f"GENERATOR={self.generator}\n"
+            f"UNITY_BATCH={self.unity_batch}\n"
+            f"ARTIFACT_CACHE_MB={self.artifact_cache_mb}\n"
         )
         self._config_file.write_text(content, encoding="utf-8")
 
@@ -80,6 +108,132 @@ class Config:
         """
         return compiler in ("clang", "gun")
 
+    @staticmethod
+    def validate_jobs(jobs: str) -> bool:
+        """验证并行任务数是否有效。
+
+        Args:
+            jobs: 任务数，正整数或 auto
+
+        Returns:
+            如果是有效的任务数返回 True
+        """
+        from okcpp.core.jobs import parse_jobs
+
+        try:
+            parse_jobs(jobs)
+        except ValueError:
+            return False
+        return True
+
+    @staticmethod
+    def validate_build_cache_mb(size: str) -> bool:
+        """验证构建缓存大小上限是否有效。
+
+        Args:
+            size: 大小（MB），0 表示不限制
+
+        Returns:
+            如果是非负整数返回 True
+        """
+        return size.isdigit()
+
+    def get_build_cache_mb(self) -> Optional[int]:
+        """获取构建缓存大小上限。
+
+        Returns:
+            大小上限（MB），None 表示不限制
+        """
+        from okcpp.core.build_cache import DEFAULT_BUILD_CACHE_MB
+
+        if not self.validate_build_cache_mb(self.build_cache_mb):
+            return DEFAULT_BUILD_CACHE_MB
+        return int(self.build_cache_mb) or None
+
+    @staticmethod
+    def validate_launcher(launcher: str) -> bool:
+        """验证编译器缓存配置是否有效。
+
+        Args:
+            launcher: auto / none / ccache / sccache
+
+        Returns:
+            如果有效返回 True
+        """
+        from okcpp.core.launcher import validate_launcher
+
+        return validate_launcher(launcher)
+
+    @staticmethod
+    def validate_linker(linker: str) -> bool:
+        """验证链接器配置是否有效。
+
+        Args:
+            linker: auto / default / mold / lld / gold
+
+        Returns:
+            如果有效返回 True
+        """
+        from okcpp.core.linker import validate_linker
+
+        return validate_linker(linker)
+
+    @staticmethod
+    def validate_generator(generator: str) -> bool:
+        """验证 CMake 生成器配置是否有效。
+
+        Args:
+            generator: auto / ninja / make
+
+        Returns:
+            如果有效返回 True
+        """
+        from okcpp.core.generator import validate_generator
+
+        return validate_generator(generator)
+
+    @staticmethod
+    def validate_unity_batch(size: str) -> bool:
+        """验证 unity 构建批大小是否有效。
+
+        Args:
+            size: 每批合并的编译单元数（正整数）
+
+        Returns:
+            如果有效返回 True
+        """
+        from okcpp.core.unity import parse_unity_batch
+
+        try:
+            parse_unity_batch(size)
+        except ValueError:
+            return False
+        return True
+
+    def get_unity_batch(self) -> int:
+        """获取 unity 构建批大小。
+
+        Returns:
+            批大小，配置无效时返回默认值
+        """
+        from okcpp.core.unity import DEFAULT_UNITY_BATCH
+
+        if not self.validate_unity_batch(self.unity_batch):
+            return DEFAULT_UNITY_BATCH
+        return int(self.unity_batch)
+
+    def get_artifact_cache_mb(self) -> Optional[int]:
+        """获取构建产物缓存大小上限。
+
+        Returns:
+            大小上限（MB），None 表示不使用构建产物缓存
+        """
+        from okcpp.core.artifact_cache import DEFAULT_ARTIFACT_CACHE_MB
+
+        if not self.validate_build_cache_mb(self.artifact_cache_mb):
+            return DEFAULT_ARTIFACT_CACHE_MB or None
+        return int(self.artifact_cache_mb) or None
+
     @staticmethod
     def validate_template(template_name: str, templates_dir: Optional[Path] = None) -> bool:
         """验证模板是否存在。
@@ -91,11 +245,11 @@ class Config:
         Returns:
             如果模板存在返回 True
         """
+        from okcpp.core.template_catalog import load_catalog
+
         if templates_dir is None:
             templates_dir = ROOT_DIR / "templates"
-        return (templates_dir / template_name).exists() and (
-            templates_dir / template_name / "CMakeLists.txt"
-        ).exists()
+        return template_name in load_catalog(templates_dir)
 
 
 # 全局配置实例
@@ -1,13 +1,46 @@
-"""Logging utilities with colored output using rich."""
+"""Logging utilities with colored output.
 
+默认使用轻量的 ANSI 输出后端（非终端时输出纯文本），rich 只在真正需要时才导入，
+避免每条命令都付出导入 rich 的启动开销。
+"""
+
+import os
 import sys
 from typing import Optional
 
-from rich.console import Console
-from rich.text import Text
+# 延迟创建的 rich Console，见 get_console()
+_console = None
+
+# 强制的交互模式，None 表示自动检测，见 is_interactive()
+_interactive: Optional[bool] = None
+
+
+def get_console():
+    """获取 rich Console（首次调用时才导入 rich）。
+
+    Returns:
+        rich.console.Console 实例
+    """
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
+def reset_console() -> None:
+    """丢弃已创建的 console（标准输出被重定向后重新检测终端能力）。"""
+    global _console
+    _console = None
+
+
+def __getattr__(name: str):
+    """兼容旧代码对模块级 console 的访问。"""
+    if name == "console":
+        return get_console()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# 全局 console 实例
-console = Console()
 
 # ANSI 颜色代码（用于不使用 rich 的场景）
 class AnsiColor:
@@ -28,7 +61,70 @@ class AnsiColor:
     RESET = "\033[0m"
 
 
-def _format_message(prefix: str, prefix_style: str, message: str) -> Text:
+# 样式名称到 ANSI 颜色代码的映射
+_STYLE_CODES = {
+    "red": AnsiColor.RED,
+    "green": AnsiColor.GREEN,
+    "yellow": AnsiColor.YELLOW,
+    "blue": AnsiColor.BLUE,
+    "purple": AnsiColor.PURPLE,
+    "bold red": AnsiColor.RED_B,
+    "bold green": AnsiColor.GREEN_B,
+    "bold yellow": AnsiColor.YELLOW_B,
+    "bold blue": AnsiColor.BLUE_B,
+    "bold purple": AnsiColor.PURPLE_B,
+}
+
+
+def use_color(stream=None) -> bool:
+    """判断是否输出颜色。
+
+    遵循 NO_COLOR / FORCE_COLOR 约定，否则仅在终端上输出颜色。
+
+    Args:
+        stream: 输出流，默认为 sys.stdout
+
+    Returns:
+        如果应该输出 ANSI 颜色返回 True
+    """
+    if os.environ.get("NO_COLOR"):
+        return False
+    if os.environ.get("FORCE_COLOR"):
+        return True
+    stream = stream or sys.stdout
+    try:
+        return stream.isatty() and os.environ.get("TERM") != "dumb"
+    except (AttributeError, ValueError):
+        return False
+
+
+def _styled(message: str, style: Optional[str]) -> str:
+    """为消息添加 ANSI 样式（不输出颜色时原样返回）。
+
+    Args:
+        message: 消息内容
+        style: 样式名称
+
+    Returns:
+        处理后的字符串
+    """
+    code = _STYLE_CODES.get(style or "")
+    if code is None or not use_color():
+        return message
+    return f"{code}{message}{AnsiColor.RESET}"
+
+
+def _write(message: str, style: Optional[str] = None) -> None:
+    """输出一行消息。
+
+    Args:
+        message: 消息内容
+        style: 样式名称
+    """
+    print(_styled(message, style), flush=True)
+
+
+def _format_message(prefix: str, prefix_style: str, message: str) -> str:
     """格式化带前缀的消息。
 
     Args:
@@ -37,13 +133,9 @@ def _format_message(prefix: str, prefix_style: str, message: str) -> Text:
         message: 消息内容
 
     Returns:
-        格式化后的 Text 对象
+        格式化后的字符串
     """
-    text = Text()
-    text.append(prefix, style=prefix_style)
-    text.append(" ")
-    text.append(message)
-    return text
+    return f"{_styled(prefix, prefix_style)} {message}"
 
 
 def ok(message: str) -> None:
@@ -52,8 +144,7 @@ def ok(message: str) -> None:
     Args:
         message: 消息内容
     """
-    text = _format_message("[OK]", "bold green", message)
-    console.print(text)
+    print(_format_message("[OK]", "bold green", message), flush=True)
 
 
 def info(message: str) -> None:
@@ -62,8 +153,7 @@ def info(message: str) -> None:
     Args:
         message: 消息内容
     """
-    text = _format_message("[INFO]", "bold green", message)
-    console.print(text)
+    print(_format_message("[INFO]", "bold green", message), flush=True)
 
 
 def warn(message: str) -> None:
@@ -72,8 +162,7 @@ def warn(message: str) -> None:
     Args:
         message: 消息内容
     """
-    text = _format_message("[WARN]", "bold yellow", message)
-    console.print(text)
+    print(_format_message("[WARN]", "bold yellow", message), flush=True)
 
 
 def err(message: str) -> None:
@@ -82,8 +171,7 @@ def err(message: str) -> None:
     Args:
         message: 消息内容
     """
-    text = _format_message("[ERR]", "bold red", message)
-    console.print(text)
+    print(_format_message("[ERR]", "bold red", message), flush=True)
 
 
 def die(message: str, exit_code: int = 1) -> None:
@@ -97,15 +185,50 @@ def die(message: str, exit_code: int = 1) -> None:
     sys.exit(exit_code)
 
 
-def handle_error(message: str) -> None:
-    """处理构建错误，显示错误并等待用户按回车退出。
+def set_interactive(interactive: Optional[bool]) -> None:
+    """强制交互或非交互模式。
+
+    Args:
+        interactive: True / False 强制模式，None 恢复自动检测
+    """
+    global _interactive
+    _interactive = interactive
+
+
+def is_interactive() -> bool:
+    """判断是否在交互模式下运行。
+
+    标准输入不是终端（脚本、管道、编辑器插件、CI）或设置了 CI 环境变量时为非交互模式。
+
+    Returns:
+        如果是交互模式返回 True
+    """
+    if _interactive is not None:
+        return _interactive
+    if os.environ.get("CI"):
+        return False
+    try:
+        return sys.stdin is not None and sys.stdin.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def handle_error(message: str, exit_code: int = 1) -> None:
+    """处理构建错误，显示错误并退出。
+
+    交互模式下等待用户按回车后退出，非交互模式下立即退出。
 
     Args:
         message: 错误消息
+        exit_code: 退出码，默认为 1
     """
-    console.print(f"[Error] {message}", style="red")
-    input("Press Enter to exit...")
-    sys.exit(1)
+    _write(f"[Error] {message}", "red")
+    if is_interactive():
+        try:
+            input("Press Enter to exit...")
+        except EOFError:
+            pass
+    sys.exit(exit_code)
 
 
 # 颜色常量，用于直接在消息中使用
@@ -140,7 +263,7 @@ def print_blue(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="blue")
+    _write(message, "blue")
 
 
 def print_blue_b(message: str) -> None:
@@ -149,7 +272,7 @@ def print_blue_b(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="bold blue")
+    _write(message, "bold blue")
 
 
 def print_yellow(message: str) -> None:
@@ -158,7 +281,7 @@ def print_yellow(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="yellow")
+    _write(message, "yellow")
 
 
 def print_yellow_b(message: str) -> None:
@@ -167,7 +290,7 @@ def print_yellow_b(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="bold yellow")
+    _write(message, "bold yellow")
 
 
 def print_purple(message: str) -> None:
@@ -176,7 +299,7 @@ def print_purple(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="purple")
+    _write(message, "purple")
 
 
 def print_purple_b(message: str) -> None:
@@ -185,7 +308,7 @@ def print_purple_b(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="bold purple")
+    _write(message, "bold purple")
 
 
 def print_green(message: str) -> None:
@@ -194,7 +317,7 @@ def print_green(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="green")
+    _write(message, "green")
 
 
 def print_green_b(message: str) -> None:
@@ -203,7 +326,7 @@ def print_green_b(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="bold green")
+    _write(message, "bold green")
 
 
 def print_red(message: str) -> None:
@@ -212,7 +335,7 @@ def print_red(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="red")
+    _write(message, "red")
 
 
 def print_red_b(message: str) -> None:
@@ -221,7 +344,7 @@ def print_red_b(message: str) -> None:
     Args:
         message: 消息内容
     """
-    console.print(message, style="bold red")
+    _write(message, "bold red")
 
 
 def print_section(title: str) -> None:
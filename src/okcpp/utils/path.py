@@ -66,3 +66,15 @@ def get_cpu_count() -> int:
         return os.cpu_count() or 1
     except Exception:
         return 1
+
+
+def get_cache_dir() -> Path:
+    """获取 ok-cpp 的缓存目录。
+
+    Returns:
+        ${XDG_CACHE_HOME:-$HOME/.cache}/ok-cpp
+    """
+    import os
+
+    cache_base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(cache_base) / "ok-cpp"
@@ -0,0 +1,143 @@
+"""Tests for okcpp.core.artifact_cache: cache keys, path rewriting and seeding."""
+
+import os
+import shutil
+
+import pytest
+
+from okcpp.core import artifact_cache
+from okcpp.core.artifact_cache import (
+    ArtifactEntry,
+    _build_replacements,
+    _rewrite_text_files,
+    compute_artifact_key,
+    seed_build_tree,
+    store_build_tree,
+)
+
+TOOLCHAIN = ["gun", "Release", "Unix Makefiles"]
+
+
+def _project(path, name="app", source="int main() { return 0; }\n"):
+    path.mkdir(parents=True)
+    (path / "CMakeLists.txt").write_text(
+        f"cmake_minimum_required(VERSION 3.20)\nproject({name} LANGUAGES CXX)\n"
+        "add_executable(${PROJECT_NAME} main.cpp)\n"
+    )
+    (path / "main.cpp").write_text(source)
+    return path
+
+
+def _key(project):
+    return compute_artifact_key(project, project / "build", TOOLCHAIN)
+
+
+def test_key_ignores_project_name_location_and_build_tree(tmp_path):
+    a = _project(tmp_path / "a", name="first")
+    b = _project(tmp_path / "nested" / "b", name="second")
+    (b / "build" / "gun-Release").mkdir(parents=True)
+    (b / "build" / "gun-Release" / "CMakeCache.txt").write_text("stale")
+    (b / ".git").mkdir()
+    (b / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+    assert _key(a) is not None
+    assert _key(a) == _key(b)
+
+
+def test_key_changes_with_content_and_toolchain(tmp_path):
+    a = _project(tmp_path / "a")
+    b = _project(tmp_path / "b", source="int main() { return 1; }\n")
+    assert _key(a) != _key(b)
+    assert compute_artifact_key(a, a / "build", ["clang", "Release", "Unix Makefiles"]) != _key(a)
+    (a / "util.h").write_text("")
+    assert _key(a) != compute_artifact_key(b, b / "build", TOOLCHAIN)
+
+
+def test_key_skips_large_projects(tmp_path, monkeypatch):
+    a = _project(tmp_path / "a")
+    monkeypatch.setattr(artifact_cache, "MAX_PROJECT_BYTES", 16)
+    assert _key(a) is None
+
+
+def _entry(project_dir, build_dir, name="app"):
+    return ArtifactEntry(key="k", project_dir=str(project_dir), build_dir=str(build_dir),
+                         project_name=name, generator="Unix Makefiles", build_type="Release",
+                         objects=True, created=0.0)
+
+
+def test_rewrite_text_files(tmp_path):
+    build_dir = tmp_path / "new" / "build" / "gun-Release"
+    build_dir.mkdir(parents=True)
+    text = build_dir / "Makefile"
+    text.write_bytes(
+        b"SRC = /old/app/main.cpp\n"
+        b"BIN = /old/app/build/gun-Release/app\n"
+        b"OTHER = /old/app2/main.cpp\n"
+        b"DIR = CMakeFiles/app.dir CMakeFiles/app_test.dir CMakeFiles/myapp.dir\n"
+    )
+    binary = build_dir / "main.o"
+    binary.write_bytes(b"\x7fELF\0/old/app/main.cpp")
+    os.utime(text, ns=(1_000_000_000, 1_000_000_000))
+
+    entry = _entry("/old/app", "/old/app/build/gun-Release")
+    renames = [("app.dir", "demo.dir"), ("app_test.dir", "demo_test.dir")]
+    _rewrite_text_files(build_dir, _build_replacements(
+        entry, tmp_path / "new", build_dir, "demo", renames))
+
+    assert text.read_bytes() == (
+        f"SRC = {tmp_path}/new/main.cpp\n"
+        f"BIN = {build_dir}/app\n"
+        "OTHER = /old/app2/main.cpp\n"
+        "DIR = CMakeFiles/demo.dir CMakeFiles/demo_test.dir CMakeFiles/myapp.dir\n"
+    ).encode()
+    assert text.stat().st_mtime_ns == 1_000_000_000
+    assert binary.read_bytes() == b"\x7fELF\0/old/app/main.cpp"
+
+
+def test_no_replacements_for_same_location(tmp_path):
+    entry = _entry(tmp_path, tmp_path / "build")
+    assert _build_replacements(entry, tmp_path, tmp_path / "build", "app", []) == []
+
+
+@pytest.fixture
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def _stored_tree(project):
+    build_dir = project / "build" / "gun-Release"
+    (build_dir / "CMakeFiles" / "app.dir").mkdir(parents=True)
+    (build_dir / "CMakeCache.txt").write_text(f"CMAKE_HOME_DIRECTORY:INTERNAL={project}\n")
+    (build_dir / "CMakeFiles" / "app.dir" / "main.cpp.o").write_bytes(b"\x7fELF object")
+    (build_dir / "app").write_bytes(b"\x7fELF executable")
+    key = _key(project)
+    assert store_build_tree(key, project, build_dir, "app", "Unix Makefiles", "Release", 64)
+    return key
+
+
+def test_seed_other_project_reuses_configure_results_only(tmp_path, cache_home):
+    key = _stored_tree(_project(tmp_path / "a"))
+    b = _project(tmp_path / "b", name="demo")
+    build_dir = b / "build" / "gun-Release"
+
+    entry = seed_build_tree(key, b, build_dir, "demo")
+    assert entry is not None and not entry.objects
+    assert (build_dir / "CMakeCache.txt").read_text() == f"CMAKE_HOME_DIRECTORY:INTERNAL={b}\n"
+    assert (build_dir / "CMakeFiles" / "demo.dir").is_dir()
+    assert not (build_dir / "CMakeFiles" / "demo.dir" / "main.cpp.o").exists()
+    assert not (build_dir / "app").exists()
+
+
+def test_seed_same_project_reuses_objects(tmp_path, cache_home):
+    a = _project(tmp_path / "a")
+    key = _stored_tree(a)
+    build_dir = a / "build" / "gun-Release"
+    shutil.rmtree(a / "build")
+
+    entry = seed_build_tree(key, a, build_dir, "app")
+    assert entry is not None and entry.objects
+    assert (build_dir / "CMakeFiles" / "app.dir" / "main.cpp.o").read_bytes() == b"\x7fELF object"
+
+
+def test_seed_miss(tmp_path, cache_home):
+    a = _project(tmp_path / "a")
+    assert seed_build_tree(_key(a), a, a / "build" / "gun-Release", "app") is None
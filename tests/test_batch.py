@@ -0,0 +1,35 @@
+"""Tests for okcpp.core.batch."""
+
+from okcpp.core import batch
+from okcpp.core.batch import BATCH_LOG_NAME, JobBudget, _build_one
+from okcpp.core.builder import BuildConfig
+
+
+def test_budget_shares_remaining_jobs():
+    budget = JobBudget(8, 3)
+    assert budget.acquire() == 2
+    assert budget.acquire() == 3
+    assert budget.acquire() == 3
+    budget.release(3)
+    assert budget.available == 3
+
+
+def test_budget_gives_at_least_one_job():
+    budget = JobBudget(2, 5)
+    assert [budget.acquire() for _ in range(2)] == [1, 1]
+
+
+def test_setup_error_fails_only_that_project(tmp_path, monkeypatch):
+    def broken_migrate(config):
+        raise PermissionError("build directory is not writable")
+
+    monkeypatch.setattr(batch, "migrate_legacy_build_root", broken_migrate)
+    budget = JobBudget(4, 1)
+    result = _build_one(BuildConfig(), tmp_path, budget)
+
+    assert result.status == "FAIL"
+    assert result.phase == "error"
+    assert result.first_error == "PermissionError: build directory is not writable"
+    assert result.log_file == tmp_path / "build" / BATCH_LOG_NAME
+    # 分配到的任务数已归还
+    assert budget.available == 4
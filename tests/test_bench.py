@@ -0,0 +1,20 @@
+"""Tests for okcpp.core.bench."""
+
+import signal
+
+from okcpp.core.bench import measure, run_once
+
+
+def test_exit_code():
+    assert run_once(["sh", "-c", "exit 3"]).exit_code == 3
+
+
+def test_signal_exit_code_matches_shell():
+    sample = run_once(["sh", "-c", "kill -SEGV $$"])
+    assert sample.exit_code == 128 + signal.SIGSEGV
+
+
+def test_measure_stops_at_first_failure():
+    samples = measure(["sh", "-c", "kill -ABRT $$"], runs=5, warmup=0)
+    assert len(samples) == 1
+    assert samples[-1].exit_code == 128 + signal.SIGABRT
@@ -0,0 +1,37 @@
+"""Tests for okcpp.core.builder."""
+
+import pytest
+
+from okcpp.core import builder
+from okcpp.core.builder import BuildConfig, _configure_command
+from okcpp.core.timings import TIMING_WRAPPER_NAME
+
+
+def _launcher_args(cmd):
+    return [arg for arg in cmd if "_LAUNCHER=" in arg]
+
+
+@pytest.fixture
+def makefile_timings(tmp_path):
+    return BuildConfig(build_dir=tmp_path, generator="Unix Makefiles", timings_format="text")
+
+
+def test_timing_wrapper_as_linker_launcher(makefile_timings, monkeypatch):
+    monkeypatch.setattr(builder, "get_cmake_version", lambda: (3, 21))
+    wrapper = str(makefile_timings.build_dir / TIMING_WRAPPER_NAME)
+    args = _launcher_args(_configure_command(makefile_timings))
+    assert f"-DCMAKE_CXX_COMPILER_LAUNCHER={wrapper}" in args
+    assert f"-DCMAKE_CXX_LINKER_LAUNCHER={wrapper}" in args
+
+
+def test_no_linker_launcher_before_cmake_3_21(makefile_timings, monkeypatch, capsys):
+    monkeypatch.setattr(builder, "get_cmake_version", lambda: (3, 20))
+    args = _launcher_args(_configure_command(makefile_timings))
+    assert not [arg for arg in args if "LINKER_LAUNCHER" in arg]
+    assert "CMAKE_<LANG>_LINKER_LAUNCHER" in capsys.readouterr().out
+
+
+def test_linker_launcher_reset_without_timings(tmp_path, monkeypatch):
+    monkeypatch.setattr(builder, "get_cmake_version", lambda: (3, 25))
+    args = _launcher_args(_configure_command(BuildConfig(build_dir=tmp_path, generator="Unix Makefiles")))
+    assert "-DCMAKE_CXX_LINKER_LAUNCHER=" in args
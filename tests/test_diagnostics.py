@@ -0,0 +1,76 @@
+"""Tests for okcpp.core.diagnostics."""
+
+from okcpp.core.diagnostics import DiagnosticParser
+
+
+def _parse(lines):
+    parser = DiagnosticParser()
+    for line in lines:
+        parser.feed(line)
+    return parser
+
+
+def test_compiler_error_and_warning():
+    parser = _parse([
+        "[1/2] Building CXX object CMakeFiles/app.dir/main.cpp.o",
+        "/src/app/main.cpp:7:5: warning: unused variable 'x' [-Wunused-variable]",
+        "/src/app/main.cpp:9:12: error: 'foo' was not declared in this scope",
+        "/src/app/main.cpp:3:1: note: declared here",
+        "/src/app/util.h:2: fatal error: missing.h: No such file or directory",
+    ])
+    assert parser.count("error") == 2
+    assert parser.count("warning") == 1
+    assert parser.count("note") == 1
+    first = parser.first_error
+    assert (first.file, first.line, first.column) == ("/src/app/main.cpp", 9, 12)
+    assert first.describe() == "/src/app/main.cpp:9:12: error: 'foo' was not declared in this scope"
+    assert parser.diagnostics[-1].column is None
+    assert parser.summary() == "2 errors, 1 warning"
+
+
+def test_cmake_error_with_indented_message():
+    parser = _parse([
+        "CMake Error at CMakeLists.txt:12 (add_executable):",
+        "  Cannot find source file:",
+        "",
+        "    missing.cpp",
+        "",
+        "-- Configuring incomplete, errors occurred!",
+    ])
+    first = parser.first_error
+    assert first.source == "cmake"
+    assert (first.file, first.line) == ("CMakeLists.txt", 12)
+    assert first.message == "Cannot find source file: missing.cpp"
+
+
+def test_cmake_error_without_location():
+    first = _parse(["CMake Error: The source directory does not exist."]).first_error
+    assert first.file is None
+    assert first.describe() == "error: The source directory does not exist."
+
+
+def test_linker_undefined_reference():
+    parser = _parse([
+        "/usr/bin/ld: CMakeFiles/app.dir/main.cpp.o: in function `main':",
+        "main.cpp:(.text+0x1d): undefined reference to `foo()'",
+        "collect2: error: ld returned 1 exit status",
+    ])
+    assert parser.count("note") == 1
+    first = parser.first_error
+    assert first.source == "linker"
+    assert first.file == "main.cpp"
+    assert first.message == "undefined reference to `foo()'"
+
+
+def test_linker_error_prefix_is_not_repeated():
+    first = _parse(["/usr/bin/ld.gold: error: cannot find -lfoo"]).first_error
+    assert first.describe() == "error: cannot find -lfoo"
+    first = _parse(["mold: fatal: library not found: foo"]).first_error
+    assert first.describe() == "error: library not found: foo"
+
+
+def test_linker_warning():
+    parser = _parse(["/usr/bin/ld: warning: libbar.so, needed by libfoo.so, not found"])
+    assert parser.count("warning") == 1
+    assert parser.first_error is None
+    assert parser.summary() == "0 errors, 1 warning"
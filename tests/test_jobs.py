@@ -0,0 +1,57 @@
+"""Tests for okcpp.core.jobs."""
+
+import pytest
+
+from okcpp.core import jobs
+from okcpp.core.jobs import parse_jobs, plan_jobs
+
+
+def _machine(monkeypatch, cpus, load, mem_mb):
+    monkeypatch.setattr(jobs, "get_cpu_count", lambda: cpus)
+    monkeypatch.setattr(jobs, "get_load_average", lambda: load)
+    monkeypatch.setattr(jobs, "get_available_memory_mb", lambda: mem_mb)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, None), ("", None), ("auto", None), (" AUTO ", None), ("0", None), ("8", 8),
+])
+def test_parse_jobs(value, expected):
+    assert parse_jobs(value) == expected
+
+
+@pytest.mark.parametrize("value", ["-2", "many", "1.5"])
+def test_parse_jobs_invalid(value):
+    with pytest.raises(ValueError):
+        parse_jobs(value)
+
+
+def test_plan_jobs_priority(monkeypatch):
+    _machine(monkeypatch, cpus=8, load=0.0, mem_mb=64 * 1024)
+    assert plan_jobs(4, 6).jobs == 4
+    assert plan_jobs(4, 6).source == "cli"
+    assert plan_jobs(None, 6).jobs == 6
+    assert plan_jobs(None, 6).source == "config"
+    plan = plan_jobs()
+    assert (plan.jobs, plan.source) == (8, "auto")
+
+
+def test_plan_jobs_auto_subtracts_load(monkeypatch):
+    _machine(monkeypatch, cpus=8, load=5.4, mem_mb=64 * 1024)
+    assert plan_jobs().jobs == 3
+
+
+def test_plan_jobs_auto_limited_by_memory(monkeypatch):
+    _machine(monkeypatch, cpus=16, load=0.0, mem_mb=3 * jobs.MEMORY_PER_JOB_MB + 100)
+    assert plan_jobs().jobs == 3
+
+
+def test_plan_jobs_auto_at_least_one(monkeypatch):
+    _machine(monkeypatch, cpus=2, load=10.0, mem_mb=100)
+    assert plan_jobs().jobs == 1
+
+
+def test_plan_jobs_auto_unknown_load_and_memory(monkeypatch):
+    _machine(monkeypatch, cpus=4, load=None, mem_mb=None)
+    plan = plan_jobs()
+    assert plan.jobs == 4
+    assert plan.describe() == "4 (auto: 4 CPUs)"
@@ -0,0 +1,93 @@
+"""Tests for okcpp.core.linker."""
+
+import pytest
+
+from okcpp.core import linker
+from okcpp.core.linker import (
+    LinkComparison,
+    compare_link_times,
+    is_linker_failure,
+    linker_cmake_args,
+    read_linker_fallback,
+    write_linker_fallback,
+)
+from okcpp.core.timings import BuildTimings, UnitTiming
+
+
+@pytest.mark.parametrize("line", [
+    "g++: error: unrecognized command-line option '-fuse-ld=mold'",
+    "clang++: error: invalid linker name in argument '-fuse-ld=mold'",
+    "collect2: fatal error: cannot find 'ld'",
+    "collect2: fatal error: ld terminated with signal 11 [Segmentation fault], core dumped",
+    "clang++: error: linker command failed due to signal (use -v to see invocation)",
+    "ld.lld: error: unknown argument: --foo",
+    "mold: fatal: unknown command line option: --foo",
+    "/usr/bin/ld.gold: --foo: unknown option",
+    "/usr/bin/ld.gold: fatal error: app.o: plugin needed to handle lto object",
+    "CMake Error: LINKER_TYPE 'MOLD' is unknown or not supported by this toolchain",
+])
+def test_linker_failure(line):
+    assert is_linker_failure([line])
+
+
+@pytest.mark.parametrize("lines", [
+    # Ninja 回显的失败命令中包含 -fuse-ld
+    ["FAILED: app", ": && /usr/bin/g++ -O3 -fuse-ld=gold main.o -o app -lfoo && :",
+     "/usr/bin/ld.gold: error: cannot find -lfoo",
+     "collect2: error: ld returned 1 exit status"],
+    ["mold: fatal: library not found: foo"],
+    ["/usr/bin/ld.gold: error: main.o: undefined reference to 'foo()'",
+     "ld.lld: error: unknown argument: --foo"],
+    ["main.cpp:(.text+0x1d): undefined reference to `foo()'"],
+])
+def test_not_linker_failure(lines):
+    assert not is_linker_failure(lines)
+
+
+def test_linker_cmake_args_new_cmake(monkeypatch):
+    monkeypatch.setattr(linker, "get_cmake_version", lambda: (3, 29))
+    assert linker_cmake_args("mold") == ["-DCMAKE_LINKER_TYPE=MOLD"]
+    assert linker_cmake_args(None) == ["-UCMAKE_LINKER_TYPE"]
+
+
+def test_linker_cmake_args_old_cmake_keeps_ldflags(monkeypatch):
+    monkeypatch.setattr(linker, "get_cmake_version", lambda: (3, 25))
+    monkeypatch.setenv("LDFLAGS", "-L/opt/lib")
+    assert linker_cmake_args("lld") == [
+        f"-DCMAKE_{kind}_LINKER_FLAGS=-L/opt/lib -fuse-ld=lld" for kind in ("EXE", "SHARED", "MODULE")
+    ]
+    monkeypatch.delenv("LDFLAGS")
+    assert linker_cmake_args(None)[0] == "-DCMAKE_EXE_LINKER_FLAGS="
+
+
+def test_linker_fallback_marker(tmp_path):
+    assert read_linker_fallback(tmp_path) is None
+    write_linker_fallback(tmp_path, "gold")
+    assert read_linker_fallback(tmp_path) == "gold"
+
+
+def _record(linker_name, link_seconds, compiler="gun"):
+    features = [f"linker={linker_name}"] if linker_name else []
+    return BuildTimings(
+        timestamp=0.0, project="app", compiler=compiler, build_type="Release", generator="Ninja",
+        features=features,
+        units=[UnitTiming(output=output, seconds=seconds, kind="link")
+               for output, seconds in link_seconds.items()],
+    )
+
+
+def test_compare_link_times():
+    history = [
+        _record(None, {"app": 0.8, "lib.so": 0.4}),
+        _record("mold", {"app": 0.06}),
+        _record(None, {"app": 0.7}, compiler="clang"),
+    ]
+    result = compare_link_times(history, _record("mold", {"app": 0.05, "lib.so": 0.02}))
+    assert result == LinkComparison(linker="mold", other="default", outputs=2,
+                                    time=pytest.approx(0.07), other_time=pytest.approx(1.2))
+    assert result.saved == pytest.approx(1.13)
+
+
+def test_compare_link_times_without_baseline():
+    assert compare_link_times([_record("mold", {"app": 0.06})], _record("mold", {"app": 0.05})) is None
+    assert compare_link_times([_record(None, {"other": 0.8})], _record("mold", {"app": 0.05})) is None
@@ -0,0 +1,107 @@
+"""Tests for the perf / gprof output parsers in okcpp.core.profile."""
+
+import pytest
+
+from okcpp.core.profile import (
+    fold_gprof,
+    parse_gprof_callers,
+    parse_gprof_flat,
+    parse_perf_script,
+    parse_perf_stat,
+)
+
+PERF_SCRIPT = """\
+app 1234 100.000001:     1001 cycles:
+\t    55d0c0a01139 leaf(int)+0x19 (/tmp/app/build/app)
+\t    55d0c0a01160 a()+0x10 (/tmp/app/build/app)
+\t    55d0c0a01180 main+0x10 (/tmp/app/build/app)
+\t    7f0c0c029d90 [unknown] (/usr/lib/x86_64-linux-gnu/libc.so.6)
+
+app 1234 100.000002:     1001 cycles:
+\t    55d0c0a01139 leaf(int)+0x22 (/tmp/app/build/app)
+\t    55d0c0a01160 a()+0x10 (/tmp/app/build/app)
+\t    55d0c0a01180 main+0x10 (/tmp/app/build/app)
+\t    7f0c0c029d90 [unknown] (/usr/lib/x86_64-linux-gnu/libc.so.6)
+
+app 1234 100.000003:     1001 cycles:
+\t    55d0c0a01139 std::map<int;int>::find+0x5 (/tmp/app/build/app)
+\t    55d0c0a01180 main+0x14 (/tmp/app/build/app)
+"""
+
+PERF_STAT = """\
+# started on Sat Oct 17 03:00:00 2026
+
+2000000,,cycles:u,1000,100.00,,
+3000000,,instructions:u,1000,100.00,1.50,insn per cycle
+<not supported>,,cache-misses:u,0,100.00,,
+"""
+
+GPROF_FLAT = """\
+Flat profile:
+
+Each sample counts as 0.01 seconds.
+  %   cumulative   self              self     total
+ time   seconds   seconds    calls  ms/call  ms/call  name
+100.17      0.15     0.15        2    75.13    75.13  leaf(int)
+  0.00      0.15     0.00        1     0.00    75.13  a()
+  0.00      0.15     0.00        1     0.00    75.13  b()
+"""
+
+GPROF_CALL_GRAPH = """\
+index % time    self  children    called     name
+                                                 <spontaneous>
+[1]    100.0    0.00    0.15                 main [1]
+                0.00    0.08       1/1           b() [4]
+                0.00    0.08       1/1           a() [3]
+-----------------------------------------------
+                0.08    0.00       1/2           a() [3]
+                0.08    0.00       1/2           b() [4]
+[2]    100.0    0.15    0.00       2         leaf(int) [2]
+-----------------------------------------------
+                0.00    0.08       1/1           main [1]
+[3]     50.0    0.00    0.08       1         a() [3]
+                0.08    0.00       1/2           leaf(int) [2]
+-----------------------------------------------
+                0.00    0.08       1/1           main [1]
+[4]     50.0    0.00    0.08       1         b() [4]
+                0.08    0.00       1/2           leaf(int) [2]
+-----------------------------------------------
+"""
+
+
+def test_parse_perf_script():
+    stacks = parse_perf_script(PERF_SCRIPT, "app")
+    assert stacks == {
+        "app;[libc.so.6];main;a();leaf(int)": 2,
+        "app;main;std::map<int:int>::find": 1,
+    }
+
+
+def test_parse_perf_stat():
+    report = parse_perf_stat(PERF_STAT)
+    assert report.counters == {"cycles": 2000000.0, "instructions": 3000000.0}
+
+
+def test_parse_gprof_flat():
+    assert parse_gprof_flat(GPROF_FLAT) == {"leaf(int)": 0.15, "a()": 0.0, "b()": 0.0}
+
+
+def test_parse_gprof_callers():
+    callers = parse_gprof_callers(GPROF_CALL_GRAPH)
+    assert callers["main"] == {}
+    assert callers["leaf(int)"] == {"a()": 1, "b()": 1}
+    assert callers["a()"] == {"main": 1}
+    assert callers["b()"] == {"main": 1}
+
+
+def test_fold_gprof_splits_self_time_by_calls():
+    stacks = fold_gprof(parse_gprof_flat(GPROF_FLAT), parse_gprof_callers(GPROF_CALL_GRAPH), "app")
+    assert stacks == pytest.approx({
+        "app;main;a();leaf(int)": 7.5,
+        "app;main;b();leaf(int)": 7.5,
+    })
+
+
+def test_fold_gprof_recursion_terminates():
+    callers = {"f": {"f": 10, "main": 1}, "main": {}}
+    assert fold_gprof({"f": 0.02}, callers, "app") == pytest.approx({"app;main;f": 2.0})
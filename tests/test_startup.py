@@ -0,0 +1,61 @@
+"""Startup-time benchmark: the CLI must start without importing rich."""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+OK_CPP = Path(__file__).resolve().parent.parent / "src" / "bin" / "ok-cpp"
+
+# 启动时间上限（秒，多次运行的中位数）；导入 rich 时通常会超过
+MAX_STARTUP_SECONDS = 0.5
+
+HELP_COMMANDS = [
+    ["--help"],
+    ["run", "--help"],
+    ["bench", "--help"],
+    ["compare", "--help"],
+    ["sweep", "--help"],
+    ["doctor", "--help"],
+]
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["OKCPP_NO_DAEMON"] = "1"
+    return env
+
+
+def _imported_modules(args: list) -> set:
+    """用 -X importtime 运行 ok-cpp，返回导入的顶层模块名。"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", str(OK_CPP)] + args,
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            name = line.rsplit("|", 1)[1].strip()
+            modules.add(name.split(".")[0])
+    return modules
+
+
+@pytest.mark.parametrize("args", HELP_COMMANDS, ids=" ".join)
+def test_help_does_not_import_rich(args):
+    modules = _imported_modules(args)
+    assert "okcpp" in modules
+    assert "rich" not in modules
+
+
+def test_help_startup_time():
+    durations = []
+    for _ in range(5):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(OK_CPP), "--help"], stdout=subprocess.DEVNULL,
+                       env=_env(), check=True)
+        durations.append(time.perf_counter() - start)
+    assert statistics.median(durations) < MAX_STARTUP_SECONDS
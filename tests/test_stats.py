@@ -0,0 +1,71 @@
+"""Tests for okcpp.core.stats."""
+
+import math
+
+import pytest
+
+from okcpp.core.stats import (
+    bootstrap_ratio_ci,
+    compare_samples,
+    regularized_beta,
+    student_t_two_sided_p,
+    welch_t_test,
+)
+
+
+@pytest.mark.parametrize("x", [0.0, 0.1, 0.5, 0.9, 1.0])
+def test_regularized_beta_uniform(x):
+    # I_x(1, 1) = x
+    assert regularized_beta(1, 1, x) == pytest.approx(x)
+
+
+@pytest.mark.parametrize("t, dof, expected", [
+    (0.0, 5, 1.0),
+    (1.0, 1, 0.5),          # Cauchy: P(|T| >= 1) = 1/2
+    (2.228139, 10, 0.05),   # 表中的 97.5% 分位数
+    (1.959964, 1e6, 0.05),  # 自由度很大时接近正态分布
+    (math.inf, 3, 0.0),
+])
+def test_student_t_two_sided_p(t, dof, expected):
+    assert student_t_two_sided_p(t, dof) == pytest.approx(expected, abs=1e-4)
+    assert student_t_two_sided_p(-t, dof) == pytest.approx(expected, abs=1e-4)
+
+
+def test_welch_t_test():
+    t, dof, p = welch_t_test([1, 2, 3, 4, 5], [2, 3, 4, 5, 6])
+    assert t == pytest.approx(-1.0)
+    assert dof == pytest.approx(8.0)
+    assert p == pytest.approx(0.34659, abs=1e-4)
+
+
+def test_welch_t_test_without_variance():
+    assert welch_t_test([1.0, 1.0], [1.0, 1.0]) == (0.0, 1.0, 1.0)
+    t, _, p = welch_t_test([2.0, 2.0], [1.0, 1.0])
+    assert t == math.inf
+    assert p == 0.0
+
+
+def test_bootstrap_ratio_ci_is_reproducible_and_contains_ratio():
+    a = [2.0, 2.1, 1.9, 2.05, 1.95, 2.02]
+    b = [1.0, 1.05, 0.95, 1.02, 0.98, 1.01]
+    low, high = bootstrap_ratio_ci(a, b)
+    assert (low, high) == bootstrap_ratio_ci(a, b)
+    assert low <= 2.0 <= high
+    assert low > 1.5
+
+
+def test_compare_samples_significant_speedup():
+    a = [2.0, 2.1, 1.9, 2.05, 1.95, 2.02]
+    b = [1.0, 1.05, 0.95, 1.02, 0.98, 1.01]
+    result = compare_samples(a, b)
+    assert result.speedup == pytest.approx(2.01 / 1.005)
+    assert result.significant
+    assert "B is faster than A" in result.describe()
+
+
+def test_compare_samples_no_difference():
+    a = [1.0, 1.2, 0.9, 1.1, 1.05]
+    b = [1.1, 0.95, 1.15, 1.0, 1.05]
+    result = compare_samples(a, b)
+    assert not result.significant
+    assert result.describe("old", "new").endswith("no significant difference")
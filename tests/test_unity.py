@@ -0,0 +1,58 @@
+"""Tests for okcpp.core.unity."""
+
+import pytest
+
+from okcpp.core.timings import BuildTimings
+from okcpp.core.unity import estimate_unity_speedup, is_unity_clash, parse_unity_batch
+
+
+@pytest.mark.parametrize("line", [
+    "src/b.cpp:1:12: error: redefinition of 'int helper()'",
+    "src/b.cpp:3:5: error: conflicting declaration 'double x'",
+    "src/b.cpp:9:3: error: reference to 'count' is ambiguous",
+    "src/b.cpp:4:8: error: 'int x' redeclared as different kind of entity",
+    "src/b.cpp:1:9: error: 'FOO' macro redefined [-Werror,-Wmacro-redefined]",
+])
+def test_unity_clash(line):
+    assert is_unity_clash(["[1/2] Building CXX object unity_0_cxx.cxx.o", line])
+
+
+@pytest.mark.parametrize("line", [
+    "/usr/bin/ld: b.o: multiple definition of `foo()'; a.o: first defined here",
+    "a.obj : error LNK2005: foo already defined in b.obj",
+    "src/a.cpp:3:5: note: previous definition of 'int helper()'",
+    "src/a.cpp:3:5: error: 'foo' was not declared in this scope",
+])
+def test_not_unity_clash(line):
+    assert not is_unity_clash([line])
+
+
+def test_parse_unity_batch():
+    assert parse_unity_batch("16") == 16
+    for value in ("0", "-1", "x"):
+        with pytest.raises(ValueError):
+            parse_unity_batch(value)
+
+
+def _record(build, features=(), full_build=True, generator="Ninja"):
+    return BuildTimings(timestamp=0.0, project="app", compiler="gun", build_type="Release",
+                        generator=generator, features=list(features),
+                        phases={"build": build}, full_build=full_build)
+
+
+def test_estimate_unity_speedup_uses_latest_matching_full_build():
+    history = [
+        _record(12.0),
+        _record(10.0),
+        _record(1.0, full_build=False),
+        _record(4.0, features=["unity=8"]),
+        _record(9.0, generator="Unix Makefiles"),
+    ]
+    speedup = estimate_unity_speedup(history, _record(4.0, features=["unity=8"]))
+    assert speedup.normal_time == 10.0
+    assert speedup.speedup == pytest.approx(2.5)
+
+
+def test_estimate_unity_speedup_needs_full_builds():
+    assert estimate_unity_speedup([_record(10.0)], _record(4.0, ["unity=8"], full_build=False)) is None
+    assert estimate_unity_speedup([_record(10.0, ["pch"])], _record(4.0, ["unity=8"])) is None